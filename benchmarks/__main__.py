@@ -0,0 +1,22 @@
+import sys
+
+from benchmarks import bench_crsf, bench_fusion, bench_headtracker, bench_ipc, bench_shaping, bench_tick
+from benchmarks.harness import cli
+
+# ===================== ALL BENCHMARKS =====================
+MODULES = (bench_crsf, bench_headtracker, bench_shaping, bench_fusion, bench_tick, bench_ipc)
+
+
+def collect():
+    cases = []
+    for module in MODULES:
+        cases.extend(module.collect())
+    return cases
+
+
+def main(argv=None):
+    return cli(collect, argv, "Control path benchmarks")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
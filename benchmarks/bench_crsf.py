@@ -0,0 +1,59 @@
+import random
+import sys
+
+from crsf import CRSF_ADDRESS, CRSF_FRAMETYPE_RC_CHANNELS, CrsfEncoder, crc8, map_range, np, pack_crsf_channels
+
+from benchmarks.harness import Case, cli
+
+# ===================== LEGACY =====================
+# pack_crsf_channels as it was before CrsfEncoder (byte-sum checksum)
+def legacy_pack_crsf_channels(ch):
+    buf = 0
+    bits = 0
+    out = []
+    for c in ch:
+        buf |= (c & 0x7FF) << bits
+        bits += 11
+        while bits >= 8:
+            out.append(buf & 0xFF)
+            buf >>= 8
+            bits -= 8
+    if bits:
+        out.append(buf & 0xFF)
+    payload = bytes(out)
+    frame = bytes([CRSF_ADDRESS, len(payload) + 2, CRSF_FRAMETYPE_RC_CHANNELS]) + payload
+    crc = 0
+    for b in frame[2:]:
+        crc = (crc + b) & 0xFF
+    return frame + bytes([crc])
+
+# ===================== BENCH =====================
+def collect():
+    rng = random.Random(1)
+    rows = [[rng.randint(172, 1811) for _ in range(16)] for _ in range(256)]
+
+    enc = CrsfEncoder()
+    for ch in rows:
+        frame = enc.encode(ch)
+        legacy = legacy_pack_crsf_channels(ch)
+        assert frame[:25] == legacy[:25]
+        assert frame[25] == crc8(frame[2:25])
+
+    ch = rows[0]
+    batch = rows * 4
+    if np is not None:
+        batch = np.array(batch, dtype=np.uint16)
+
+    return [
+        Case("crsf: legacy pack_crsf_channels", lambda: legacy_pack_crsf_channels(ch), 20000),
+        Case("crsf: pack_crsf_channels", lambda: pack_crsf_channels(ch), 20000),
+        Case("crsf: CrsfEncoder.encode", lambda: enc.encode(ch), 20000),
+        Case(f"crsf: encode_many ({len(batch)} rows)", lambda: enc.encode_many(batch), 20),
+        Case("crsf: map_range", lambda: map_range(0.37, -1, 1, 172, 1811), 100000),
+    ]
+
+def main(argv=None):
+    return cli(collect, argv, "CRSF encoder benchmarks")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
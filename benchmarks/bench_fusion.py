@@ -0,0 +1,73 @@
+import math
+import random
+import sys
+
+from head_fusion import FUSION_LEVELS, FUSION_PREDICT, HeadFusion
+from headtracker import HeadSample
+
+from benchmarks.harness import Case, cli
+
+# ===================== BENCH =====================
+TRACKER_HZ = 400
+CONTROL_HZ = 250
+
+
+def _samples(n=4096):
+    rng = random.Random(2)
+    out = []
+    for i in range(n):
+        t = i / TRACKER_HZ
+        out.append(HeadSample(t, 40.0 * math.sin(t) + rng.gauss(0, 0.3), 10.0 * math.sin(0.7 * t)))
+    return out
+
+
+def _update_fn(level):
+    fusion = HeadFusion(level)
+    samples = _samples()
+    state = {"i": 0}
+
+    def update():
+        i = state["i"] = (state["i"] + 1) & 4095
+        s = fusion.update(samples[i])
+        fusion.predict(s.t + 0.001)
+
+    return update
+
+
+def _tick_fn():
+    # worst case per control tick at 250 Hz with a 400 Hz tracker: two fused
+    # samples (the reader thread) and one prediction (the TX thread)
+    fusion = HeadFusion(FUSION_PREDICT)
+    samples = _samples()
+    state = {"i": 0}
+
+    def tick():
+        i = state["i"] = (state["i"] + 2) & 4094
+        fusion.update(samples[i])
+        s = fusion.update(samples[i + 1])
+        fusion.predict(s.t + 0.002)
+
+    return tick
+
+
+def collect():
+    cases = [Case(f"fusion: {level} update+predict", _update_fn(level), 20000) for level in FUSION_LEVELS]
+    cases.append(Case(f"fusion: {CONTROL_HZ} Hz tick share", _tick_fn(), 20000))
+    return cases
+
+
+def report(results):
+    budget_ns = 1e9 / CONTROL_HZ
+    for r in results:
+        if r.name.endswith("tick share"):
+            print(f"fusion per {budget_ns / 1e6:.0f} ms tick: mean {r.ns_per_op / 1000:.1f} us "
+                  f"({r.ns_per_op / budget_ns * 100:.2f}% of budget), p99 {r.p99_ns / 1000:.1f} us "
+                  f"({r.p99_ns / budget_ns * 100:.2f}%)")
+
+
+def main(argv=None):
+    return cli(collect, argv, "Head fusion benchmarks", report)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
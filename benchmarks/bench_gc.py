@@ -0,0 +1,113 @@
+import argparse
+import gc
+import sys
+import time
+
+from control_core import ControlCore, ControlLoop
+from crsf import CrsfEncoder
+from gc_tuning import GcGovernor
+from headtracker import HeadSample
+from tx_engine import CrsfTxEngine
+
+# ===================== BENCH =====================
+# tick-time tail with the interpreter's own collections against tuned mode.
+# Each tick is a real TX slot plus what the GUI side leaves behind per frame
+# (label text, small reference cycles like Qt item wrappers); the startup
+# heap stands in for widgets, curve tables and imported modules. Gaps are
+# simulated: after a tick the governor is handed period - tick time.
+AXES = [(0.3 * (i % 7 - 3), 0.0, 0.05 * (i % 5), -0.02 * (i % 3), -1.0, 0.1 * (i % 11) - 0.4) for i in range(64)]
+PERIOD_S = 1.0 / 250
+
+
+class _NullPort:
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class _Item:
+    # a parent <-> child pair, only the cycle collector frees it
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+
+def _startup_heap(n):
+    return [{"id": i, "name": f"item{i}", "children": [i, i + 1]} for i in range(n)]
+
+
+def _tick_fn():
+    core = ControlCore()
+    head = HeadSample(0.0, 12.5, -3.0)
+    control = ControlLoop(core, lambda now: head)
+    tx = CrsfTxEngine(CrsfEncoder().encode)
+    tx.port = _NullPort()
+    tx.producer = control
+    state = {"i": 0}
+
+    def tick():
+        i = state["i"] = state["i"] + 1
+        control.set_axes(AXES[i & 63], time.perf_counter_ns())
+        now = time.perf_counter()
+        tx.run_slot(now, now)
+        # per-frame GUI garbage
+        root = _Item()
+        for _ in range(8):
+            _Item(root)
+        return f"S: {core.channels[0]}  T: {core.channels[1]}  Yaw: {core.adj_yaw:.1f}"
+
+    return tick
+
+
+def run(tune, ticks, heap):
+    startup = _startup_heap(heap)
+    tick = _tick_fn()
+    gov = GcGovernor(tune=tune).install()
+    clock = time.perf_counter_ns
+    times = []
+    try:
+        for _ in range(ticks):
+            t0 = clock()
+            tick()
+            dt = clock() - t0
+            times.append(dt)
+            gov.idle(PERIOD_S - dt / 1e9)
+    finally:
+        gov.uninstall()
+    del startup
+    gc.collect()
+    times.sort()
+    n = len(times)
+    return {
+        "p50": times[n // 2] / 1e6,
+        "p99": times[min(n - 1, int(n * 0.99))] / 1e6,
+        "p999": times[min(n - 1, int(n * 0.999))] / 1e6,
+        "max": times[-1] / 1e6,
+        "gc": gov.stats(),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m benchmarks.bench_gc",
+                                description="TX tick tail latency with default and tuned garbage collection")
+    p.add_argument("--ticks", type=int, default=20000)
+    p.add_argument("--heap", type=int, default=300000, help="long-lived objects created at startup")
+    args = p.parse_args(argv)
+
+    print(f"{'mode':<8} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8}  gc pauses (gen0/1/2, p99/max ms)")
+    for tune in (False, True):
+        r = run(tune, args.ticks, args.heap)
+        g = r["gc"]
+        gen = g["collections"]
+        print(f"{'tuned' if tune else 'default':<8} {r['p50']:>8.3f} {r['p99']:>8.3f} {r['p999']:>8.3f} {r['max']:>8.3f}  "
+              f"{gen[0]}/{gen[1]}/{gen[2]}, {g['pause_p99_ms']:.2f}/{g['pause_max_ms']:.2f}"
+              + (f", {g['scheduled']} between ticks" if tune else ""), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,46 @@
+import struct
+import sys
+
+from crsf import crc8
+from headtracker import BIN_SYNC, HeadTrackParser
+
+from benchmarks.harness import Case, cli
+
+# ===================== BENCH =====================
+BURSTS = (1, 4, 16, 64)
+
+
+def _ascii_burst(n):
+    return b"".join(f"YAW:{i * 1.5 - 40:.1f},PITCH:{i * 0.5 - 10:.1f}\r\n".encode() for i in range(n))
+
+
+def _binary_burst(n):
+    out = bytearray()
+    for i in range(n):
+        body = struct.pack("<BhhI", i & 0xFF, i * 150 - 4000, i * 50 - 1000, i * 2500)
+        out += bytes([BIN_SYNC]) + body + bytes([crc8(body)])
+    return bytes(out)
+
+
+def _feeder(data, mode):
+    parser = HeadTrackParser()
+    parser.mode = mode
+    assert parser.feed(data, 0.0) is not None
+    return lambda: parser.feed(data, 0.0)
+
+
+def collect():
+    cases = []
+    for n in BURSTS:
+        cases.append(Case(f"head: ascii burst x{n}", _feeder(_ascii_burst(n), "ascii"), max(200, 20000 // n)))
+    for n in BURSTS:
+        cases.append(Case(f"head: binary burst x{n}", _feeder(_binary_burst(n), "binary"), max(200, 20000 // n)))
+    return cases
+
+
+def main(argv=None):
+    return cli(collect, argv, "Head-tracking parser benchmarks")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,68 @@
+import atexit
+import sys
+
+from control_core import clock
+from control_process import ControlProcess, STATE_STRUCT, _ControlChild
+
+from benchmarks.harness import Case, cli
+
+# ===================== BENCH =====================
+# the copies process isolation adds, both ends in this process: the child
+# publishing its state, the GUI polling it, and a command going the other way
+PUBLISH_HZ = 200
+
+
+def _pair():
+    remote = ControlProcess()
+    child = _ControlChild(remote._cmd.name, remote._state.name, 0.004, 0.005, True, False)
+    # fill the slow stats once, then keep them, so only the per-publish copy is timed
+    child._publish(clock())
+    child._slow_t = float("inf")
+
+    def close():
+        child.commands.close()
+        child.state.close()
+        remote.stop()
+
+    atexit.register(close)
+    return remote, child
+
+
+def collect():
+    remote, child = _pair()
+    state = {"rate": 0}
+
+    def publish():
+        child._publish(0.0)
+
+    def publish_poll():
+        child._publish(0.0)
+        remote.poll()
+
+    def command():
+        state["rate"] ^= 1
+        remote.send(rate_hz=250 if state["rate"] else 150)
+        seq, values = child.commands.read(child._cmd_seq)
+        child._cmd_seq = seq
+
+    return [
+        Case("ipc: child publish", publish, 20000),
+        Case("ipc: child publish + gui poll", publish_poll, 20000),
+        Case("ipc: gui command + child read", command, 20000),
+    ]
+
+
+def report(results):
+    by_name = {r.name: r for r in results}
+    both = by_name.get("ipc: child publish + gui poll")
+    if both is not None:
+        print(f"state struct {STATE_STRUCT.size} B: publish + poll {both.ns_per_op / 1000:.1f} us, "
+              f"{both.ns_per_op * PUBLISH_HZ / 1e7:.3f}% of one core at {PUBLISH_HZ} Hz")
+
+
+def main(argv=None):
+    return cli(collect, argv, "Process isolation copy benchmarks", report)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,52 @@
+import sys
+
+from control_core import ControlCore, apply_deadzone, read_axes
+from mixer import INPUTS, Mixer
+from shaping import BIPOLAR, Curve, shape_value
+
+from benchmarks.harness import Case, cli
+
+# ===================== BENCH =====================
+AXES = (0.42, 0.0, 0.1, -0.2, -1.0, 0.3)
+MIX_INPUTS = (0.42, 0.65, 0.1, -0.2, 0.0, 0.0, 0.1, -0.2, 0.42, 0.42, 0.0, 0.1, -0.2, -1.0, 0.3, 1.0)
+
+# every channel used: three plain lines each plus a switched and a coupled one
+FULL_MIX = {"mixes": [{"channel": c, "source": s, "weight": 0.3} for c in range(16) for s in ("steer", "yaw", "axis1")]
+            + [{"channel": c, "source": "axis4", "switch": "reverse"} for c in range(16)]
+            + [{"channel": 1, "source": "throttle", "weight": -0.5, "multiply": "steer_abs"}]}
+
+
+def collect():
+    core = ControlCore()
+    core.apply_profile("Sport")
+    steer_shape = core.shapes["steer"]
+    curve = Curve(steer_shape, BIPOLAR)
+    inputs = read_axes(AXES)
+    clock = [0.0]
+    mixer = Mixer()
+    full = Mixer(FULL_MIX)
+    batch = [MIX_INPUTS] * 1000
+    assert len(MIX_INPUTS) == len(INPUTS)
+
+    def step():
+        clock[0] += 0.02
+        core.step(inputs, clock[0])
+
+    return [
+        Case("shaping: apply_deadzone", lambda: apply_deadzone(0.42, 0.05), 100000),
+        Case("shaping: shape_value (float math)", lambda: shape_value(0.42, steer_shape), 100000),
+        Case("shaping: compiled curve lookup", lambda: curve(0.42), 100000),
+        Case("shaping: read_axes", lambda: read_axes(AXES), 100000),
+        Case("shaping: ControlCore.step", step, 20000),
+        Case("mixer: default 5 lines", lambda: mixer(MIX_INPUTS), 100000),
+        Case("mixer: 16 channels, 65 lines", lambda: full(MIX_INPUTS), 20000),
+        Case("mixer: 1000-row batch, 65 lines", lambda: full.apply_many(batch), 200),
+    ]
+
+
+def main(argv=None):
+    return cli(collect, argv, "Input shaping benchmarks")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
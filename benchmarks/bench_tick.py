@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+from control_core import ControlCore, ControlLoop, clock
+from crsf import CrsfEncoder
+from headtracker import HeadSample
+from tx_engine import CrsfTxEngine
+
+from benchmarks.harness import Case, cli
+
+# ===================== BENCH =====================
+# one TX slot as the engine runs it: fresh axes published, the core stepped
+# by the producer and a frame sent to a null port; the scene variant adds what
+# update_scene does at its (lower) rate
+AXES = [(0.3 * (i % 7 - 3), 0.0, 0.05 * (i % 5), -0.02 * (i % 3), -1.0, 0.1 * (i % 11) - 0.4) for i in range(64)]
+
+
+class _NullPort:
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def _tick_fn(renderer=None):
+    core = ControlCore()
+    head = HeadSample(0.0, 12.5, -3.0)
+    control = ControlLoop(core, lambda now: head)
+    tx = CrsfTxEngine(CrsfEncoder().encode)
+    tx.port = _NullPort()
+    tx.producer = control
+    state = {"i": 0}
+
+    def tick():
+        i = state["i"] = state["i"] + 1
+        control.set_axes(AXES[i & 63], time.perf_counter_ns())
+        now = clock()
+        tx.run_slot(now, now)
+        if renderer is not None:
+            renderer.render(core.steer, core.throttle, core.adj_yaw, core.adj_pitch, core.reverse)
+
+    return tick
+
+
+def _scene_renderer():
+    # offscreen copy of the items RCApp.init_ui hands to SceneRenderer
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtGui import QPainterPath
+        from PyQt5.QtWidgets import QApplication, QGraphicsScene, QLabel
+        from renderer import SceneRenderer
+    except ImportError:
+        return None, None
+
+    app = QApplication.instance() or QApplication([])
+    scene = QGraphicsScene(-320, -320, 640, 640)
+    car = QPainterPath()
+    car.addRoundedRect(-60, -105, 120, 210, 14, 14)
+    car_item = scene.addPath(car)
+    path_item = scene.addPath(QPainterPath())
+    marker = scene.addRect(-18, 120, 36, 18)
+    head_scene = QGraphicsScene(-180, -180, 360, 360)
+    lenses = (head_scene.addEllipse(-70, -30, 60, 60), head_scene.addEllipse(10, -30, 60, 60))
+    goggles = head_scene.createItemGroup(list(lenses))
+    pitch_bar = head_scene.addRect(-12, 80, 24, 0)
+    label = QLabel("")
+    renderer = SceneRenderer(car_item, path_item, marker, 210, goggles, lenses, pitch_bar, label)
+    # keep the scenes alive as long as the renderer
+    renderer._bench_refs = (app, scene, head_scene, label)
+    return renderer, app
+
+
+def collect():
+    cases = [Case("tick: control step + tx frame", _tick_fn(), 20000)]
+    renderer, _ = _scene_renderer()
+    if renderer is None:
+        print("tick: scene variant skipped (PyQt5 not available)")
+    else:
+        cases.append(Case("tick: control step + tx frame + scene", _tick_fn(renderer), 5000))
+    return cases
+
+
+def main(argv=None):
+    return cli(collect, argv, "Full control tick benchmarks")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+# ===================== HARNESS =====================
+# a case is a callable run `number` times per repeat; setup is done by the
+# module that builds it, so only the call itself is measured
+Case = namedtuple("Case", "name fn number")
+
+Result = namedtuple("Result", "name ops_per_s ns_per_op p99_ns alloc_bytes_per_op blocks_per_op")
+
+_SAMPLES = 2000
+_ALLOC_CALLS = 200
+
+
+def _per_call_ns(fn, samples):
+    # per-call timings for the tail; the clock overhead of an empty call is
+    # subtracted so fast cases are not dominated by perf_counter_ns itself
+    clock = time.perf_counter_ns
+    empty = []
+    for _ in range(200):
+        t0 = clock()
+        empty.append(clock() - t0)
+    empty.sort()
+    overhead = empty[len(empty) // 2]
+
+    out = []
+    for _ in range(samples):
+        t0 = clock()
+        fn()
+        out.append(max(0, clock() - t0 - overhead))
+    out.sort()
+    return out
+
+
+def _allocations(fn, calls):
+    # tracemalloc only sees live blocks, so transient allocations show up as
+    # the per-call peak; blocks still alive afterwards are what a call retains
+    fn()
+    gc.collect()
+    blocks0 = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        for _ in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks0
+    return peak_total / calls, max(0, blocks) / calls
+
+
+def run_case(case, repeat=5):
+    fn, number = case.fn, case.number
+    fn()
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            dt = time.perf_counter_ns() - t0
+            if best is None or dt < best:
+                best = dt
+        samples = _per_call_ns(fn, min(_SAMPLES, max(number, 100)))
+    finally:
+        if gc_was:
+            gc.enable()
+    alloc_bytes, blocks = _allocations(fn, min(_ALLOC_CALLS, number))
+
+    ns = best / number
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return Result(case.name, 1e9 / ns if ns else 0.0, ns, p99, alloc_bytes, blocks)
+
+
+def format_header():
+    return f"{'case':<40} {'ops/s':>12} {'ns/op':>10} {'p99 ns':>10} {'alloc B/op':>11} {'blocks/op':>9}"
+
+
+def format_result(r, flag=""):
+    return (f"{r.name:<40} {r.ops_per_s:>12,.0f} {r.ns_per_op:>10.0f} {r.p99_ns:>10.0f} "
+            f"{r.alloc_bytes_per_op:>11.0f} {r.blocks_per_op:>9.2f}{flag}")
+
+
+# ---------- baselines ----------
+def save_baseline(path, results):
+    data = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": {r.name: r._asdict() for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: Result(**values) for name, values in data.get("results", {}).items()}
+
+
+def regressions(result, baseline, threshold):
+    # ns/op and the tail both count; allocations are flagged when a case that
+    # used to be allocation-free starts retaining blocks
+    base = baseline.get(result.name)
+    if base is None:
+        return []
+    out = []
+    if base.ns_per_op and result.ns_per_op > base.ns_per_op * (1 + threshold):
+        out.append(f"ns/op +{(result.ns_per_op / base.ns_per_op - 1) * 100:.0f}%")
+    if base.p99_ns and result.p99_ns > base.p99_ns * (1 + threshold):
+        out.append(f"p99 +{(result.p99_ns / base.p99_ns - 1) * 100:.0f}%")
+    if result.blocks_per_op > base.blocks_per_op + 0.5:
+        out.append(f"blocks/op {base.blocks_per_op:.2f} -> {result.blocks_per_op:.2f}")
+    return out
+
+
+def run(cases, baseline=None, threshold=0.15, repeat=5, out=None):
+    out = out or sys.stdout
+    results = []
+    regressed = 0
+    out.write(format_header() + "\n")
+    for case in cases:
+        r = run_case(case, repeat)
+        results.append(r)
+        flag = ""
+        if baseline:
+            why = regressions(r, baseline, threshold)
+            if why:
+                regressed += 1
+                flag = "  REGRESSION: " + ", ".join(why)
+        out.write(format_result(r, flag) + "\n")
+        out.flush()
+    return results, regressed
+
+
+def cli(collect, argv=None, description="Run benchmarks", report=None):
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("--only", help="run cases whose name contains this text")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    p.add_argument("--compare", metavar="JSON", help="flag regressions against a saved baseline")
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    args = p.parse_args(argv)
+
+    cases = collect()
+    if args.only:
+        cases = [c for c in cases if args.only in c.name]
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    results, regressed = run(cases, baseline, args.threshold, args.repeat)
+    if report is not None:
+        report(results)
+    if args.save:
+        save_baseline(args.save, results)
+    if regressed:
+        print(f"{regressed} case(s) regressed beyond {args.threshold * 100:.0f}%")
+        return 1
+    return 0
@@ -0,0 +1,208 @@
+import math
+import time
+from collections import namedtuple
+
+from crsf import map_range
+from metrics import METRICS
+from mixer import compile_mix
+from shaping import DEFAULT_SHAPES, compile_shapes, merge_shapes
+
+# ===================== CONTROL CORE =====================
+DEFAULT_TUNING = {"steer_rate": 200, "throttle_rate": 200, "deadzone": 5}
+
+# shapes only list the fields that differ from DEFAULT_SHAPES
+PROFILES = {
+    "Beginner": {"steer_rate": 120, "throttle_rate": 120, "deadzone": 10,
+                 "shapes": {"steer": {"expo": 0.4, "rate": 0.85}, "throttle": {"expo": 0.3, "high": 0.6}}},
+    "Sport": {"steer_rate": 250, "throttle_rate": 250, "deadzone": 5,
+              "shapes": {"steer": {"expo": 0.25}, "throttle": {"expo": 0.15, "high": 0.85}}},
+    "Race": {"steer_rate": 380, "throttle_rate": 380, "deadzone": 0,
+             "shapes": {"steer": {"expo": 0.1}}},
+}
+
+# one clock for the whole control path: monotonic and sub-microsecond on
+# every platform (time.monotonic ticks in 15.6 ms steps on older Windows Pythons)
+clock = time.perf_counter
+
+# the rate sliders used to set a per-tick smoothing factor k = rate/1000 at
+# the 50 Hz GUI loop; the same response is now a time constant
+RATE_REFERENCE_DT = 0.02
+
+
+def tau_for_rate(rate):
+    k = min(max(rate / 1000.0, 1e-6), 0.999)
+    return -RATE_REFERENCE_DT / math.log(1.0 - k)
+
+
+HEAD_ARDUINO = "arduino"
+HEAD_JOYSTICK = "joystick"
+
+ControlInputs = namedtuple("ControlInputs", "steer throttle l2 rx ry head axes")
+ControlInputs.__new__.__defaults__ = (0.0, 0.0, 0.0, 0.0, 0.0, None, ())
+
+NEUTRAL_INPUTS = ControlInputs()
+
+# centred sticks and head, zero throttle, no reverse
+NEUTRAL_CHANNELS = (map_range(0, -1, 1, 172, 1811), 172, map_range(0, -180, 180, 172, 1811),
+                    map_range(0, -45, 45, 172, 1811), 172) + (1024,) * 11
+
+
+def apply_deadzone(v, deadzone):
+    if abs(v) < deadzone:
+        return 0.0
+    return math.copysign((abs(v) - deadzone) / (1.0 - deadzone), v)
+
+
+def read_axes(axes, head=None, l2_axis=4):
+    n = len(axes)
+    if not n:
+        return ControlInputs(head=head)
+    return ControlInputs(
+        axes[0],
+        (axes[5] + 1) / 2 if n > 5 else 0.0,
+        (axes[l2_axis] + 1.0) / 2.0 if n > l2_axis else 0.0,
+        axes[2] if n > 2 else 0.0,
+        axes[3] if n > 3 else 0.0,
+        head,
+        axes,
+    )
+
+
+class ControlCore:
+    def __init__(self):
+        # tuning, in the units of the GUI sliders
+        self.steer_rate = DEFAULT_TUNING["steer_rate"]
+        self.throttle_rate = DEFAULT_TUNING["throttle_rate"]
+        self.deadzone = DEFAULT_TUNING["deadzone"]
+        self.head_deadzone = 5
+        self.head_source = HEAD_ARDUINO
+
+        self.shapes = dict(DEFAULT_SHAPES)
+        # channel mixer spec (see mixer.py); None is the classic ch0-4 layout
+        self.mix = None
+        self._compile()
+
+        self.yaw_offset = 0.0
+        self.pitch_offset = 0.0
+
+        # state
+        self.steer = 0.0
+        self.throttle = 0.0
+        self.yaw = 0.0
+        self.pitch = 0.0
+        self.adj_yaw = 0.0
+        self.adj_pitch = 0.0
+        self.l2 = 0.0
+        self.reverse = False
+        self.channels = [1024] * 16
+        self.last_time = None
+        self.steps = 0
+
+    def apply_profile(self, name):
+        tuning = PROFILES.get(name)
+        if tuning is None:
+            return False
+        self.shapes = dict(DEFAULT_SHAPES)
+        self.configure(tuning)
+        return True
+
+    def configure(self, settings):
+        for key, value in settings.items():
+            if key == "shapes":
+                self.shapes = merge_shapes(self.shapes, value)
+            elif hasattr(self, key) and not key.startswith("_"):
+                setattr(self, key, value)
+        self._compile()
+
+    def _compile(self):
+        # the deadzone sliders stay authoritative for the deadzone fields;
+        # curves come from a cache, so this is cheap when nothing changed
+        self._steer_tau = tau_for_rate(self.steer_rate)
+        self._throttle_tau = tau_for_rate(self.throttle_rate)
+
+        shapes = self.shapes
+        head_dead = self.head_deadzone / 100.0
+        self.shapes = shapes = dict(shapes, steer=shapes["steer"]._replace(deadzone=self.deadzone / 100.0),
+                                    rx=shapes["rx"]._replace(deadzone=head_dead),
+                                    ry=shapes["ry"]._replace(deadzone=head_dead))
+        curves = compile_shapes(shapes)
+        self._steer_curve = curves["steer"]
+        self._throttle_curve = curves["throttle"]
+        self._rx_curve = curves["rx"]
+        self._ry_curve = curves["ry"]
+        self._mixer = compile_mix(self.mix)
+
+    def calibrate_head(self):
+        self.yaw_offset = self.yaw
+        self.pitch_offset = self.pitch
+
+    def step(self, inputs, now):
+        # exact exponential smoothing over the real elapsed time: the result
+        # does not depend on how often step runs, and a late call simply
+        # covers the whole gap (missed steps are caught up in one go)
+        last = self.last_time
+        self.last_time = now
+        dt = now - last if last is not None else RATE_REFERENCE_DT
+        if dt < 0.0:
+            dt = 0.0
+        self.steps += 1
+
+        raw_steer = self._steer_curve(inputs.steer)
+        self.steer += (raw_steer - self.steer) * (1.0 - math.exp(-dt / self._steer_tau))
+        self.throttle += (self._throttle_curve(inputs.throttle) - self.throttle) * (1.0 - math.exp(-dt / self._throttle_tau))
+
+        if self.head_source == HEAD_ARDUINO:
+            if inputs.head is not None:
+                self.yaw = inputs.head.yaw
+                self.pitch = inputs.head.pitch
+        else:
+            self.yaw = -self._rx_curve(inputs.rx) * 90.0
+            self.pitch = -self._ry_curve(inputs.ry) * 45.0
+
+        adj_yaw = self.yaw - self.yaw_offset
+        adj_pitch = self.pitch - self.pitch_offset
+        if adj_yaw > 180: adj_yaw -= 360
+        if adj_yaw < -180: adj_yaw += 360
+        adj_pitch = max(-45, min(45, adj_pitch))
+
+        self.adj_yaw = adj_yaw
+        self.adj_pitch = adj_pitch
+        self.l2 = inputs.l2
+        self.reverse = inputs.l2 > 0.5
+
+        # in mixer.INPUTS order, head angles as fractions of their range
+        axes = inputs.axes
+        n = len(axes)
+        steer = self.steer
+        ch = self._mixer((steer, self.throttle, adj_yaw / 180.0, adj_pitch / 45.0, inputs.l2,
+                          1.0 if self.reverse else 0.0, inputs.rx, inputs.ry, abs(steer),
+                          axes[0] if n > 0 else 0.0, axes[1] if n > 1 else 0.0, axes[2] if n > 2 else 0.0,
+                          axes[3] if n > 3 else 0.0, axes[4] if n > 4 else 0.0, axes[5] if n > 5 else 0.0,
+                          1.0))
+        self.channels = ch
+        return ch
+
+
+class ControlLoop:
+    # runs the core as the TX engine's producer, so the control step happens
+    # at the send rate on the TX thread; inputs arrive from any thread
+    def __init__(self, core, head=None, l2_axis=4):
+        # head: callable(now) -> HeadSample or None
+        self.core = core
+        self.head = head
+        self.l2_axis = l2_axis
+        # axes and the timestamp they were read at, swapped as one tuple
+        self.axes = ((), 0)
+
+    def set_axes(self, axes, stamp_ns=0):
+        self.axes = (axes, stamp_ns)
+
+    def __call__(self, now):
+        axes, stamp = self.axes
+        t0 = time.perf_counter_ns() if METRICS.enabled else 0
+        head = self.head
+        core = self.core
+        ch = core.step(read_axes(axes, head(now) if head else None, self.l2_axis), now)
+        if t0:
+            METRICS.record("shaping", time.perf_counter_ns() - t0)
+        return tuple(ch), stamp, (axes, core.steer, core.throttle, core.adj_yaw, core.adj_pitch)
@@ -0,0 +1,662 @@
+import json
+import multiprocessing
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from control_core import ControlCore, ControlLoop, HEAD_ARDUINO, HEAD_JOYSTICK
+from crsf import BatterySensor, CrsfEncoder, LinkStatistics
+from devices import DeviceSupervisor, open_serial
+from gc_tuning import GcGovernor
+from head_fusion import FUSION_LEVELS, FUSION_PREDICT, HeadFusion
+from headtracker import HeadTrackReader, MODE_ASCII, MODE_BINARY
+from io_reactor import IoReactor
+from metrics import METRICS, MetricsExporter
+from recorder import FlightRecorder
+from send_policy import DEFAULT_HEARTBEAT_S, POLICIES, POLICY_FIXED, make_policy
+from shaping import CHANNELS, DEFAULT_SHAPES, ChannelShape
+from telemetry import TelemetryReader
+from tx_engine import CrsfTxEngine, TX_RATES
+from watchdog import StallWatchdog
+
+# ===================== PROCESS-ISOLATED CONTROL =====================
+# the control core, joystick, tracker, telemetry and CRSF output run in a
+# child process, so GUI stalls (style sheets, repaints, modal dialogs) never
+# hold the GIL the TX thread needs; the GUI and the child share two
+# fixed-layout structs in shared memory, one per direction
+HEAD_SOURCES = (HEAD_ARDUINO, HEAD_JOYSTICK)
+TRACKER_PROTOCOLS = (None, MODE_ASCII, MODE_BINARY)
+ROLES = ("out", "in")
+
+# ---------- seqlock ----------
+_SEQ = struct.Struct("<Q")
+
+
+class SeqlockBlock:
+    # one writer, any number of readers and no lock: the writer makes the
+    # sequence odd while it copies, a reader retries until it sees the same
+    # even sequence on both sides of its own copy
+    def __init__(self, layout, name=None):
+        self.layout = layout
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=_SEQ.size + layout.size)
+            self.owner = True
+            _SEQ.pack_into(self.shm.buf, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self._seq = 0
+        self.retries = 0
+
+    def write(self, values):
+        buf = self.shm.buf
+        seq = self._seq + 1
+        _SEQ.pack_into(buf, 0, seq)
+        self.layout.pack_into(buf, _SEQ.size, *values)
+        self._seq = seq + 1
+        _SEQ.pack_into(buf, 0, seq + 1)
+
+    def read(self, last_seq=None, tries=1000):
+        # (seq, values); values is None when nothing was written since last_seq
+        buf = self.shm.buf
+        unpack_seq = _SEQ.unpack_from
+        for _ in range(tries):
+            seq = unpack_seq(buf, 0)[0]
+            if seq & 1:
+                self.retries += 1
+                continue
+            if seq == last_seq or seq == 0:
+                return seq, None
+            values = self.layout.unpack_from(buf, _SEQ.size)
+            if unpack_seq(buf, 0)[0] == seq:
+                return seq, values
+            self.retries += 1
+        return last_seq, None
+
+    def close(self):
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+
+def _layout(name, fields):
+    return struct.Struct("<" + "".join(code for _, code in fields)), namedtuple(name, [n for n, _ in fields])
+
+
+def _text(raw):
+    return raw.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+
+def _bytes(text, size):
+    return text.encode("utf-8")[:size]
+
+
+def _json_list(items, size):
+    # JSON for a struct field of `size` bytes; cutting the text would leave
+    # invalid JSON, so whole entries are dropped from the end until it fits
+    items = list(items)
+    data = json.dumps(items).encode("utf-8")
+    while len(data) > size:
+        items.pop()
+        data = json.dumps(items).encode("utf-8")
+    return data
+
+
+# ---------- GUI -> control ----------
+# the channel mix is not a command: it is fixed for the session and handed to
+# the child when it is spawned (ControlProcess(mix=...))
+_SHAPE_FIELDS = [(f"shape_{ch}_{f}", "f") for ch in CHANNELS for f in ChannelShape._fields]
+
+COMMAND_STRUCT, Commands = _layout("Commands", [
+    ("stamp_ns", "q"),
+    ("enabled", "?"), ("rate_hz", "H"), ("policy", "B"), ("heartbeat_ms", "f"),
+    ("head_source", "B"), ("tracker_protocol", "B"), ("head_fusion", "B"), ("head_latency_ms", "f"),
+    ("steer_rate", "f"), ("throttle_rate", "f"), ("deadzone", "f"), ("head_deadzone", "f"),
+] + _SHAPE_FIELDS + [
+    # counters: the child acts once each time one of them changes
+    ("calibrate", "I"), ("scan", "I"), ("out_request", "I"), ("in_request", "I"),
+    ("out_device", "64s"), ("in_device", "64s"),
+    ("metrics", "?"), ("record", "?"), ("quit", "?"),
+])
+
+_TUNING = ("steer_rate", "throttle_rate", "deadzone", "head_deadzone") + tuple(n for n, _ in _SHAPE_FIELDS)
+
+
+def default_commands():
+    values = {
+        "stamp_ns": 0, "enabled": True, "rate_hz": TX_RATES[0], "policy": POLICIES.index(POLICY_FIXED),
+        "heartbeat_ms": DEFAULT_HEARTBEAT_S * 1000, "head_source": 0, "tracker_protocol": 0,
+        "head_fusion": FUSION_LEVELS.index(FUSION_PREDICT), "head_latency_ms": 20.0,
+        "steer_rate": 200, "throttle_rate": 200, "deadzone": 5, "head_deadzone": 5,
+        "calibrate": 0, "scan": 0, "out_request": 0, "in_request": 0, "out_device": b"", "in_device": b"",
+        "metrics": False, "record": False, "quit": False,
+    }
+    for ch in CHANNELS:
+        for f, v in zip(ChannelShape._fields, DEFAULT_SHAPES[ch]):
+            values[f"shape_{ch}_{f}"] = float(v)
+    return Commands(**values)
+
+
+def tuning_commands(core):
+    # the whole tuning of a (GUI-side) ControlCore as command fields
+    values = {"steer_rate": core.steer_rate, "throttle_rate": core.throttle_rate,
+              "deadzone": core.deadzone, "head_deadzone": core.head_deadzone}
+    for ch in CHANNELS:
+        for f, v in zip(ChannelShape._fields, core.shapes[ch]):
+            values[f"shape_{ch}_{f}"] = float(v)
+    return values
+
+
+def _tuning_settings(cmd):
+    shapes = {}
+    for ch in CHANNELS:
+        fields = [getattr(cmd, f"shape_{ch}_{f}") for f in ChannelShape._fields]
+        fields[-1] = bool(fields[-1])
+        shapes[ch] = ChannelShape(*fields)
+    return {"steer_rate": cmd.steer_rate, "throttle_rate": cmd.throttle_rate, "deadzone": cmd.deadzone,
+            "head_deadzone": cmd.head_deadzone, "shapes": shapes}
+
+
+# ---------- control -> GUI ----------
+# (device, description) pairs run ~60-80 bytes, so this holds ~50 ports;
+# the whole struct is copied on every publish, so it is not made larger
+PORTS_SIZE = 4096
+_LINK_FIELDS = [("link_" + f, "i") for f in LinkStatistics._fields[1:]]
+
+STATE_STRUCT, State = _layout("State", [
+    ("stamp_ns", "q"), ("steps", "Q"),
+] + [(f"ch{i}", "H") for i in range(16)] + [
+    ("steer", "f"), ("throttle", "f"), ("yaw", "f"), ("pitch", "f"), ("yaw_offset", "f"), ("pitch_offset", "f"),
+    ("adj_yaw", "f"), ("adj_pitch", "f"), ("l2", "f"), ("reverse", "?"),
+    # TX engine
+    ("rate_hz", "H"), ("policy", "B"), ("achieved_hz", "f"), ("jitter_p50_ms", "f"), ("jitter_p99_ms", "f"),
+    ("jitter_max_ms", "f"), ("input_latency_p50_ms", "f"), ("input_latency_p99_ms", "f"),
+    ("frames", "Q"), ("held", "Q"), ("overruns", "I"), ("write_errors", "I"),
+    ("coalesced", "Q"), ("backpressure", "Q"), ("write_timeouts", "I"), ("write_resyncs", "I"),
+    ("write_p99_ms", "f"), ("write_max_ms", "f"),
+    # head tracker and fusion
+    ("ht_mode", "B"), ("ht_sample_hz", "f"), ("ht_samples", "Q"), ("ht_stale", "I"), ("ht_errors", "I"),
+    ("ht_overflows", "I"), ("ht_lost", "I"), ("ht_latency_ms", "f"), ("ht_latency_max_ms", "f"),
+    ("fusion_level", "B"), ("fusion_bias", "f"), ("fusion_correction", "f"), ("fusion_still", "?"),
+    # telemetry
+    ("link_valid", "?"), ("link_t", "d"),
+] + _LINK_FIELDS + [
+    ("up_lq_min", "i"),
+    ("battery_valid", "?"), ("battery_t", "d"), ("voltage", "f"), ("current", "f"), ("capacity_mah", "I"),
+    ("remaining", "B"),
+    ("tlm_frames", "I"), ("tlm_crc_errors", "I"), ("tlm_dropped", "I"), ("tlm_overflows", "I"),
+    # joystick and devices; the last link event and the port list, each with a counter
+    ("joy_connected", "?"), ("joy_buttons", "H"), ("joy_name", "64s"),
+    ("link_event", "I"), ("event_role", "8s"), ("event_state", "16s"), ("event_device", "64s"),
+    ("event_detail", "96s"),
+    ("ports_seq", "I"), ("ports", f"{PORTS_SIZE}s"),
+    # the child's own timings
+    ("publish_us", "f"), ("command_lag_ms", "f"), ("metrics_text", "1024s"),
+    # stall watchdog
+    ("stalls", "I"), ("stall_active", "32s"), ("stall_active_ms", "f"), ("stall_last_ms", "f"),
+    ("stall_cause", "32s"), ("stall_max_ms", "f"), ("failsafe_frames", "Q"),
+    # garbage collector
+    ("gc_tune", "?"), ("gc_gen0", "I"), ("gc_gen1", "I"), ("gc_gen2", "I"), ("gc_scheduled", "I"),
+    ("gc_automatic", "I"), ("gc_frozen", "I"), ("gc_pause_p50_ms", "f"), ("gc_pause_p99_ms", "f"),
+    ("gc_pause_max_ms", "f"),
+])
+
+# the fields refreshed on every publish lead the struct, so they are one
+# slice of the value list; everything else is refreshed every SLOW_PERIOD_S
+_INDEX = {name: i for i, name in enumerate(State._fields)}
+_CHANNELS_AT = _INDEX["ch0"]
+_CORE_AT = _INDEX["steer"]
+_FAST_END = _INDEX["reverse"] + 1
+
+SLOW_PERIOD_S = 0.2
+
+
+# ===================== CHILD =====================
+class _ControlChild:
+    def __init__(self, cmd_name, state_name, tick_s, publish_s, no_joystick, gc_tune, mix=None):
+        self.tick_s = tick_s
+        self.publish_s = publish_s
+        self.no_joystick = no_joystick
+        self.gc = GcGovernor(tune=gc_tune)
+        self.commands = SeqlockBlock(COMMAND_STRUCT, cmd_name)
+        self.state = SeqlockBlock(STATE_STRUCT, state_name)
+
+        self.core = ControlCore()
+        if mix is not None:
+            self.core.configure({"mix": mix})
+        self.tx = CrsfTxEngine(CrsfEncoder().encode, rate_hz=TX_RATES[0])
+        self.head_reader = HeadTrackReader()
+        self.fusion = self.head_reader.fusion = HeadFusion(FUSION_PREDICT)
+        self.telemetry = TelemetryReader()
+        self.io = IoReactor()
+        self.head_reader.reactor = self.io
+        self.telemetry.reactor = self.io
+        self.control = ControlLoop(self.core, self.head_reader.sample_at)
+        self.tx.producer = self.control
+        self.tx.gc = self.gc
+        self.exporter = MetricsExporter(METRICS, "rc_metrics.csv")
+        self.recorder = None
+        self.joystick = None
+        # the child's own loop is the input source here: a stall in the GUI
+        # process never reaches it, a stall in this process does
+        self.watchdog = StallWatchdog(log_path="rc_stalls.log")
+        self.watchdog.watch(self.tx)
+
+        self.devices = DeviceSupervisor(lambda role, device: open_serial(device, 0))
+        self.devices.sinks["out"] = self._set_out_port
+        self.devices.sinks["in"] = self.head_reader.set_port
+        self.devices.on_state = self._on_link_state
+        self.devices.on_ports = self._on_ports
+        self.tx.on_error = lambda: self.devices.link_lost("out")
+        self.head_reader.on_error = lambda: self.devices.link_lost("in")
+        self.telemetry.on_error = lambda: self.devices.link_lost("out")
+
+        # written by the supervisor thread, copied into State on the next publish
+        self._event = (0, "", "", "", "")
+        self._ports = (0, b"[]")
+
+        self._cmd = None
+        self._cmd_seq = None
+        self._command_lag_ms = 0.0
+        self._publish_us = 0.0
+        self._values = list(STATE_STRUCT.unpack_from(bytes(STATE_STRUCT.size)))
+        self._slow_t = 0.0
+
+    def _set_out_port(self, port):
+        self.tx.set_port(port)
+        self.telemetry.set_port(port)
+
+    def _on_link_state(self, role, state, device, detail):
+        self._event = (self._event[0] + 1, role, state, device, detail)
+
+    def _on_ports(self, ports):
+        self._ports = (self._ports[0] + 1, _json_list(ports, PORTS_SIZE))
+
+    # ---------- commands ----------
+    def _apply(self, cmd):
+        old = self._cmd
+        first = old is None
+
+        def changed(*names):
+            return first or any(getattr(cmd, n) != getattr(old, n) for n in names)
+
+        tx = self.tx
+        if changed("enabled"):
+            tx.enabled = cmd.enabled
+        if changed("rate_hz"):
+            tx.set_rate(cmd.rate_hz)
+        if changed("policy", "heartbeat_ms"):
+            heartbeat = cmd.heartbeat_ms / 1000.0
+            tx.set_policy(make_policy(POLICIES[cmd.policy], heartbeat, lambda: self.telemetry.current()[0]))
+            tx.set_paused_heartbeat(heartbeat)
+        if changed("head_source"):
+            self.core.head_source = HEAD_SOURCES[cmd.head_source]
+        if changed("tracker_protocol"):
+            self.head_reader.protocol = TRACKER_PROTOCOLS[cmd.tracker_protocol]
+            self.head_reader.request_protocol(self.head_reader.port, self.head_reader.protocol)
+        if changed("head_fusion"):
+            self.fusion.set_level(FUSION_LEVELS[cmd.head_fusion])
+        if changed("head_latency_ms"):
+            self.fusion.latency_s = cmd.head_latency_ms / 1000.0
+        if changed(*_TUNING):
+            self.core.configure(_tuning_settings(cmd))
+        if not first and cmd.calibrate != old.calibrate:
+            self.core.calibrate_head()
+        if not first and cmd.scan != old.scan:
+            self.devices.request_scan()
+            if self.joystick is not None:
+                self.joystick.open()
+        for role in ROLES:
+            request = getattr(cmd, role + "_request")
+            if request and (first or request != getattr(old, role + "_request")):
+                device = _text(getattr(cmd, role + "_device"))
+                if device:
+                    self.devices.connect(role, device)
+                else:
+                    self.devices.disconnect(role)
+        if changed("metrics"):
+            if cmd.metrics:
+                METRICS.reset()
+                METRICS.enabled = True
+                self.exporter.start()
+            elif not first:
+                METRICS.enabled = False
+                self.exporter.stop()
+        if changed("record"):
+            if cmd.record and self.recorder is None:
+                try:
+                    self.recorder = FlightRecorder("rc_flight.bin").open()
+                    tx.recorder = self.recorder
+                except OSError:
+                    self.recorder = None
+            elif not cmd.record and self.recorder is not None:
+                tx.recorder = None
+                self.recorder.close()
+                self.recorder = None
+        self._cmd = cmd
+
+    # ---------- state ----------
+    def _slow_fields(self):
+        tx = self.tx.stats()
+        ht = self.head_reader.stats()
+        fusion = self.fusion.stats()
+        tlm = self.telemetry.stats()
+        link, battery = tlm["link"], tlm["battery"]
+        joy = self.joystick
+        slow = {
+            "rate_hz": tx["rate_hz"], "policy": POLICIES.index(tx["policy"]),
+            "ht_mode": (MODE_ASCII, MODE_BINARY).index(ht["mode"]), "ht_sample_hz": ht["sample_hz"],
+            "ht_samples": ht["samples"], "ht_stale": ht["stale"], "ht_errors": ht["errors"],
+            "ht_overflows": ht["overflows"], "ht_lost": ht["lost"], "ht_latency_ms": ht["latency_ms"],
+            "ht_latency_max_ms": ht["latency_max_ms"],
+            "fusion_level": FUSION_LEVELS.index(fusion["level"]), "fusion_bias": fusion["bias_dps"],
+            "fusion_correction": fusion["correction_deg"], "fusion_still": fusion["still"],
+            "link_valid": link is not None, "link_t": link.t if link else 0.0,
+            "up_lq_min": tlm["up_lq_min"] if tlm["up_lq_min"] is not None else -1,
+            "battery_valid": battery is not None, "battery_t": battery.t if battery else 0.0,
+            "voltage": battery.voltage if battery else 0.0, "current": battery.current if battery else 0.0,
+            "capacity_mah": battery.capacity_mah if battery else 0, "remaining": battery.remaining if battery else 0,
+            "tlm_frames": tlm["frames"], "tlm_crc_errors": tlm["crc_errors"], "tlm_dropped": tlm["dropped"],
+            "tlm_overflows": tlm["overflows"],
+            "joy_connected": joy is not None and joy.joy is not None,
+            "joy_buttons": joy.num_buttons if joy is not None else 0,
+            "joy_name": _bytes(joy.name if joy is not None else "", 64),
+            "publish_us": self._publish_us, "command_lag_ms": self._command_lag_ms,
+            "metrics_text": _bytes(METRICS.overlay_text() if METRICS.enabled else "", 1024),
+        }
+        wd = self.watchdog.stats()
+        slow.update(stalls=wd["stalls"], stall_active=_bytes(wd["active"] or "", 32),
+                    stall_active_ms=wd["active_ms"], stall_last_ms=wd["last_ms"],
+                    stall_cause=_bytes(wd["last_cause"], 32), stall_max_ms=wd["max_ms"],
+                    failsafe_frames=wd["failsafe_frames"])
+        gcs = self.gc.stats()
+        slow.update(gc_tune=gcs["tune"], gc_gen0=gcs["collections"][0], gc_gen1=gcs["collections"][1],
+                    gc_gen2=gcs["collections"][2], gc_scheduled=gcs["scheduled"], gc_automatic=gcs["automatic"],
+                    gc_frozen=gcs["frozen"], gc_pause_p50_ms=gcs["pause_p50_ms"],
+                    gc_pause_p99_ms=gcs["pause_p99_ms"], gc_pause_max_ms=gcs["pause_max_ms"])
+        for key in ("achieved_hz", "jitter_p50_ms", "jitter_p99_ms", "jitter_max_ms", "input_latency_p50_ms",
+                    "input_latency_p99_ms", "frames", "held", "overruns", "write_errors", "coalesced", "backpressure",
+                    "write_timeouts", "write_resyncs", "write_p99_ms", "write_max_ms"):
+            slow[key] = tx[key]
+        for f in LinkStatistics._fields[1:]:
+            slow["link_" + f] = getattr(link, f) if link else 0
+        event = self._event
+        slow.update(link_event=event[0], event_role=_bytes(event[1], 8), event_state=_bytes(event[2], 16),
+                    event_device=_bytes(event[3], 64), event_detail=_bytes(event[4], 96))
+        ports = self._ports
+        slow.update(ports_seq=ports[0], ports=ports[1])
+        return slow
+
+    def _publish(self, now):
+        t0 = time.perf_counter_ns()
+        values = self._values
+        if now - self._slow_t >= SLOW_PERIOD_S:
+            self._slow_t = now
+            for key, value in self._slow_fields().items():
+                values[_INDEX[key]] = value
+        core = self.core
+        values[0] = t0
+        values[1] = core.steps
+        values[_CHANNELS_AT:_CHANNELS_AT + 16] = core.channels
+        values[_CORE_AT:_FAST_END] = (core.steer, core.throttle, core.yaw, core.pitch, core.yaw_offset,
+                                      core.pitch_offset, core.adj_yaw, core.adj_pitch, core.l2, core.reverse)
+        self.state.write(values)
+        self._publish_us = (time.perf_counter_ns() - t0) / 1000.0
+
+    # ---------- loop ----------
+    def run(self):
+        seq, cmd = self.commands.read()
+        if cmd is not None:
+            self._cmd_seq = seq
+            self._apply(Commands(*cmd))
+        if not self.no_joystick:
+            try:
+                from headless import init_joystick
+                self.joystick = init_joystick()
+                self.control.set_axes(self.joystick.state.axes, self.joystick.state.stamp_ns)
+            except Exception:
+                self.joystick = None
+
+        self.gc.install()
+        self.io.start()
+        self.devices.start()
+        self.tx.start()
+        self.watchdog.start()
+        parent = multiprocessing.parent_process()
+        next_t = time.perf_counter()
+        next_publish = next_t
+        next_parent_check = next_t + 1.0
+        try:
+            while True:
+                self.watchdog.beat()
+                joystick = self.joystick
+                if joystick is not None and joystick.poll():
+                    stamp, axes, _ = joystick.state
+                    self.control.set_axes(axes, stamp)
+
+                seq, cmd = self.commands.read(self._cmd_seq)
+                if cmd is not None:
+                    self._cmd_seq = seq
+                    cmd = Commands(*cmd)
+                    if cmd.quit:
+                        break
+                    self._apply(cmd)
+                    self._command_lag_ms = (time.perf_counter_ns() - cmd.stamp_ns) / 1e6
+
+                now = time.perf_counter()
+                if now >= next_publish:
+                    next_publish = now + self.publish_s
+                    self._publish(now)
+                if now >= next_parent_check:
+                    next_parent_check = now + 1.0
+                    if parent is not None and not parent.is_alive():
+                        break
+
+                next_t += self.tick_s
+                wait = next_t - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    next_t = time.perf_counter()
+        finally:
+            self.gc.uninstall()
+            self.watchdog.stop()
+            self.tx.stop()
+            self.io.stop()
+            self.devices.stop()
+            self.exporter.stop()
+            if self.recorder is not None:
+                self.recorder.close()
+            self.commands.close()
+            self.state.close()
+
+
+def _child_main(cmd_name, state_name, tick_s, publish_s, no_joystick, gc_tune, mix):
+    _ControlChild(cmd_name, state_name, tick_s, publish_s, no_joystick, gc_tune, mix).run()
+
+
+# ===================== GUI SIDE =====================
+class ControlProcess:
+    def __init__(self, tick_s=0.004, publish_s=0.005, no_joystick=False, gc_tune=False, mix=None):
+        self.commands = default_commands()
+        self._cmd = SeqlockBlock(COMMAND_STRUCT)
+        self._state = SeqlockBlock(STATE_STRUCT)
+        self._state_seq = None
+        self._event_seen = 0
+        self._ports_seen = 0
+        self.state = None
+        # spawn everywhere: forking the GUI process would copy Qt's threads' locks
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=_child_main, args=(self._cmd.name, self._state.name, tick_s, publish_s, no_joystick, gc_tune, mix),
+            name="rc-control", daemon=True)
+
+        # callbacks, called from poll() on the caller's thread
+        self.on_state = None
+        self.on_ports = None
+
+        self.reads = 0
+        self.read_us = 0.0
+        self.age_ms = 0.0
+
+    def start(self):
+        self.send()
+        self.process.start()
+
+    def stop(self, timeout=2.0):
+        if self.process.is_alive():
+            self.send(quit=True)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout)
+        self._cmd.close()
+        self._state.close()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    # ---------- commands ----------
+    def send(self, **changes):
+        self.commands = self.commands._replace(stamp_ns=time.perf_counter_ns(), **changes)
+        self._cmd.write(self.commands)
+
+    def send_tuning(self, core):
+        self.send(**tuning_commands(core))
+
+    def set_head_source(self, source):
+        self.send(head_source=HEAD_SOURCES.index(source))
+
+    def set_tracker_protocol(self, mode):
+        self.send(tracker_protocol=TRACKER_PROTOCOLS.index(mode))
+
+    def set_head_fusion(self, level):
+        self.send(head_fusion=FUSION_LEVELS.index(level))
+
+    def set_send_policy(self, name, heartbeat_s):
+        self.send(policy=POLICIES.index(name), heartbeat_ms=heartbeat_s * 1000.0)
+
+    def calibrate_head(self):
+        self.send(calibrate=self.commands.calibrate + 1)
+
+    def request_scan(self):
+        self.send(scan=self.commands.scan + 1)
+
+    def connect(self, role, device):
+        self.send(**{role + "_device": _bytes(device or "", 64),
+                     role + "_request": getattr(self.commands, role + "_request") + 1})
+
+    # ---------- state ----------
+    def poll(self):
+        t0 = time.perf_counter_ns()
+        seq, values = self._state.read(self._state_seq)
+        if values is None:
+            return self.state
+        self._state_seq = seq
+        state = self.state = State(*values)
+        t1 = time.perf_counter_ns()
+        self.reads += 1
+        self.read_us = (t1 - t0) / 1000.0
+        self.age_ms = (t1 - state.stamp_ns) / 1e6
+
+        if state.link_event != self._event_seen:
+            self._event_seen = state.link_event
+            cb = self.on_state
+            if cb:
+                cb(_text(state.event_role), _text(state.event_state), _text(state.event_device),
+                   _text(state.event_detail))
+        if state.ports_seq != self._ports_seen:
+            self._ports_seen = state.ports_seq
+            cb = self.on_ports
+            if cb:
+                try:
+                    ports = [tuple(p) for p in json.loads(_text(state.ports))]
+                except ValueError:
+                    ports = []
+                cb(ports)
+        return state
+
+    def mirror(self, core):
+        # copies the child's core state onto a local ControlCore, so display
+        # code can keep reading the same attributes
+        state = self.state
+        if state is None:
+            return
+        core.steer = state.steer
+        core.throttle = state.throttle
+        core.yaw = state.yaw
+        core.pitch = state.pitch
+        core.yaw_offset = state.yaw_offset
+        core.pitch_offset = state.pitch_offset
+        core.adj_yaw = state.adj_yaw
+        core.adj_pitch = state.adj_pitch
+        core.l2 = state.l2
+        core.reverse = state.reverse
+        core.channels = [getattr(state, f"ch{i}") for i in range(16)]
+
+    def stats(self):
+        # the same dicts the in-process objects return, rebuilt from State
+        s = self.state
+        if s is None:
+            return None
+        link = None
+        if s.link_valid:
+            link = LinkStatistics(s.link_t, *[getattr(s, "link_" + f) for f in LinkStatistics._fields[1:]])
+        battery = None
+        if s.battery_valid:
+            battery = BatterySensor(s.battery_t, s.voltage, s.current, s.capacity_mah, s.remaining)
+        return {
+            "tx": {
+                "rate_hz": s.rate_hz, "achieved_hz": s.achieved_hz, "policy": POLICIES[s.policy],
+                "jitter_p50_ms": s.jitter_p50_ms, "jitter_p99_ms": s.jitter_p99_ms, "jitter_max_ms": s.jitter_max_ms,
+                "input_latency_p50_ms": s.input_latency_p50_ms, "input_latency_p99_ms": s.input_latency_p99_ms,
+                "frames": s.frames, "held": s.held, "overruns": s.overruns, "write_errors": s.write_errors,
+                "coalesced": s.coalesced, "backpressure": s.backpressure, "write_timeouts": s.write_timeouts,
+                "write_resyncs": s.write_resyncs,
+                "write_p99_ms": s.write_p99_ms, "write_max_ms": s.write_max_ms,
+            },
+            "head": {
+                "mode": (MODE_ASCII, MODE_BINARY)[s.ht_mode], "sample_hz": s.ht_sample_hz, "samples": s.ht_samples,
+                "stale": s.ht_stale, "errors": s.ht_errors, "overflows": s.ht_overflows, "lost": s.ht_lost,
+                "latency_ms": s.ht_latency_ms, "latency_max_ms": s.ht_latency_max_ms,
+            },
+            "fusion": {
+                "level": FUSION_LEVELS[s.fusion_level], "bias_dps": s.fusion_bias,
+                "correction_deg": s.fusion_correction, "still": s.fusion_still,
+            },
+            "telemetry": {
+                "link": link, "battery": battery, "up_lq_min": s.up_lq_min if s.up_lq_min >= 0 else None,
+                "frames": s.tlm_frames, "crc_errors": s.tlm_crc_errors, "dropped": s.tlm_dropped,
+                "overflows": s.tlm_overflows,
+            },
+            "joystick": {"connected": s.joy_connected, "name": _text(s.joy_name), "buttons": s.joy_buttons},
+            "isolation": {
+                "publish_us": s.publish_us, "read_us": self.read_us, "age_ms": self.age_ms,
+                "command_lag_ms": s.command_lag_ms, "retries": self._state.retries,
+            },
+            "stalls": {
+                "stalls": s.stalls, "active": _text(s.stall_active) or None, "active_ms": s.stall_active_ms,
+                "last_ms": s.stall_last_ms, "last_cause": _text(s.stall_cause), "max_ms": s.stall_max_ms,
+                "failsafe_frames": s.failsafe_frames,
+            },
+            "gc": {
+                "tune": s.gc_tune, "collections": (s.gc_gen0, s.gc_gen1, s.gc_gen2), "scheduled": s.gc_scheduled,
+                "automatic": s.gc_automatic, "frozen": s.gc_frozen, "pause_p50_ms": s.gc_pause_p50_ms,
+                "pause_p99_ms": s.gc_pause_p99_ms, "pause_max_ms": s.gc_pause_max_ms,
+            },
+            "metrics_text": _text(s.metrics_text),
+        }
+
+
+def format_isolation(stats):
+    iso = stats["isolation"]
+    return (f"Isolated: publish {iso['publish_us']:.0f} us  read {iso['read_us']:.0f} us  "
+            f"age {iso['age_ms']:.1f} ms  cmd {iso['command_lag_ms']:.1f} ms")
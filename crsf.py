@@ -0,0 +1,189 @@
+import struct
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ===================== CRSF =====================
+CRSF_ADDRESS = 0xC8
+CRSF_FRAMETYPE_RC_CHANNELS = 0x16
+
+CRSF_NUM_CHANNELS = 16
+CRSF_CHANNELS_PAYLOAD_LEN = 22
+CRSF_CHANNELS_FRAME_LEN = CRSF_CHANNELS_PAYLOAD_LEN + 4
+
+def map_range(x, a1, a2, b1, b2):
+    return int(b1 + (x - a1) * (b2 - b1) / (a2 - a1))
+
+# ---------- CRC8 (DVB-S2, poly 0xD5) ----------
+def _make_crc8_table(poly):
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _make_crc8_table(0xD5)
+
+def crc8(data):
+    table = CRC8_TABLE
+    crc = 0
+    for b in data:
+        crc = table[crc ^ b]
+    return crc
+
+# ---------- ENCODER ----------
+class CrsfEncoder:
+    def __init__(self, address=CRSF_ADDRESS):
+        self.frame = bytearray(CRSF_CHANNELS_FRAME_LEN)
+        self.frame[0] = address
+        self.frame[1] = CRSF_CHANNELS_PAYLOAD_LEN + 2
+        self.frame[2] = CRSF_FRAMETYPE_RC_CHANNELS
+
+    # returns the encoder's own buffer; it is overwritten by the next call,
+    # so write it out (or copy it) before encoding again
+    def encode(self, ch):
+        c0, c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11, c12, c13, c14, c15 = ch
+        packed = ((c0 & 0x7FF) | (c1 & 0x7FF) << 11 | (c2 & 0x7FF) << 22 | (c3 & 0x7FF) << 33
+                  | (c4 & 0x7FF) << 44 | (c5 & 0x7FF) << 55 | (c6 & 0x7FF) << 66 | (c7 & 0x7FF) << 77
+                  | (c8 & 0x7FF) << 88 | (c9 & 0x7FF) << 99 | (c10 & 0x7FF) << 110 | (c11 & 0x7FF) << 121
+                  | (c12 & 0x7FF) << 132 | (c13 & 0x7FF) << 143 | (c14 & 0x7FF) << 154 | (c15 & 0x7FF) << 165)
+        frame = self.frame
+        frame[3:25] = packed.to_bytes(CRSF_CHANNELS_PAYLOAD_LEN, "little")
+
+        table = CRC8_TABLE
+        crc = table[CRSF_FRAMETYPE_RC_CHANNELS]
+        for i in range(3, 25):
+            crc = table[crc ^ frame[i]]
+        frame[25] = crc
+        return frame
+
+    def encode_many(self, rows):
+        if np is not None:
+            return self._encode_many_np(np.asarray(rows))
+        out = bytearray(CRSF_CHANNELS_FRAME_LEN * len(rows))
+        pos = 0
+        for ch in rows:
+            out[pos:pos + CRSF_CHANNELS_FRAME_LEN] = self.encode(ch)
+            pos += CRSF_CHANNELS_FRAME_LEN
+        return bytes(out)
+
+    def _encode_many_np(self, rows):
+        rows = rows.reshape(-1, CRSF_NUM_CHANNELS).astype(np.uint16) & 0x7FF
+        n = rows.shape[0]
+        bits = ((rows[:, :, None] >> np.arange(11, dtype=np.uint16)) & 1).astype(np.uint8)
+        payload = np.packbits(bits.reshape(n, CRSF_CHANNELS_PAYLOAD_LEN * 8), axis=1, bitorder="little")
+
+        frames = np.empty((n, CRSF_CHANNELS_FRAME_LEN), dtype=np.uint8)
+        frames[:, 0:3] = np.frombuffer(self.frame, dtype=np.uint8)[0:3]
+        frames[:, 3:25] = payload
+
+        table = np.frombuffer(CRC8_TABLE, dtype=np.uint8)
+        crc = np.full(n, CRC8_TABLE[CRSF_FRAMETYPE_RC_CHANNELS], dtype=np.uint8)
+        for i in range(CRSF_CHANNELS_PAYLOAD_LEN):
+            crc = table[crc ^ payload[:, i]]
+        frames[:, 25] = crc
+        return frames.tobytes()
+
+_encoder = CrsfEncoder()
+
+def pack_crsf_channels(ch):
+    return bytes(_encoder.encode(ch))
+
+# ---------- TELEMETRY ----------
+CRSF_FRAMETYPE_BATTERY_SENSOR = 0x08
+CRSF_FRAMETYPE_LINK_STATISTICS = 0x14
+
+# frames coming back from the TX module may carry any of these address bytes
+CRSF_SYNC_BYTES = (0xC8, 0xEA, 0xEE, 0xEC)
+CRSF_MAX_FRAME_LEN = 64
+
+_IS_SYNC = bytes(1 if i in CRSF_SYNC_BYTES else 0 for i in range(256))
+
+# RSSI is sent as a positive number of -dBm, SNR in dB
+_LINK_STATS = struct.Struct("<BBBbBBBBBb")
+# voltage and current in 0.1 units, capacity as a 24-bit mAh count (big-endian)
+_BATTERY = struct.Struct(">HHHBB")
+
+TX_POWER_MW = (0, 10, 25, 100, 500, 1000, 2000, 250, 50)
+
+LinkStatistics = namedtuple("LinkStatistics", "t up_rssi1 up_rssi2 up_lq up_snr antenna rf_mode tx_power_mw "
+                                              "down_rssi down_lq down_snr")
+BatterySensor = namedtuple("BatterySensor", "t voltage current capacity_mah remaining")
+
+
+class CrsfDecoder:
+    def __init__(self, max_buffer=512):
+        self.buf = bytearray()
+        self.max_buffer = max_buffer
+
+        # latest decoded values, each replaced as a whole
+        self.link = None
+        self.battery = None
+
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped = 0
+        self.other = 0
+        self.overflows = 0
+
+    def reset(self):
+        del self.buf[:]
+
+    def feed(self, data, now):
+        buf = self.buf
+        buf += data
+        n = len(buf)
+        i = 0
+        decoded = 0
+        is_sync = _IS_SYNC
+        with memoryview(buf) as mv:
+            while i + 2 <= n:
+                if not is_sync[buf[i]]:
+                    i += 1
+                    self.dropped += 1
+                    continue
+                length = buf[i + 1]
+                if length < 2 or length > CRSF_MAX_FRAME_LEN - 2:
+                    i += 1
+                    self.dropped += 1
+                    continue
+                end = i + 2 + length
+                if end > n:
+                    break
+                # a bad CRC may mean a sync byte inside a payload, so resync
+                # from the next byte rather than skipping the whole frame
+                if crc8(mv[i + 2:end - 1]) != buf[end - 1]:
+                    i += 1
+                    self.crc_errors += 1
+                    continue
+                self.frames += 1
+                if self._dispatch(buf[i + 2], i + 3, length - 2, now):
+                    decoded += 1
+                i = end
+
+        if i:
+            del buf[:i]
+        if len(buf) > self.max_buffer:
+            self.overflows += 1
+            del buf[:]
+        return decoded
+
+    def _dispatch(self, frame_type, pos, size, now):
+        buf = self.buf
+        if frame_type == CRSF_FRAMETYPE_LINK_STATISTICS and size >= _LINK_STATS.size:
+            r1, r2, lq, snr, ant, mode, power, d_rssi, d_lq, d_snr = _LINK_STATS.unpack_from(buf, pos)
+            self.link = LinkStatistics(now, -r1, -r2, lq, snr, ant, mode,
+                                       TX_POWER_MW[power] if power < len(TX_POWER_MW) else 0,
+                                       -d_rssi, d_lq, d_snr)
+            return True
+        if frame_type == CRSF_FRAMETYPE_BATTERY_SENSOR and size >= _BATTERY.size:
+            volt, amp, cap_hi, cap_lo, remaining = _BATTERY.unpack_from(buf, pos)
+            self.battery = BatterySensor(now, volt / 10.0, amp / 10.0, cap_hi << 8 | cap_lo, remaining)
+            return True
+        self.other += 1
+        return False
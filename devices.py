@@ -0,0 +1,207 @@
+import queue
+import threading
+import time
+
+# ===================== DEVICE SUPERVISOR =====================
+ROLE_OUT = "out"
+ROLE_IN = "in"
+
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_FAILED = "failed"
+STATE_LOST = "lost"
+STATE_RETRYING = "retrying"
+STATE_DISCONNECTED = "disconnected"
+
+
+# the TX module's USB serial; CRSF frames out and telemetry back share it
+OUT_BAUDRATE = 115200
+
+
+def open_serial(device, timeout, baudrate=OUT_BAUDRATE):
+    import serial
+    return serial.Serial(device, baudrate, timeout=timeout)
+
+
+def list_serial_ports():
+    import serial.tools.list_ports
+    return [(p.device, p.description) for p in serial.tools.list_ports.comports()]
+
+
+class _Link:
+    def __init__(self):
+        self.device = None
+        self.port = None
+        self.want = False
+        self.backoff = 0.0
+        self.next_try = 0.0
+        self.state = STATE_DISCONNECTED
+
+
+class DeviceSupervisor:
+    def __init__(self, opener, lister=list_serial_ports, scan_interval=2.0, backoff_min=0.25, backoff_max=5.0):
+        self.opener = opener
+        self.lister = lister
+        self.scan_interval = scan_interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+        # sinks receive the opened port (or None) on the supervisor thread
+        self.sinks = {}
+        # callbacks, also called on the supervisor thread
+        self.on_ports = None
+        self.on_state = None
+
+        self.ports = []
+        self.scan_ms = 0.0
+        self._links = {}
+        self._requests = queue.Queue()
+        self._running = False
+        self._thread = None
+
+    # ---------- API (any thread) ----------
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="device-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._requests.put(("stop",))
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for role, link in self._links.items():
+            self._close(role, link)
+
+    def request_scan(self):
+        self._requests.put(("scan",))
+
+    def connect(self, role, device):
+        self._requests.put(("connect", role, device))
+
+    def disconnect(self, role):
+        self._requests.put(("disconnect", role))
+
+    def link_lost(self, role):
+        self._requests.put(("lost", role))
+
+    def port(self, role):
+        link = self._links.get(role)
+        return link.port if link else None
+
+    # ---------- SUPERVISOR THREAD ----------
+    def _run(self):
+        next_scan = 0.0
+        while self._running:
+            now = time.monotonic()
+            timeout = next_scan - now
+            for link in self._links.values():
+                if link.want and link.port is None:
+                    timeout = min(timeout, link.next_try - now)
+            try:
+                req = self._requests.get(timeout=max(0.0, timeout))
+            except queue.Empty:
+                req = None
+
+            if req is not None:
+                if req[0] == "stop":
+                    break
+                if req[0] == "scan":
+                    next_scan = 0.0
+                else:
+                    self._handle(req)
+
+            now = time.monotonic()
+            if now >= next_scan:
+                self._scan(force=req is not None and req[0] == "scan")
+                next_scan = time.monotonic() + self.scan_interval
+
+            for role, link in self._links.items():
+                if link.want and link.port is None and now >= link.next_try:
+                    self._open(role, link)
+
+    def _handle(self, req):
+        kind, role = req[0], req[1]
+        link = self._links.setdefault(role, _Link())
+        if kind == "connect":
+            self._close(role, link)
+            link.device = req[2]
+            link.want = True
+            link.backoff = 0.0
+            link.next_try = 0.0
+            self._open(role, link, first=True)
+        elif kind == "disconnect":
+            link.want = False
+            self._close(role, link)
+            self._set_state(role, link, STATE_DISCONNECTED)
+        elif kind == "lost":
+            if link.port is None and not link.want:
+                return
+            self._close(role, link)
+            self._set_state(role, link, STATE_LOST)
+            link.backoff = self.backoff_min
+            link.next_try = time.monotonic() + link.backoff
+
+    def _open(self, role, link, first=False):
+        self._set_state(role, link, STATE_CONNECTING)
+        try:
+            port = self.opener(role, link.device)
+        except Exception as e:
+            if first:
+                # a port the operator picked that cannot be opened is not retried
+                link.want = False
+                self._set_state(role, link, STATE_FAILED, str(e))
+                return
+            link.backoff = min(self.backoff_max, max(self.backoff_min, link.backoff * 2))
+            link.next_try = time.monotonic() + link.backoff
+            self._set_state(role, link, STATE_RETRYING, f"next try in {link.backoff:.1f} s")
+            return
+        link.port = port
+        link.backoff = 0.0
+        sink = self.sinks.get(role)
+        if sink:
+            sink(port)
+        self._set_state(role, link, STATE_CONNECTED)
+
+    def _close(self, role, link):
+        port = link.port
+        link.port = None
+        sink = self.sinks.get(role)
+        if sink:
+            sink(None)
+        if port is not None:
+            try:
+                port.close()
+            except Exception:
+                pass
+
+    def _scan(self, force=False):
+        t0 = time.perf_counter()
+        try:
+            ports = self.lister()
+        except Exception:
+            ports = []
+        self.scan_ms = (time.perf_counter() - t0) * 1000.0
+
+        if ports != self.ports:
+            # a device coming back is retried straight away instead of
+            # waiting out its backoff
+            present = {dev for dev, _ in ports}
+            for link in self._links.values():
+                if link.want and link.port is None and link.device in present:
+                    link.next_try = 0.0
+        elif not force:
+            return
+        self.ports = ports
+        cb = self.on_ports
+        if cb:
+            cb(ports)
+
+    def _set_state(self, role, link, state, detail=""):
+        link.state = state
+        cb = self.on_state
+        if cb:
+            cb(role, state, link.device or "", detail)
@@ -0,0 +1,195 @@
+import gc
+import time
+import tracemalloc
+
+from metrics import METRICS, NANOSECONDS, percentiles_ms
+
+# ===================== GC TUNING =====================
+# a cyclic collection runs on whichever thread happens to allocate, and it
+# holds the GIL for its whole length, so one landing inside a TX slot delays
+# that frame. Tuned mode moves everything alive at startup (Qt widgets,
+# curve tables, the mixer) into the permanent generation with gc.freeze(),
+# raises the automatic gen-0 threshold far above what a tick allocates, and
+# lets the TX thread run the collections itself in the gap after a frame
+# when the next deadline is far enough away. If no gap ever comes, the
+# raised threshold still collects automatically.
+GEN0_THRESHOLD = 50000
+# what CPython would collect at on its own; scheduled collections keep to it
+YOUNG_THRESHOLD = 700
+
+
+class GcGovernor:
+    def __init__(self, tune=False, min_gap_s=0.002, window=1000):
+        # tune=False only times the collections the interpreter runs anyway
+        self.tune = tune
+        self.min_gap_s = min_gap_s
+        # optional AllocProbe, driven by the TX loop around every slot
+        self.probe = None
+
+        self.collections = [0, 0, 0]
+        self.scheduled = 0
+        self.automatic = 0
+        self.frozen = 0
+
+        self._installed = False
+        self._threshold = None
+        self._t0 = 0
+        self._in_idle = False
+
+        self._pause = [0] * window
+        self._pause_idx = 0
+        self._pause_count = 0
+        self._pause_max = 0
+
+    # ---------- SETUP (main thread, once startup is done) ----------
+    def install(self):
+        if self._installed:
+            return self
+        self._installed = True
+        if self.tune:
+            # the one full collection, before anything is timed
+            gc.collect()
+            gc.freeze()
+            self.frozen = gc.get_freeze_count()
+            self._threshold = gc.get_threshold()
+            gc.set_threshold(GEN0_THRESHOLD, *self._threshold[1:])
+        gc.callbacks.append(self._on_gc)
+        return self
+
+    def uninstall(self):
+        if not self._installed:
+            return
+        self._installed = False
+        try:
+            gc.callbacks.remove(self._on_gc)
+        except ValueError:
+            pass
+        if self._threshold is not None:
+            gc.set_threshold(*self._threshold)
+            self._threshold = None
+            gc.unfreeze()
+
+    # ---------- TX THREAD ----------
+    def idle(self, slack_s):
+        # called right after a slot with the time left until the next one
+        if not self.tune or slack_s < self.min_gap_s:
+            return
+        count0, count1, count2 = gc.get_count()
+        if count0 < YOUNG_THRESHOLD:
+            return
+        # same promotion rule as the interpreter: every 10th young collection
+        # also takes gen 1, every 10th of those gen 2
+        if count2 >= 10:
+            generation = 2
+        elif count1 >= 10:
+            generation = 1
+        else:
+            generation = 0
+        self._in_idle = True
+        try:
+            gc.collect(generation)
+        finally:
+            self._in_idle = False
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._t0 = time.perf_counter_ns()
+            return
+        ns = time.perf_counter_ns() - self._t0
+        self.collections[info["generation"]] += 1
+        if self._in_idle:
+            self.scheduled += 1
+        else:
+            self.automatic += 1
+        self._pause[self._pause_idx] = ns
+        self._pause_idx = (self._pause_idx + 1) % len(self._pause)
+        if self._pause_count < len(self._pause):
+            self._pause_count += 1
+        if ns > self._pause_max:
+            self._pause_max = ns
+        if METRICS.enabled:
+            METRICS.record("gc", ns)
+
+    # ---------- STATS ----------
+    def stats(self):
+        p50, p99, _ = percentiles_ms(self._pause, self._pause_count, NANOSECONDS)
+        out = {
+            "tune": self.tune,
+            "collections": tuple(self.collections),
+            "scheduled": self.scheduled,
+            "automatic": self.automatic,
+            "frozen": self.frozen,
+            "pause_p50_ms": p50,
+            "pause_p99_ms": p99,
+            "pause_max_ms": self._pause_max / 1e6,
+        }
+        probe = self.probe
+        if probe is not None:
+            out.update(probe.stats())
+        return out
+
+
+class AllocProbe:
+    # per-slot allocation counts from tracemalloc; tracing slows every
+    # allocation in the process, so this is a diagnostic, not a default
+    def __init__(self, window=1000):
+        self._mem0 = 0
+        self._gc0 = 0
+        self.ticks = 0
+
+        self._bytes = [0] * window
+        self._objects = [0] * window
+        self._idx = 0
+        self._count = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def begin(self):
+        if not tracemalloc.is_tracing():
+            return
+        tracemalloc.reset_peak()
+        self._mem0 = tracemalloc.get_traced_memory()[0]
+        self._gc0 = gc.get_count()[0]
+
+    def end(self):
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        objects = gc.get_count()[0] - self._gc0
+        # a collection inside the slot resets the young count; that slot only
+        # contributes its bytes
+        i = self._idx
+        self._bytes[i] = peak - self._mem0
+        self._objects[i] = objects if objects >= 0 else 0
+        self._idx = (i + 1) % len(self._bytes)
+        if self._count < len(self._bytes):
+            self._count += 1
+        self.ticks += 1
+
+    def stats(self):
+        n = self._count
+        if not n:
+            return {"alloc_bytes_per_tick": 0.0, "alloc_bytes_p99": 0, "objects_per_tick": 0.0}
+        sizes = sorted(self._bytes[:n])
+        return {
+            "alloc_bytes_per_tick": sum(sizes) / n,
+            "alloc_bytes_p99": sizes[min(n - 1, int(n * 0.99))],
+            "objects_per_tick": sum(self._objects[:n]) / n,
+        }
+
+
+def format_gc(stats):
+    gen = stats["collections"]
+    line = (f"GC{' tuned' if stats['tune'] else ''}: pause p99 {stats['pause_p99_ms']:.2f} "
+            f"max {stats['pause_max_ms']:.2f} ms  gen {gen[0]}/{gen[1]}/{gen[2]}")
+    if stats["tune"]:
+        line += f"  idle {stats['scheduled']} auto {stats['automatic']}"
+    if "alloc_bytes_per_tick" in stats:
+        line += f"  alloc {stats['alloc_bytes_per_tick']:.0f} B {stats['objects_per_tick']:.1f} obj/tick"
+    return line
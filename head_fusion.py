@@ -0,0 +1,160 @@
+import math
+
+from headtracker import HeadSample
+
+# ===================== HEAD FUSION =====================
+# host-side stage between the tracker parser and the channel mapping; each
+# level adds to the previous one, so cost can be traded for quality
+FUSION_OFF = "off"
+FUSION_SMOOTH = "smooth"      # One-Euro smoothing
+FUSION_STABLE = "stable"      # + yaw drift (gyro bias) estimation while still
+FUSION_PREDICT = "predict"    # + short-horizon prediction over the transport latency
+FUSION_LEVELS = (FUSION_OFF, FUSION_SMOOTH, FUSION_STABLE, FUSION_PREDICT)
+
+
+def _alpha(dt, cutoff):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+def _wrap(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class OneEuro:
+    # Casiez et al.: a low-pass whose cutoff rises with speed, so a still
+    # head is quiet and a fast turn is not lagged
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x = None
+        self.dx = 0.0
+
+    def reset(self):
+        self.x = None
+        self.dx = 0.0
+
+    def __call__(self, x, dt):
+        if self.x is None:
+            self.x = x
+            return x
+        self.dx += _alpha(dt, self.d_cutoff) * ((x - self.x) / dt - self.dx)
+        cutoff = self.min_cutoff + self.beta * abs(self.dx)
+        self.x += _alpha(dt, cutoff) * (x - self.x)
+        return self.x
+
+
+class HeadFusion:
+    def __init__(self, level=FUSION_PREDICT, latency_s=0.02, min_cutoff=1.0, beta=0.1,
+                 still_rate=3.0, still_time=1.0, bias_tau=5.0, max_bias=5.0, max_horizon=0.1,
+                 velocity_cutoff=3.0):
+        self.level = FUSION_LEVELS.index(level)
+        self.latency_s = latency_s
+        self.still_rate = still_rate
+        self.still_time = still_time
+        self.bias_tau = bias_tau
+        self.max_bias = max_bias
+        self.max_horizon = max_horizon
+        self.velocity_cutoff = velocity_cutoff
+
+        self.yaw_filter = OneEuro(min_cutoff, beta)
+        self.pitch_filter = OneEuro(min_cutoff, beta)
+
+        # deg/s of drift and the yaw removed so far because of it
+        self.bias = 0.0
+        self.correction = 0.0
+        self.still = False
+
+        self.latest = None
+        self.updates = 0
+        self.reset()
+
+    def set_level(self, level):
+        self.level = FUSION_LEVELS.index(level)
+        self.reset()
+
+    def reset(self):
+        # the bias estimate survives a reset: it belongs to the gyro, not the session
+        self.yaw_filter.reset()
+        self.pitch_filter.reset()
+        self.correction = 0.0
+        self.still = False
+        self.latest = None
+        self._t = None
+        self._raw_yaw = 0.0
+        self._raw_pitch = 0.0
+        self._unwrapped = 0.0
+        self._rate = 0.0
+        self._pitch_rate = 0.0
+        self._still_for = 0.0
+        self._yaw_v = 0.0
+        self._pitch_v = 0.0
+
+    def update(self, sample):
+        t, yaw, pitch = sample
+        level = self.level
+        if level == 0:
+            self.latest = sample
+            return sample
+
+        last_t = self._t
+        self._t = t
+        if last_t is None:
+            self._raw_yaw = yaw
+            self._raw_pitch = pitch
+            self._unwrapped = yaw
+            self.yaw_filter(yaw, 1.0)
+            self.pitch_filter(pitch, 1.0)
+            self.latest = sample
+            return sample
+        dt = t - last_t
+        if dt <= 0.0:
+            dt = 1e-3
+        self.updates += 1
+
+        # the tracker wraps yaw at +-180; filters work on a continuous angle
+        d = _wrap(yaw - self._raw_yaw)
+        self._raw_yaw = yaw
+        self._unwrapped += d
+        y = self._unwrapped
+
+        if level >= 2:
+            a = 1.0 - math.exp(-dt / 0.5)
+            self._rate += (d / dt - self._rate) * a
+            self._pitch_rate += ((pitch - self._raw_pitch) / dt - self._pitch_rate) * a
+            # a still head sees only the gyro bias; slow real turns are kept
+            # out by the threshold and the long bias time constant
+            if abs(self._rate - self.bias) < self.still_rate and abs(self._pitch_rate) < self.still_rate:
+                self._still_for += dt
+            else:
+                self._still_for = 0.0
+            self.still = self._still_for >= self.still_time
+            if self.still:
+                bias = self.bias + (self._rate - self.bias) * (1.0 - math.exp(-dt / self.bias_tau))
+                self.bias = max(-self.max_bias, min(self.max_bias, bias))
+            self.correction += self.bias * dt
+            y -= self.correction
+        if level >= 3:
+            # One-Euro's own derivative is taken against its lagged output, so
+            # the prediction keeps a separate, lightly filtered velocity
+            a = _alpha(dt, self.velocity_cutoff)
+            self._yaw_v += ((d - self.bias * dt) / dt - self._yaw_v) * a
+            self._pitch_v += ((pitch - self._raw_pitch) / dt - self._pitch_v) * a
+        self._raw_pitch = pitch
+
+        y = self.yaw_filter(y, dt)
+        p = self.pitch_filter(pitch, dt)
+        fused = self.latest = HeadSample(t, _wrap(y), p)
+        return fused
+
+    def predict(self, now):
+        latest = self.latest
+        if latest is None or self.level < 3 or self._t is None:
+            return latest
+        h = min(self.max_horizon, max(0.0, now - latest.t) + self.latency_s)
+        return HeadSample(now, _wrap(latest.yaw + self._yaw_v * h), latest.pitch + self._pitch_v * h)
+
+    def stats(self):
+        return {"level": FUSION_LEVELS[self.level], "bias_dps": self.bias, "correction_deg": self.correction,
+                "still": self.still}
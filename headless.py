@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+from control_core import ControlCore, ControlLoop, HEAD_ARDUINO, HEAD_JOYSTICK, PROFILES
+from crsf import CrsfEncoder
+from devices import DeviceSupervisor, open_serial, ROLE_IN, ROLE_OUT
+from gc_tuning import AllocProbe, GcGovernor, format_gc
+from head_fusion import FUSION_LEVELS, FUSION_PREDICT, HeadFusion
+from headtracker import HeadTrackReader, MODE_ASCII, MODE_BINARY
+from io_reactor import IoReactor
+from metrics import METRICS, MetricsExporter
+from recorder import FlightRecorder
+from send_policy import DEFAULT_HEARTBEAT_S, POLICIES, POLICY_FIXED, make_policy
+from station import build_station, format_station, format_tile
+from telemetry import TelemetryReader, format_telemetry
+from tx_engine import CrsfTxEngine, TX_RATES
+from watchdog import StallWatchdog, format_stall
+
+# ===================== HEADLESS =====================
+def build_parser():
+    p = argparse.ArgumentParser(prog="rc_app1.py --headless",
+                                description="RC control loop without the Qt GUI")
+    p.add_argument("--config", help="JSON file with any of the options below (CLI wins)")
+    p.add_argument("--station", help="JSON file listing several vehicles to drive from this computer")
+    p.add_argument("--out", help="CRSF output port (Ranger Micro)")
+    p.add_argument("--in", dest="inp", help="head-tracking input port (Arduino)")
+    p.add_argument("--rate", type=int, choices=TX_RATES, help="CRSF frame rate in Hz")
+    p.add_argument("--send-policy", choices=POLICIES, help="every slot, on change + heartbeat, or follow the link rate")
+    p.add_argument("--heartbeat-ms", type=float, help="longest gap between frames, also while paused (default 250)")
+    p.add_argument("--tick-ms", type=float, help="joystick poll period in ms (default 5)")
+    p.add_argument("--profile", choices=sorted(PROFILES), help="driving profile")
+    p.add_argument("--head-source", choices=(HEAD_ARDUINO, HEAD_JOYSTICK))
+    p.add_argument("--tracker-protocol", choices=("auto", MODE_ASCII, MODE_BINARY))
+    p.add_argument("--head-fusion", choices=FUSION_LEVELS, help="head filtering level (default predict)")
+    p.add_argument("--head-latency-ms", type=float, help="transport latency the head prediction covers (default 20)")
+    p.add_argument("--no-joystick", action="store_true", help="run without a controller (neutral sticks)")
+    p.add_argument("--status", type=float, help="seconds between status lines, 0 = quiet (default 1)")
+    p.add_argument("--metrics", help="enable stage timing and append it to this CSV file")
+    p.add_argument("--record", help="flight recorder ring file")
+    p.add_argument("--record-seconds", type=float, help="seconds kept in the recorder ring (default 600)")
+    p.add_argument("--stall-ms", type=float, help="input or TX silence that forces failsafe frames (default 150)")
+    p.add_argument("--stall-log", help="append every stall with its duration to this file")
+    p.add_argument("--gc-tune", action="store_true", help="freeze startup objects and run collections between frames")
+    p.add_argument("--alloc-probe", action="store_true", help="count allocations per TX slot (tracemalloc, slow)")
+    return p
+
+
+def load_options(argv):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    opts = {
+        "out": None, "inp": None, "rate": TX_RATES[0], "tick_ms": 5.0, "profile": "Beginner",
+        "head_source": HEAD_ARDUINO, "tracker_protocol": "auto", "no_joystick": False, "status": 1.0,
+        "head_fusion": FUSION_PREDICT, "head_latency_ms": 20.0, "send_policy": POLICY_FIXED, "heartbeat_ms": DEFAULT_HEARTBEAT_S * 1000,
+        "metrics": None, "record": None, "record_seconds": 600, "tuning": {}, "station": None,
+        "stall_ms": 150.0, "stall_log": None, "gc_tune": False, "alloc_probe": False,
+    }
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            cfg = json.load(f)
+        for key, value in cfg.items():
+            key = key.replace("-", "_")
+            if key == "in":
+                key = "inp"
+            if key not in opts:
+                parser.error(f"unknown config key: {key}")
+            opts[key] = value
+    for key, value in vars(args).items():
+        if key != "config" and value is not None and value is not False:
+            opts[key] = value
+    return opts
+
+
+def init_joystick():
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from joystick_input import JoystickInput
+    pygame.init()
+    pygame.joystick.init()
+    joystick = JoystickInput()
+    joystick.init()
+    return joystick
+
+
+def make_watchdog(opts):
+    watchdog = StallWatchdog(opts["stall_ms"] / 1000.0, log_path=opts["stall_log"])
+    watchdog.on_stall = lambda event: print(format_stall(event), flush=True)
+    return watchdog
+
+
+def make_gc(opts):
+    # installed last, so everything set up so far is frozen
+    gov = GcGovernor(tune=opts["gc_tune"])
+    if opts["alloc_probe"]:
+        gov.probe = AllocProbe().start()
+    return gov.install()
+
+
+def release_gc(gov):
+    gov.uninstall()
+    if gov.probe is not None:
+        gov.probe.stop()
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    opts = load_options(sys.argv[1:] if argv is None else argv)
+    if opts["station"]:
+        return run_station(opts)
+
+    core = ControlCore()
+    core.apply_profile(opts["profile"])
+    core.configure(opts["tuning"])
+    core.head_source = opts["head_source"]
+
+    tx = CrsfTxEngine(CrsfEncoder().encode, rate_hz=opts["rate"])
+    head_reader = HeadTrackReader()
+    head_reader.fusion = HeadFusion(opts["head_fusion"], latency_s=opts["head_latency_ms"] / 1000.0)
+    control = ControlLoop(core, head_reader.sample_at)
+    tx.producer = control
+    telemetry = TelemetryReader()
+    io = IoReactor()
+    head_reader.reactor = io
+    telemetry.reactor = io
+    head_reader.protocol = None if opts["tracker_protocol"] == "auto" else opts["tracker_protocol"]
+
+    heartbeat = opts["heartbeat_ms"] / 1000.0
+    tx.set_policy(make_policy(opts["send_policy"], heartbeat, lambda: telemetry.current()[0]))
+    tx.set_paused_heartbeat(heartbeat)
+
+    timeouts = {ROLE_OUT: 0, ROLE_IN: head_reader.read_timeout}
+    devices = DeviceSupervisor(lambda role, device: open_serial(device, timeouts[role]))
+
+    def set_out_port(port):
+        tx.set_port(port)
+        telemetry.set_port(port)
+
+    devices.sinks[ROLE_OUT] = set_out_port
+    devices.sinks[ROLE_IN] = head_reader.set_port
+    devices.on_state = lambda role, state, device, detail: print(f"{role} {device}: {state} {detail}".rstrip(), flush=True)
+    tx.on_error = lambda: devices.link_lost(ROLE_OUT)
+    head_reader.on_error = lambda: devices.link_lost(ROLE_IN)
+    telemetry.on_error = lambda: devices.link_lost(ROLE_OUT)
+    devices.start()
+    if opts["out"]:
+        devices.connect(ROLE_OUT, opts["out"])
+    if opts["inp"]:
+        devices.connect(ROLE_IN, opts["inp"])
+
+    joystick = None
+    if not opts["no_joystick"]:
+        joystick = init_joystick()
+        print(f"controller: {joystick.name or 'none (neutral sticks)'}")
+        control.set_axes(joystick.state.axes, joystick.state.stamp_ns)
+
+    exporter = None
+    if opts["metrics"]:
+        METRICS.enabled = True
+        exporter = MetricsExporter(METRICS, opts["metrics"])
+        exporter.start()
+
+    recorder = None
+    if opts["record"]:
+        recorder = FlightRecorder(opts["record"], seconds=opts["record_seconds"], rate_hz=opts["rate"]).open()
+        tx.recorder = recorder
+
+    watchdog = make_watchdog(opts)
+    watchdog.watch(tx)
+
+    gov = make_gc(opts)
+    tx.gc = gov
+
+    tx.start()
+    io.start()
+    watchdog.start()
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+    period = opts["tick_ms"] / 1000.0
+    status_every = opts["status"]
+    next_t = time.perf_counter()
+    next_status = next_t + status_every
+    try:
+        while True:
+            watchdog.beat()
+            if joystick is not None and joystick.poll():
+                stamp, axes, _ = joystick.state
+                control.set_axes(axes, stamp)
+
+            now = time.perf_counter()
+            if status_every and now >= next_status:
+                next_status = now + status_every
+                st = tx.stats()
+                ht = head_reader.stats()
+                print(f"TX {st['achieved_hz']:.0f}/{st['rate_hz']} Hz {st['policy']} jit p99 {st['jitter_p99_ms']:.2f} ms | "
+                      f"write p99 {st['write_p99_ms']:.2f} ms coalesced {st['coalesced']} | "
+                      f"ch {core.channels[:5]} | HT {ht['mode']} {ht['sample_hz']:.0f} Hz | "
+                      f"I/O p99 {io.stats()['loop_p99_ms']:.2f} ms | stalls {watchdog.stats()['stalls']}", flush=True)
+                print(format_telemetry(telemetry.stats()), flush=True)
+                print(format_gc(gov.stats()), flush=True)
+                if METRICS.enabled:
+                    print(METRICS.overlay_text(), flush=True)
+
+            next_t += period
+            wait = next_t - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                next_t = time.perf_counter()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watchdog.stop()
+        tx.stop()
+        io.stop()
+        devices.stop()
+        release_gc(gov)
+        if recorder:
+            recorder.close()
+        if exporter:
+            exporter.stop()
+            exporter.export()
+    return 0
+
+
+def run_station(opts):
+    with open(opts["station"], encoding="utf-8") as f:
+        cfg = json.load(f)
+    station = build_station(cfg, watchdog=make_watchdog(opts))
+    for session in station.sessions:
+        print(f"{session.name}: {session.tx.rate_hz} Hz, {session.tx.policy.name}", flush=True)
+    station.devices.on_state = lambda role, state, device, detail: print(f"{role} {device}: {state} {detail}".rstrip(), flush=True)
+
+    if not opts["no_joystick"]:
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        station.open_joysticks()
+
+    exporter = None
+    if opts["metrics"]:
+        METRICS.enabled = True
+        exporter = MetricsExporter(METRICS, opts["metrics"])
+        exporter.start()
+
+    gov = station.scheduler.gc = make_gc(opts)
+    station.start()
+    signal.signal(signal.SIGTERM, _terminate)
+
+    # the station owns the TX and serial threads; this loop only pumps the
+    # joysticks (pygame wants the main thread) and prints the tiles
+    period = opts["tick_ms"] / 1000.0
+    status_every = opts["status"]
+    next_t = time.perf_counter()
+    next_status = next_t + status_every
+    try:
+        while True:
+            station.poll_joysticks()
+
+            now = time.perf_counter()
+            if status_every and now >= next_status:
+                next_status = now + status_every
+                print(format_station(station.stats()), flush=True)
+                for session in station.sessions:
+                    print("  " + format_tile(session.status()), flush=True)
+                print(format_gc(gov.stats()), flush=True)
+                if METRICS.enabled:
+                    print(METRICS.overlay_text(), flush=True)
+
+            next_t += period
+            wait = next_t - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                next_t = time.perf_counter()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        station.stop()
+        release_gc(gov)
+        if exporter:
+            exporter.stop()
+            exporter.export()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
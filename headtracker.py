@@ -0,0 +1,320 @@
+import re
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from crsf import CRC8_TABLE
+from metrics import METRICS
+
+# ===================== HEAD TRACKING =====================
+HeadSample = namedtuple("HeadSample", "t yaw pitch")
+
+_FIELD_RE = re.compile(rb"(YAW|PITCH)\s*:\s*([-+]?[0-9]*\.?[0-9]+)", re.IGNORECASE)
+
+# binary frame: sync, seq, yaw/pitch int16 centi-degrees, device micros u32, CRC8 (poly 0xD5)
+BIN_SYNC = 0xA5
+BIN_FRAME_LEN = 11
+_BIN_BODY = struct.Struct("<BhhI")
+
+MODE_ASCII = "ascii"
+MODE_BINARY = "binary"
+
+# host -> tracker protocol requests understood by headtracking.ino
+PROTO_REQUEST = {MODE_ASCII: b"A\n", MODE_BINARY: b"B\n"}
+
+
+class HeadTrackParser:
+    def __init__(self, max_buffer=256):
+        self.buf = bytearray()
+        self.max_buffer = max_buffer
+        self.mode = MODE_ASCII
+        self.yaw = 0.0
+        self.pitch = 0.0
+
+        self.lines = 0
+        self.samples = 0
+        self.stale = 0
+        self.errors = 0
+        self.overflows = 0
+
+        self.lost = 0
+        self.latency_ms = 0.0
+        self.latency_max_ms = 0.0
+        self._seq = None
+        self._dev_last = 0
+        self._dev_wraps = 0
+        self._offset_min = None
+
+    def reset(self):
+        del self.buf[:]
+        self._seq = None
+        self._offset_min = None
+
+    def feed(self, data, now):
+        buf = self.buf
+        buf += data
+
+        # ASCII output never contains the sync byte, so a CRC-valid frame is
+        # enough to switch; a YAW: line while binary frames fail switches back
+        if self.mode == MODE_BINARY:
+            sample = self._feed_binary(now)
+            if sample is None and b"YAW:" in buf:
+                self.mode = MODE_ASCII
+                return self._feed_ascii(now)
+            return sample
+        if BIN_SYNC in buf:
+            sample = self._feed_binary(now)
+            if sample is not None:
+                self.mode = MODE_BINARY
+                return sample
+        return self._feed_ascii(now)
+
+    def _feed_ascii(self, now):
+        buf = self.buf
+        end = max(buf.rfind(b"\n"), buf.rfind(b"\r"))
+        if end < 0:
+            if len(buf) > self.max_buffer:
+                self.overflows += 1
+                del buf[:]
+            return None
+
+        # walk the complete lines newest-first; only the newest valid one is
+        # used, everything older is stale by the time we get here
+        sample = None
+        pos = end
+        while pos > 0:
+            start = max(buf.rfind(b"\n", 0, pos), buf.rfind(b"\r", 0, pos)) + 1
+            if pos > start:
+                self.lines += 1
+                if sample is not None:
+                    self.stale += 1
+                else:
+                    sample = self._parse(buf, start, pos, now)
+            pos = start - 1
+
+        del buf[:end + 1]
+        if len(buf) > self.max_buffer:
+            self.overflows += 1
+            del buf[:]
+        return sample
+
+    def _parse(self, buf, start, end, now):
+        yawv = None
+        pitchv = None
+        try:
+            for m in _FIELD_RE.finditer(buf, start, end):
+                if m.group(1)[0] in b"Yy":
+                    yawv = float(m.group(2))
+                else:
+                    pitchv = float(m.group(2))
+        except ValueError:
+            pass
+        if yawv is None and pitchv is None:
+            self.errors += 1
+            return None
+        if yawv is not None:
+            self.yaw = yawv
+        if pitchv is not None:
+            self.pitch = pitchv
+        self.samples += 1
+        return HeadSample(now, self.yaw, self.pitch)
+
+    def _feed_binary(self, now):
+        buf = self.buf
+        table = CRC8_TABLE
+        n = len(buf)
+        found = None
+        i = buf.find(BIN_SYNC)
+        while 0 <= i <= n - BIN_FRAME_LEN:
+            crc = 0
+            for j in range(i + 1, i + BIN_FRAME_LEN - 1):
+                crc = table[crc ^ buf[j]]
+            if crc != buf[i + BIN_FRAME_LEN - 1]:
+                if self.mode == MODE_BINARY:
+                    self.errors += 1
+                i = buf.find(BIN_SYNC, i + 1)
+                continue
+            if found is not None:
+                self.stale += 1
+            found = i
+            self._track_sequence(buf, i, now)
+            i += BIN_FRAME_LEN
+            if i < n and buf[i] != BIN_SYNC:
+                i = buf.find(BIN_SYNC, i)
+
+        if found is None:
+            # while still in ASCII mode the buffer belongs to the line parser
+            if self.mode == MODE_BINARY:
+                if i > 0:
+                    del buf[:i]
+                if len(buf) > self.max_buffer:
+                    self.overflows += 1
+                    del buf[:]
+            return None
+
+        _, yaw, pitch, _ = _BIN_BODY.unpack_from(buf, found + 1)
+        del buf[:i if i >= 0 else n]
+        self.yaw = yaw / 100.0
+        self.pitch = pitch / 100.0
+        self.samples += 1
+        return HeadSample(now, self.yaw, self.pitch)
+
+    def _track_sequence(self, buf, i, now):
+        seq = buf[i + 1]
+        dev_us = _BIN_BODY.unpack_from(buf, i + 1)[3]
+
+        if self._seq is not None:
+            gap = (seq - self._seq) & 0xFF
+            if gap > 1:
+                self.lost += gap - 1
+        self._seq = seq
+
+        if dev_us < self._dev_last:
+            self._dev_wraps += 1
+        self._dev_last = dev_us
+        dev_s = (self._dev_wraps * 4294967296 + dev_us) / 1e6
+
+        # host and device clocks are unrelated, so report latency above the
+        # best observed offset; the floor creeps up slowly to follow drift
+        offset = now - dev_s
+        if self._offset_min is None or offset < self._offset_min:
+            self._offset_min = offset
+        else:
+            self._offset_min += 1e-6
+        lat = (offset - self._offset_min) * 1000.0
+        self.latency_ms += (lat - self.latency_ms) * 0.05
+        if lat > self.latency_max_ms:
+            self.latency_max_ms = lat
+
+
+class HeadTrackReader:
+    def __init__(self, parser=None, read_timeout=0.05):
+        self.parser = parser or HeadTrackParser()
+        self.read_timeout = read_timeout
+        self.protocol = None
+        # optional HeadFusion; samples are fused on this thread and predicted
+        # forward when the control step asks for them
+        self.fusion = None
+        # optional IoReactor; when set it reads the port and this reader
+        # runs no thread of its own
+        self.reactor = None
+
+        self.port = None
+        self.latest = None
+        self.link_lost = False
+        self.on_error = None
+
+        self._running = False
+        self._thread = None
+
+        self._stats_t = time.perf_counter()
+        self._stats_samples = 0
+        self.sample_hz = 0.0
+
+    def start(self):
+        if self._thread or self.reactor is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="headtrack-rx", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_port(self, port):
+        old = self.port
+        if port is not None:
+            try:
+                port.timeout = self.read_timeout
+            except Exception:
+                pass
+            self.request_protocol(port, self.protocol)
+        self.parser.reset()
+        fusion = self.fusion
+        if fusion is not None:
+            fusion.reset()
+        self.port = port
+        self.link_lost = False
+        reactor = self.reactor
+        if reactor is not None:
+            if old is not None:
+                reactor.remove(old)
+            if port is not None:
+                reactor.add(port, self.feed, self._lost)
+
+    def sample_at(self, now):
+        fusion = self.fusion
+        if fusion is not None:
+            return fusion.predict(now)
+        return self.latest
+
+    def request_protocol(self, port, mode):
+        # None leaves the tracker in whatever mode it runs; the parser
+        # auto-detects either way
+        if port is None or mode not in PROTO_REQUEST:
+            return
+        try:
+            port.write(PROTO_REQUEST[mode])
+        except Exception:
+            pass
+
+    def _run(self):
+        while self._running:
+            port = self.port
+            if port is None:
+                time.sleep(self.read_timeout)
+                continue
+            try:
+                n = port.in_waiting
+                data = port.read(n if n else 1)
+            except Exception:
+                self._lost(port)
+                continue
+            if data:
+                self.feed(data)
+
+    def feed(self, data):
+        t0 = time.perf_counter_ns() if METRICS.enabled else 0
+        sample = self.parser.feed(data, time.perf_counter())
+        if sample is not None:
+            fusion = self.fusion
+            if fusion is not None:
+                sample = fusion.update(sample)
+            self.latest = sample
+        if t0:
+            METRICS.record("head_parse", time.perf_counter_ns() - t0)
+
+    def _lost(self, port):
+        self.port = None
+        self.link_lost = True
+        try:
+            port.close()
+        except Exception:
+            pass
+        cb = self.on_error
+        if cb:
+            cb()
+
+    def stats(self):
+        now = time.perf_counter()
+        p = self.parser
+        span = now - self._stats_t
+        if span > 0:
+            self.sample_hz = (p.samples - self._stats_samples) / span
+        self._stats_t = now
+        self._stats_samples = p.samples
+        return {
+            "mode": p.mode,
+            "sample_hz": self.sample_hz,
+            "samples": p.samples,
+            "stale": p.stale,
+            "errors": p.errors,
+            "overflows": p.overflows,
+            "lost": p.lost,
+            "latency_ms": p.latency_ms,
+            "latency_max_ms": p.latency_max_ms,
+        }
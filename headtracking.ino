@@ -7,26 +7,87 @@ float pitch = 0.0;
 float yaw   = 0.0;
 
 unsigned long lastTime = 0;
+unsigned long nextSample = 0;
 
 const float GYRO_SCALE = 131.0;
 const float FILTER = 0.95;
 
+// ASCII "YAW:x.x,PITCH:y.y" at 100 Hz, or 11-byte binary frames at 400 Hz.
+// The host switches modes by sending 'A' or 'B'.
+const unsigned long ASCII_PERIOD_US = 10000;
+const unsigned long BINARY_PERIOD_US = 2500;
+
+const uint8_t BIN_SYNC = 0xA5;
+
+bool binaryMode = false;
+uint8_t seq = 0;
+
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0xD5) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendBinary(unsigned long stamp) {
+  int16_t y = (int16_t)round(yaw * 100.0);
+  int16_t p = (int16_t)round(pitch * 100.0);
+
+  uint8_t frame[11];
+  frame[0] = BIN_SYNC;
+  frame[1] = seq++;
+  frame[2] = y & 0xFF;
+  frame[3] = (y >> 8) & 0xFF;
+  frame[4] = p & 0xFF;
+  frame[5] = (p >> 8) & 0xFF;
+  frame[6] = stamp & 0xFF;
+  frame[7] = (stamp >> 8) & 0xFF;
+  frame[8] = (stamp >> 16) & 0xFF;
+  frame[9] = (stamp >> 24) & 0xFF;
+  frame[10] = crc8(&frame[1], 9);
+
+  Serial.write(frame, sizeof(frame));
+}
+
+void sendAscii() {
+  Serial.print("YAW:");
+  Serial.print(yaw, 1);
+  Serial.print(",PITCH:");
+  Serial.println(pitch, 1);
+}
+
 void setup() {
   Serial.begin(115200);
   Wire.begin();
+  Wire.setClock(400000);
   mpu.initialize();
 
-  lastTime = millis();
+  lastTime = micros();
+  nextSample = lastTime;
 }
 
 void loop() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == 'B') binaryMode = true;
+    if (c == 'A') binaryMode = false;
+  }
+
+  unsigned long now = micros();
+  if ((long)(now - nextSample) < 0) return;
+  nextSample += binaryMode ? BINARY_PERIOD_US : ASCII_PERIOD_US;
+  if ((long)(now - nextSample) > 0) nextSample = now;
+
   int16_t ax, ay, az;
   int16_t gx, gy, gz;
 
   mpu.getMotion6(&ax, &ay, &az, &gx, &gy, &gz);
 
-  unsigned long now = millis();
-  float dt = (now - lastTime) / 1000.0;
+  float dt = (now - lastTime) / 1000000.0;
   lastTime = now;
 
   if (dt <= 0 || dt > 0.1) return;
@@ -40,7 +101,9 @@ void loop() {
   float denom = sqrt((float)ay * ay + (float)az * az);
   if (denom > 0.0001) {
     float accPitch = atan2(ax, denom) * 57.2958;
-    pitch = pitch * FILTER + accPitch * (1.0 - FILTER);
+    // FILTER was tuned for 10 ms samples; keep the same time constant at any rate
+    float k = pow(FILTER, dt / 0.01);
+    pitch = pitch * k + accPitch * (1.0 - k);
   }
 
   pitch = constrain(pitch, -45, 45);
@@ -48,10 +111,9 @@ void loop() {
   if (yaw > 180) yaw -= 360;
   if (yaw < -180) yaw += 360;
 
-  Serial.print("YAW:");
-  Serial.print(yaw, 1);
-  Serial.print(",PITCH:");
-  Serial.println(pitch, 1);
-
-  delay(10);
+  if (binaryMode) {
+    sendBinary(now);
+  } else {
+    sendAscii();
+  }
 }
@@ -0,0 +1,251 @@
+import collections
+import selectors
+import socket
+import sys
+import threading
+import time
+
+from metrics import METRICS, NANOSECONDS, percentiles_ms
+
+# ===================== I/O REACTOR =====================
+# one thread waits on every serial input at once and wakes the moment bytes
+# arrive; handlers run on that thread and publish their results through the
+# readers' latest-value slots, so nothing here takes a lock on the hot path
+MODE_SELECT = "select"
+MODE_THREADS = "threads"
+
+_READ_CHUNK = 4096
+
+
+class _Entry:
+    __slots__ = ("port", "on_data", "on_error", "active", "thread", "fd")
+
+    def __init__(self, port, on_data, on_error):
+        self.port = port
+        self.on_data = on_data
+        self.on_error = on_error
+        self.active = True
+        self.thread = None
+        # kept from registration: a closed port no longer knows its descriptor
+        self.fd = None
+
+
+class IoReactor:
+    def __init__(self, mode=None, read_timeout=0.05, window=1000):
+        # Windows cannot select() on serial handles, so there every port
+        # gets a blocking reader thread behind the same add/remove API
+        if mode is None:
+            mode = MODE_THREADS if sys.platform == "win32" else MODE_SELECT
+        self.mode = mode
+        self.read_timeout = read_timeout
+
+        self.wakeups = 0
+        self.bytes = 0
+        self.errors = 0
+
+        self._entries = {}
+        self._pending = collections.deque()
+        self._selector = None
+        self._wake_r = None
+        self._wake_w = None
+        self._running = False
+        self._thread = None
+
+        self._loop = [0] * window
+        self._loop_idx = 0
+        self._loop_count = 0
+
+    # ---------- API (any thread) ----------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        if self.mode == MODE_SELECT:
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._thread = threading.Thread(target=self._run, name="io-reactor", daemon=True)
+            self._thread.start()
+        for entry in list(self._entries.values()):
+            self._activate(entry)
+
+    def stop(self):
+        self._running = False
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for entry in list(self._entries.values()):
+            entry.active = False
+            if entry.thread is not None:
+                entry.thread.join(timeout=1.0)
+                entry.thread = None
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+            self._wake_r.close()
+            self._wake_w.close()
+
+    def add(self, port, on_data, on_error=None):
+        # on_data(bytes) and on_error(port) run on the reactor's thread; after
+        # an error the port is dropped from the reactor but not closed
+        self.remove(port)
+        entry = _Entry(port, on_data, on_error)
+        self._entries[id(port)] = entry
+        if self._running:
+            self._activate(entry)
+
+    def remove(self, port):
+        entry = self._entries.pop(id(port), None)
+        if entry is None:
+            return
+        entry.active = False
+        if self.mode == MODE_SELECT:
+            self._pending.append(("remove", entry))
+            self._wake()
+
+    def _activate(self, entry):
+        port = entry.port
+        if self.mode == MODE_SELECT:
+            try:
+                port.timeout = 0
+            except Exception:
+                pass
+            self._pending.append(("add", entry))
+            self._wake()
+        else:
+            try:
+                port.timeout = self.read_timeout
+            except Exception:
+                pass
+            entry.thread = threading.Thread(target=self._run_port, args=(entry,), name="io-reader", daemon=True)
+            entry.thread.start()
+
+    def _wake(self):
+        w = self._wake_w
+        if w is not None:
+            try:
+                w.send(b"\0")
+            except Exception:
+                pass
+
+    # ---------- SELECT LOOP ----------
+    def _apply_pending(self):
+        sel = self._selector
+        pending = self._pending
+        while pending:
+            op, entry = pending.popleft()
+            if op == "add":
+                if not entry.active:
+                    continue
+                try:
+                    fd = entry.port.fileno()
+                    sel.register(fd, selectors.EVENT_READ, entry)
+                    entry.fd = fd
+                except Exception:
+                    # a port without a selectable descriptor still works,
+                    # it just gets its own blocking reader
+                    try:
+                        entry.port.timeout = self.read_timeout
+                    except Exception:
+                        pass
+                    entry.thread = threading.Thread(target=self._run_port, args=(entry,), name="io-reader", daemon=True)
+                    entry.thread.start()
+            elif entry.fd is not None:
+                try:
+                    sel.unregister(entry.fd)
+                except Exception:
+                    pass
+                entry.fd = None
+
+    def _run(self):
+        sel = self._selector
+        wake_r = self._wake_r
+        while self._running:
+            self._apply_pending()
+            try:
+                ready = sel.select()
+            except Exception:
+                continue
+            t0 = time.perf_counter_ns()
+            handled = False
+            for key, _ in ready:
+                entry = key.data
+                if entry is None:
+                    try:
+                        wake_r.recv(_READ_CHUNK)
+                    except Exception:
+                        pass
+                    continue
+                if not entry.active:
+                    continue
+                port = entry.port
+                try:
+                    n = port.in_waiting
+                    data = port.read(n if n else _READ_CHUNK)
+                except Exception:
+                    try:
+                        sel.unregister(key.fd)
+                    except Exception:
+                        pass
+                    entry.fd = None
+                    self._failed(entry)
+                    continue
+                if data:
+                    handled = True
+                    self.bytes += len(data)
+                    entry.on_data(data)
+            if handled:
+                self.wakeups += 1
+                self._record_loop(time.perf_counter_ns() - t0)
+
+    # ---------- THREAD FALLBACK ----------
+    def _run_port(self, entry):
+        port = entry.port
+        while entry.active and self._running:
+            try:
+                n = port.in_waiting
+                data = port.read(n if n else 1)
+            except Exception:
+                self._failed(entry)
+                return
+            if data:
+                t0 = time.perf_counter_ns()
+                self.wakeups += 1
+                self.bytes += len(data)
+                entry.on_data(data)
+                self._record_loop(time.perf_counter_ns() - t0)
+
+    def _failed(self, entry):
+        self.errors += 1
+        entry.active = False
+        if self._entries.get(id(entry.port)) is entry:
+            del self._entries[id(entry.port)]
+        cb = entry.on_error
+        if cb:
+            cb(entry.port)
+
+    # ---------- STATS ----------
+    def _record_loop(self, ns):
+        # wakeup to last handler done: how long a ready port can wait behind the others
+        self._loop[self._loop_idx] = ns
+        self._loop_idx = (self._loop_idx + 1) % len(self._loop)
+        if self._loop_count < len(self._loop):
+            self._loop_count += 1
+        if METRICS.enabled:
+            METRICS.record("io_loop", ns)
+
+    def stats(self):
+        p50, p99, worst = percentiles_ms(self._loop, self._loop_count, NANOSECONDS)
+        return {
+            "mode": self.mode,
+            "ports": len(self._entries),
+            "wakeups": self.wakeups,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "loop_p50_ms": p50,
+            "loop_p99_ms": p99,
+            "loop_max_ms": worst,
+        }
@@ -0,0 +1,107 @@
+import time
+from collections import namedtuple
+
+import pygame
+
+# ===================== JOYSTICK INPUT =====================
+JoystickState = namedtuple("JoystickState", "stamp_ns axes connected")
+
+EMPTY_STATE = JoystickState(0, (), False)
+
+_EVENT_TYPES = (pygame.JOYAXISMOTION, pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)
+
+
+def _instance_id(ev):
+    return getattr(ev, "instance_id", getattr(ev, "joy", None))
+
+
+class JoystickInput:
+    def __init__(self, index=0):
+        self.index = index
+
+        self.joy = None
+        self.instance_id = None
+        self.name = ""
+        self.num_axes = 0
+        self.num_buttons = 0
+
+        self._axes = []
+        # latest snapshot; replaced as a whole so readers never need a lock
+        self.state = EMPTY_STATE
+
+        self.events = 0
+        self.motion_events = 0
+        self.device_changes = 0
+
+    def init(self):
+        try:
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed(list(_EVENT_TYPES))
+        except Exception:
+            pass
+        self.open()
+
+    def open(self):
+        if self.joy is not None:
+            return True
+        try:
+            if pygame.joystick.get_count() <= self.index:
+                return False
+            joy = pygame.joystick.Joystick(self.index)
+            joy.init()
+            self.joy = joy
+            self.instance_id = joy.get_instance_id() if hasattr(joy, "get_instance_id") else joy.get_id()
+            self.name = joy.get_name()
+            self.num_axes = joy.get_numaxes()
+            self.num_buttons = joy.get_numbuttons()
+            self._axes = [joy.get_axis(i) for i in range(self.num_axes)]
+        except Exception:
+            self.close()
+            return False
+        self.device_changes += 1
+        self._publish()
+        return True
+
+    def close(self):
+        self.joy = None
+        self.instance_id = None
+        self.name = ""
+        self.num_axes = 0
+        self.num_buttons = 0
+        self._axes = []
+        self.state = EMPTY_STATE
+
+    def poll(self):
+        try:
+            events = pygame.event.get()
+        except Exception:
+            return False
+        return self.handle(events)
+
+    def handle(self, events):
+        # pygame has one event queue per process; with several controllers
+        # the caller drains it once and hands the same batch to each input
+        changed = False
+        for ev in events:
+            self.events += 1
+            if ev.type == pygame.JOYAXISMOTION:
+                if _instance_id(ev) == self.instance_id and ev.axis < self.num_axes:
+                    self._axes[ev.axis] = ev.value
+                    self.motion_events += 1
+                    changed = True
+            elif ev.type == pygame.JOYDEVICEADDED:
+                if self.joy is None:
+                    changed = self.open() or changed
+            elif ev.type == pygame.JOYDEVICEREMOVED:
+                if _instance_id(ev) == self.instance_id:
+                    self.close()
+                    self.device_changes += 1
+                    changed = True
+                    self.open()
+
+        if changed and self.joy is not None:
+            self._publish()
+        return changed
+
+    def _publish(self):
+        self.state = JoystickState(time.perf_counter_ns(), tuple(self._axes), True)
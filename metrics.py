@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+# ===================== METRICS =====================
+# log-spaced buckets, 8 per power of two, from 1 us up to ~1 s
+_BUCKETS_PER_OCTAVE = 8
+_MIN_NS = 1000
+_NUM_BUCKETS = 20 * _BUCKETS_PER_OCTAVE + 1
+
+_BOUNDS = [int(_MIN_NS * 2 ** (i / _BUCKETS_PER_OCTAVE)) for i in range(_NUM_BUCKETS)]
+
+STAGES = ("joystick", "head_parse", "telemetry", "io_loop", "shaping", "encode", "write", "out_queue", "scene", "plot", "tick", "gc", "input_to_wire")
+
+
+# sample units for percentiles_ms, as milliseconds per unit
+SECONDS = 1e3
+NANOSECONDS = 1e-6
+
+
+def percentiles_ms(ring, count, unit):
+    # p50, p99 and max in ms of the first `count` samples of a ring buffer;
+    # `unit` says what the samples are in (SECONDS or NANOSECONDS)
+    samples = sorted(ring[:count]) if count else [0]
+    n = len(samples)
+    return samples[int(n * 0.50)] * unit, samples[min(n - 1, int(n * 0.99))] * unit, samples[-1] * unit
+
+
+def _bucket(ns):
+    # bisect over a short static list; cheaper than math.log on the hot path
+    lo, hi = 0, _NUM_BUCKETS - 1
+    if ns >= _BOUNDS[hi]:
+        return _NUM_BUCKETS
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if _BOUNDS[mid] <= ns:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class Histogram:
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (_NUM_BUCKETS + 1)
+        self.total = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        self.counts[_bucket(ns)] += 1
+        self.total += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def reset(self):
+        self.counts = [0] * (_NUM_BUCKETS + 1)
+        self.total = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def percentile_ns(self, q):
+        total = self.total
+        if not total:
+            return 0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(_BOUNDS[i], self.max_ns) if i < _NUM_BUCKETS else self.max_ns
+        return self.max_ns
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "mean_us": self.sum_ns / self.total / 1000.0 if self.total else 0.0,
+            "p50_us": self.percentile_ns(0.50) / 1000.0,
+            "p99_us": self.percentile_ns(0.99) / 1000.0,
+            "max_us": self.max_ns / 1000.0,
+        }
+
+
+class Metrics:
+    def __init__(self, stages=STAGES):
+        # hot paths check this flag before touching the clock, so a disabled
+        # instance costs one attribute load per stage
+        self.enabled = False
+        self.stages = {name: Histogram(name) for name in stages}
+
+    def stage(self, name):
+        h = self.stages.get(name)
+        if h is None:
+            h = self.stages[name] = Histogram(name)
+        return h
+
+    def record(self, name, ns):
+        self.stage(name).add(ns)
+
+    def reset(self):
+        for h in self.stages.values():
+            h.reset()
+
+    def snapshot(self):
+        return {name: h.summary() for name, h in self.stages.items()}
+
+    def overlay_text(self, names=None):
+        lines = []
+        for name in names or self.stages:
+            h = self.stages.get(name)
+            if h is None or not h.total:
+                continue
+            s = h.summary()
+            lines.append(f"{name:<13} p50 {s['p50_us']:>7.0f} p99 {s['p99_us']:>7.0f} us")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+class MetricsExporter:
+    def __init__(self, metrics, path, interval=5.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.metrics.enabled:
+                try:
+                    self.export()
+                except OSError:
+                    pass
+
+    def export(self):
+        new = not os.path.exists(self.path)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.path, "a", encoding="utf-8") as f:
+            if new:
+                f.write("time,stage,count,mean_us,p50_us,p99_us,max_us\n")
+            for name, s in self.metrics.snapshot().items():
+                if s["count"]:
+                    f.write(f"{stamp},{name},{s['count']},{s['mean_us']:.1f},{s['p50_us']:.1f},"
+                            f"{s['p99_us']:.1f},{s['max_us']:.1f}\n")
@@ -0,0 +1,157 @@
+import json
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ===================== CHANNEL MIXER =====================
+# every CRSF channel is a sum of mix lines; a line takes one input, scales it
+# by `weight`, optionally multiplies it by a second input (throttle-steer
+# coupling and the like), adds `offset`, and only counts while its `switch`
+# input is above SWITCH_ON. A channel's sum is -1..1 over the full CRSF range
+# and is clipped to the channel's limits; channels without lines stay at 1024
+INPUTS = ("steer", "throttle", "yaw", "pitch", "l2", "reverse", "rx", "ry", "steer_abs",
+          "axis0", "axis1", "axis2", "axis3", "axis4", "axis5", "one")
+NUM_CHANNELS = 16
+SWITCH_ON = 0.5
+
+CRSF_MIN = 172
+CRSF_MAX = 1811
+CRSF_IDLE = 1024
+
+Mix = namedtuple("Mix", "channel source weight offset multiply switch")
+Mix.__new__.__defaults__ = ("one", 1.0, 0.0, "one", "one")
+
+# the fixed mapping ControlCore always had: steer, throttle, head yaw and
+# pitch, L2 on channels 0-4. Unipolar inputs (throttle, l2) are 0..1, so they
+# are spread over the channel with weight 2 and offset -1
+DEFAULT_MIX = {
+    "mixes": [
+        {"channel": 0, "source": "steer"},
+        {"channel": 1, "source": "throttle", "weight": 2.0, "offset": -1.0},
+        {"channel": 2, "source": "yaw"},
+        {"channel": 3, "source": "pitch"},
+        {"channel": 4, "source": "l2", "weight": 2.0, "offset": -1.0},
+    ],
+}
+
+_INDEX = {name: i for i, name in enumerate(INPUTS)}
+
+
+def parse_mix(spec):
+    # spec: {"mixes": [{"channel": 5, "source": "axis4", "switch": "reverse"}, ...],
+    #        "limits": {"1": [-1.0, 0.6]}}; raises ValueError on unknown names
+    lines = []
+    for line in spec.get("mixes", ()):
+        line = Mix(**line) if isinstance(line, dict) else Mix(*line)
+        if not 0 <= int(line.channel) < NUM_CHANNELS:
+            raise ValueError(f"mix channel out of range: {line.channel}")
+        for name in (line.source, line.multiply, line.switch):
+            if name not in _INDEX:
+                raise ValueError(f"unknown mix input: {name}")
+        lines.append(line._replace(channel=int(line.channel), weight=float(line.weight), offset=float(line.offset)))
+    limits = {}
+    for channel, (low, high) in spec.get("limits", {}).items():
+        limits[int(channel)] = (float(low), float(high))
+    return lines, limits
+
+
+def load_mix(path):
+    # a mix file (--mix) checked up front, so a typo stops the start-up with
+    # its reason instead of surfacing as an exception in the first tick
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    try:
+        parse_mix(spec)
+    except (AttributeError, TypeError, KeyError) as e:
+        raise ValueError(f"not a mix spec: {e}") from None
+    return spec
+
+
+def _to_crsf(y):
+    return CRSF_MIN + (y + 1.0) * (CRSF_MAX - CRSF_MIN) / 2.0
+
+
+class Mixer:
+    def __init__(self, spec=None):
+        lines, limits = parse_mix(DEFAULT_MIX if spec is None else spec)
+        self.lines = lines
+        used = sorted({line.channel for line in lines})
+        self.used = used
+
+        # per-line gathers and the line -> channel scatter, plus the clip
+        # bounds in CRSF units; an unused channel is pinned by low == high
+        low = [float(CRSF_IDLE)] * NUM_CHANNELS
+        high = [float(CRSF_IDLE)] * NUM_CHANNELS
+        for ch in used:
+            lo, hi = limits.get(ch, (-1.0, 1.0))
+            low[ch] = _to_crsf(max(-1.0, lo))
+            high[ch] = _to_crsf(min(1.0, hi))
+        self.low = low
+        self.high = high
+        # plain lines (no multiply, no switch) skip two lookups per tick
+        self._plain = [(line.channel, _INDEX[line.source], line.weight, line.offset)
+                       for line in lines if line.multiply == "one" and line.switch == "one"]
+        self._gated = [(line.channel, _INDEX[line.source], line.weight, line.offset,
+                        _INDEX[line.multiply], _INDEX[line.switch])
+                       for line in lines if line.multiply != "one" or line.switch != "one"]
+        self._bounds = [(ch, low[ch], high[ch]) for ch in used]
+
+        if np is not None:
+            self._src = np.array([_INDEX[line.source] for line in lines], dtype=np.intp)
+            self._mul = np.array([_INDEX[line.multiply] for line in lines], dtype=np.intp)
+            self._sw = np.array([_INDEX[line.switch] for line in lines], dtype=np.intp)
+            self._w = np.array([line.weight for line in lines])
+            self._off = np.array([line.offset for line in lines])
+            # lines x channels, so a batch of line terms becomes channels in one matmul
+            self._scatter = np.zeros((len(lines), NUM_CHANNELS))
+            for i, line in enumerate(lines):
+                self._scatter[i, line.channel] = 1.0
+            self._low = np.array(low)
+            self._high = np.array(high)
+
+    def __call__(self, x):
+        # x: one value per INPUTS entry; returns 16 ints in CRSF units
+        # per tick this plain loop beats numpy: at 16 channels the array
+        # setup costs more than the arithmetic, so numpy is kept for batches
+        y = [0.0] * NUM_CHANNELS
+        for ch, src, w, off in self._plain:
+            y[ch] += w * x[src] + off
+        for ch, src, w, off, mul, sw in self._gated:
+            if x[sw] > SWITCH_ON:
+                y[ch] += w * x[src] * x[mul] + off
+        out = [CRSF_IDLE] * NUM_CHANNELS
+        for ch, low, high in self._bounds:
+            v = CRSF_MIN + (y[ch] + 1.0) * (CRSF_MAX - CRSF_MIN) / 2.0
+            out[ch] = int(low if v < low else high if v > high else v)
+        return out
+
+    def apply_many(self, rows):
+        # rows: N x len(INPUTS); the whole batch in one gather, matmul and clip
+        if np is None:
+            return [self(row) for row in rows]
+        x = np.asarray(rows, dtype=float)
+        terms = (x[:, self._src] * self._w * x[:, self._mul] + self._off) * (x[:, self._sw] > SWITCH_ON)
+        y = terms @ self._scatter
+        raw = np.clip(CRSF_MIN + (y + 1.0) * (CRSF_MAX - CRSF_MIN) / 2.0, self._low, self._high)
+        return raw.astype(np.int64)
+
+
+# bounded like the shaping curves, edited mixes would otherwise pile up
+MIX_CACHE_SIZE = 8
+_MIXERS = OrderedDict()
+
+
+def compile_mix(spec):
+    # keyed on the JSON text, profiles and reconnects reuse the compiled mixer
+    key = json.dumps(spec, sort_keys=True) if spec is not None else ""
+    mixer = _MIXERS.get(key)
+    if mixer is None:
+        mixer = _MIXERS[key] = Mixer(spec)
+        if len(_MIXERS) > MIX_CACHE_SIZE:
+            _MIXERS.popitem(last=False)
+    else:
+        _MIXERS.move_to_end(key)
+    return mixer
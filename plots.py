@@ -0,0 +1,217 @@
+import time
+
+import numpy as np
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+from metrics import METRICS
+
+# ===================== LIVE PLOTS =====================
+# the TX thread appends one row per slot to a preallocated ring; the GUI
+# folds only the rows that arrived since the last frame into one min/max
+# bucket per pixel column and draws each series as a single polyline of
+# 2 x width points written straight into a reused QPolygonF. A frame costs
+# the new rows plus the pixel width, whatever the rate or window length.
+SERIES = ("steer", "throttle", "yaw", "pitch") + tuple(f"ch{i}" for i in range(16))
+_INDEX = {name: i for i, name in enumerate(SERIES)}
+
+# lane title, then (series, low, high, colour) per trace
+LANES = (
+    ("Sticks", (("steer", -1.0, 1.0, "#00ff88"), ("throttle", 0.0, 1.0, "#ffaa00"))),
+    ("Head", (("yaw", -180.0, 180.0, "#33aaff"), ("pitch", -45.0, 45.0, "#ff66cc"))),
+    ("Channels", tuple((f"ch{i}", 172.0, 1811.0, c)
+                       for i, c in enumerate(("#00ff88", "#ffaa00", "#33aaff", "#ff66cc", "#bbbbbb")))),
+)
+
+WINDOWS_S = (5, 10, 30)
+RING_SECONDS = 30
+RING_RATE_HZ = 500
+
+
+class SampleRing:
+    # written by one thread (TX), read by the GUI; `count` is stored last,
+    # so a reader never sees a row before it is complete
+    def __init__(self, seconds=RING_SECONDS, rate_hz=RING_RATE_HZ):
+        self.capacity = int(seconds * rate_hz)
+        self.t = np.zeros(self.capacity)
+        self.v = np.zeros((self.capacity, len(SERIES)), dtype=np.float32)
+        self.count = 0
+
+    def __call__(self, now, ctx, channels):
+        # CrsfTxEngine.tap; ctx is the producer's (axes, steer, throttle, yaw, pitch)
+        if ctx is not None:
+            self.append(now, ctx[1:5], channels)
+
+    def append(self, now, values, channels):
+        # values: (steer, throttle, yaw, pitch)
+        i = self.count % self.capacity
+        self.t[i] = now
+        row = self.v[i]
+        row[:4] = values
+        row[4:] = channels
+        self.count += 1
+
+    def since(self, count):
+        # rows [count, self.count) in time order, at most one ring's worth
+        end = self.count
+        start = max(count, end - self.capacity)
+        if start >= end:
+            return None, None, end
+        i0, i1 = start % self.capacity, end % self.capacity
+        if i0 < i1:
+            return self.t[i0:i1].copy(), self.v[i0:i1].copy(), end
+        return (np.concatenate((self.t[i0:], self.t[:i1])), np.concatenate((self.v[i0:], self.v[:i1])), end)
+
+
+class MinMaxColumns:
+    # one min/max bucket per pixel column, kept as a ring keyed by the
+    # column's absolute index t // dt; a bucket whose key is stale is empty
+    def __init__(self, width, seconds, series=len(SERIES)):
+        self.width = width
+        self.dt = seconds / width
+        self.lo = np.zeros((width, series), dtype=np.float32)
+        self.hi = np.zeros((width, series), dtype=np.float32)
+        self.key = np.full(width, -1, dtype=np.int64)
+
+    def add(self, t, v):
+        k = (t / self.dt).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+        keys = k[starts]
+        lo = np.minimum.reduceat(v, starts, axis=0)
+        hi = np.maximum.reduceat(v, starts, axis=0)
+        slot = keys % self.width
+        # only the first group can land in a bucket that already has samples
+        if self.key[slot[0]] == keys[0]:
+            lo[0] = np.minimum(lo[0], self.lo[slot[0]])
+            hi[0] = np.maximum(hi[0], self.hi[slot[0]])
+        self.lo[slot] = lo
+        self.hi[slot] = hi
+        self.key[slot] = keys
+
+    def window(self, now):
+        # oldest to newest column ending at `now`, plus which ones hold data
+        last = int(now / self.dt)
+        keys = np.arange(last - self.width + 1, last + 1)
+        slot = keys % self.width
+        return self.lo[slot], self.hi[slot], self.key[slot] == keys
+
+
+def _polygon(n):
+    # a QPolygonF and a numpy view of its points, so coordinates are written
+    # in bulk and the same polygon is drawn every frame
+    poly = QPolygonF(n)
+    ptr = poly.data()
+    ptr.setsize(n * 16)
+    return poly, np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)
+
+
+class PlotPanel(QWidget):
+    def __init__(self, ring, seconds=WINDOWS_S[1], parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.seconds = seconds
+        self.setMinimumHeight(240)
+        self.font = QFont("Consolas", 10)
+        self.pens = {}
+        for _, traces in LANES:
+            for name, _, _, colour in traces:
+                self.pens[name] = QPen(QColor(colour), 1)
+        self.grid_pen = QPen(QColor("#2a2f36"), 1)
+        self.text_pen = QPen(QColor("#9fd3ff"))
+
+        self.frames = 0
+        self._columns = None
+        self._seen = 0
+        self._polys = {}
+        self._xs = None
+        self._now = time.perf_counter()
+
+    # ---------- DATA (GUI thread) ----------
+    def set_seconds(self, seconds):
+        self.seconds = seconds
+        self._columns = None
+        self.update()
+
+    def refresh(self, now=None):
+        # called from the render timer; pulls only the rows added since the last call
+        self._now = time.perf_counter() if now is None else now
+        columns = self._columns
+        if columns is None:
+            self._rebuild()
+            return
+        t, v, self._seen = self.ring.since(self._seen)
+        if t is not None:
+            columns.add(t, v)
+        self.update()
+
+    def _rebuild(self):
+        width = max(16, self.width())
+        self._columns = MinMaxColumns(width, self.seconds)
+        self._polys = {name: _polygon(2 * width) for name in self.pens}
+        # every column is drawn as a max -> min stroke at the same x
+        self._xs = np.repeat(np.arange(width, dtype=np.float64), 2)
+        self._seen = 0
+        t, v, self._seen = self.ring.since(0)
+        if t is not None:
+            self._columns.add(t, v)
+        self.update()
+
+    def resizeEvent(self, event):
+        self._columns = None
+        super().resizeEvent(event)
+
+    # ---------- PAINT ----------
+    def paintEvent(self, event):
+        t0 = time.perf_counter_ns() if METRICS.enabled else 0
+        if self._columns is None:
+            self._rebuild()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#0b0f14"))
+        painter.setFont(self.font)
+
+        lo, hi, valid = self._columns.window(self._now)
+        have = valid.any()
+        if have:
+            # empty columns repeat the last filled one; before the first
+            # sample the trace collapses onto its first point
+            idx = np.where(valid, np.arange(len(valid)), 0)
+            np.maximum.accumulate(idx, out=idx)
+            first = int(np.argmax(valid))
+            idx[:first] = first
+            lo, hi = lo[idx], hi[idx]
+
+        lane_h = self.height() / len(LANES)
+        for n, (title, traces) in enumerate(LANES):
+            top = n * lane_h
+            rect = QRectF(0, top + 4, self.width(), lane_h - 8)
+            painter.setPen(self.grid_pen)
+            painter.drawLine(0, int(rect.center().y()), self.width(), int(rect.center().y()))
+            painter.drawLine(0, int(rect.bottom()) + 3, self.width(), int(rect.bottom()) + 3)
+            painter.setPen(self.text_pen)
+            painter.drawText(rect.adjusted(4, 0, 0, 0), Qt.AlignTop | Qt.AlignLeft, title)
+            if not have:
+                continue
+            for name, low, high, _ in traces:
+                s = _INDEX[name]
+                poly, pts = self._polys[name]
+                pts[:, 0] = self._xs
+                ys = pts[:, 1]
+                ys[0::2] = hi[:, s]
+                ys[1::2] = lo[:, s]
+                # value -> pixel, high at the top of the lane
+                ys -= low
+                ys *= -rect.height() / (high - low)
+                ys += rect.bottom()
+                np.clip(ys, rect.top(), rect.bottom(), out=ys)
+                if first:
+                    pts[:2 * first] = pts[2 * first]
+                painter.setPen(self.pens[name])
+                painter.drawPolyline(poly)
+
+        painter.setPen(self.text_pen)
+        painter.drawText(self.rect().adjusted(0, 0, -4, 0), Qt.AlignTop | Qt.AlignRight, f"{self.seconds} s")
+        painter.end()
+        self.frames += 1
+        if t0:
+            METRICS.record("plot", time.perf_counter_ns() - t0)
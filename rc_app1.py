@@ -1,129 +1,196 @@
 import sys
-import time
-import math
-import pygame
-import serial
-import serial.tools.list_ports
 
+# ===================== HEADLESS =====================
+# dispatched before the Qt imports so --headless never loads PyQt5
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    from headless import main
+    sys.exit(main([a for a in sys.argv[1:] if a != "--headless"]))
+
+from time import perf_counter, perf_counter_ns
+
+import pygame
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton, QSlider,
-    QComboBox, QVBoxLayout, QHBoxLayout, QGroupBox, QFrame
+    QComboBox, QSpinBox, QVBoxLayout, QHBoxLayout, QGroupBox, QFrame
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPen, QPainterPath, QBrush
 from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView
 
-# ===================== CRSF =====================
-CRSF_ADDRESS = 0xC8
-CRSF_FRAMETYPE_RC_CHANNELS = 0x16
-
-def map_range(x, a1, a2, b1, b2):
-    return int(b1 + (x - a1) * (b2 - b1) / (a2 - a1))
-
-def pack_crsf_channels(ch):
-    buf = 0
-    bits = 0
-    out = []
-    for c in ch:
-        buf |= (c & 0x7FF) << bits
-        bits += 11
-        while bits >= 8:
-            out.append(buf & 0xFF)
-            buf >>= 8
-            bits -= 8
-    if bits:
-        out.append(buf & 0xFF)
-    payload = bytes(out)
-    frame = bytes([CRSF_ADDRESS, len(payload) + 2, CRSF_FRAMETYPE_RC_CHANNELS]) + payload
-    crc = 0
-    for b in frame[2:]:
-        crc = (crc + b) & 0xFF
-    return frame + bytes([crc])
+from control_core import ControlCore, ControlLoop, DEFAULT_TUNING, HEAD_ARDUINO, HEAD_JOYSTICK, PROFILES
+from control_process import ControlProcess, format_isolation
+from crsf import CrsfEncoder, map_range
+from devices import (DeviceSupervisor, open_serial, ROLE_IN, ROLE_OUT, STATE_CONNECTED, STATE_DISCONNECTED,
+                     STATE_FAILED, STATE_LOST, STATE_RETRYING)
+from gc_tuning import GcGovernor, format_gc
+from head_fusion import FUSION_LEVELS, FUSION_PREDICT, HeadFusion
+from headtracker import HeadTrackReader, MODE_ASCII, MODE_BINARY
+from io_reactor import IoReactor
+from joystick_input import JoystickInput
+from metrics import METRICS, MetricsExporter
+from mixer import load_mix
+from recorder import FlightRecorder
+from renderer import SceneRenderer
+from send_policy import DEFAULT_HEARTBEAT_S, MAX_HEARTBEAT_S, POLICIES, make_policy
+from shaping import DEFAULT_SHAPES
+from telemetry import TelemetryReader, format_telemetry
+from tx_engine import CrsfTxEngine, TX_RATES
+from watchdog import StallWatchdog, format_watchdog
+
+try:
+    from plots import PlotPanel, SampleRing, WINDOWS_S
+except ImportError:
+    # the live plots need numpy; without it the button stays disabled
+    PlotPanel = None
 
 # ===================== APP =====================
+class DeviceSignals(QObject):
+    ports_changed = pyqtSignal(list)
+    link_state = pyqtSignal(str, str, str, str)
+
+
 class RCApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, isolated=False, gc_tune=False, record=False, mix=None):
         super().__init__()
         self.setWindowTitle("RC Vehicle Control System")
         self.resize(1400, 820)
 
-        self.serial_out = None
-        self.serial_in = None
-        self.in_buffer = ""
-
         self.sending_enabled = True
-        self.steer = 0.0
-        self.throttle = 0.0
-        self.yaw = 0.0
-        self.pitch = 0.0
 
-        self.yaw_offset = 0.0
-        self.pitch_offset = 0.0
-
-        self.head_source = "arduino"
-
-        self.joy = None
-
-        self.last_steer = 0.0
-        self.last_throttle = 0.0
-        self.last_yaw = 0.0
-        self.last_pitch = 0.0
-        self.last_time = time.time()
+        self.core = ControlCore()
+        # a channel mix loaded with --mix; it is fixed for the session, so the
+        # isolated child gets it once when it is spawned
+        if mix is not None:
+            self.core.configure({"mix": mix})
+        # isolated: core, joystick, tracker, telemetry and CRSF output run in
+        # a child process; self.core then holds the tuning the GUI edits and
+        # a mirror of the child's state for display
+        self.remote = ControlProcess(gc_tune=gc_tune, mix=mix) if isolated else None
+        # isolated, the child tunes its own collector; this process only
+        # times its collections, nothing here would run them in a gap
+        self.gc = GcGovernor(tune=gc_tune and not isolated)
+
+        self.joystick = JoystickInput()
 
         self.default_L2_axis = 4
 
+        self.tx = CrsfTxEngine(CrsfEncoder().encode, rate_hz=TX_RATES[0])
+        self.head_reader = HeadTrackReader()
+        self.head_fusion = HeadFusion(FUSION_PREDICT)
+        self.head_reader.fusion = self.head_fusion
+        # the core steps on the TX thread at the send rate; the GUI only
+        # publishes fresh stick readings
+        self.control = ControlLoop(self.core, self.head_reader.sample_at, self.default_L2_axis)
+        self.tx.producer = self.control
+        self.tx.gc = self.gc
+        self.telemetry = TelemetryReader()
+        # tracker and telemetry bytes are read by one thread that wakes as
+        # soon as either port has data
+        self.io = IoReactor()
+        self.head_reader.reactor = self.io
+        self.telemetry.reactor = self.io
+        self.metrics_exporter = MetricsExporter(METRICS, "rc_metrics.csv")
+        self.recorder = None
+        # the ring is ~26 MB on disk plus the previous session's copy, so it
+        # only starts on its own with --record
+        self.record_on_start = record
+        # the joystick timer beats it; a frozen GUI thread switches the TX
+        # engine to neutral frames until the timer runs again
+        self.watchdog = StallWatchdog(log_path="rc_stalls.log")
+        self.watchdog.watch(self.tx)
+
+        self.devices = DeviceSupervisor(self.open_port)
+        self.devices.sinks[ROLE_OUT] = self.set_out_port
+        self.devices.sinks[ROLE_IN] = self.head_reader.set_port
+        self.tx.on_error = lambda: self.devices.link_lost(ROLE_OUT)
+        self.head_reader.on_error = lambda: self.devices.link_lost(ROLE_IN)
+        self.telemetry.on_error = lambda: self.devices.link_lost(ROLE_OUT)
+        # port scans and connects go to whichever side owns the serial ports
+        self.links = self.remote if isolated else self.devices
+
         self.init_ui()
 
+        self.init_devices()
+
         self.init_pygame()
 
         self.init_timers()
 
+    # ---------- DEVICES ----------
+    def init_devices(self):
+        self.device_signals = DeviceSignals()
+        self.device_signals.ports_changed.connect(self.populate_ports)
+        self.device_signals.link_state.connect(self.on_link_state)
+        if self.remote is not None:
+            # fired from poll_remote, already on the GUI thread
+            self.remote.on_ports = self.populate_ports
+            self.remote.on_state = self.on_link_state
+            return
+        self.devices.on_ports = self.device_signals.ports_changed.emit
+        self.devices.on_state = self.device_signals.link_state.emit
+        self.devices.start()
+
+    def open_port(self, role, device):
+        # called on the supervisor thread
+        return open_serial(device, 0 if role == ROLE_OUT else self.head_reader.read_timeout)
+
+    def set_out_port(self, port):
+        # one port carries channels out and telemetry back
+        self.tx.set_port(port)
+        self.telemetry.set_port(port)
+
     # ---------- PYGAME / JOYSTICK ----------
     def init_pygame(self):
+        if self.remote is not None:
+            return
         try:
             pygame.init()
             pygame.joystick.init()
         except Exception:
             pass
-        self.reinit_joystick()
-        self.joy_reinit_timer = QTimer()
-        self.joy_reinit_timer.timeout.connect(self.reinit_joystick)
-        self.joy_reinit_timer.start(1000)
-
-    def reinit_joystick(self):
-        try:
-            count = pygame.joystick.get_count()
-        except Exception:
-            count = 0
+        self.joystick.init()
+        self.update_logic()
+        self.update_joystick_label()
 
-        if count > 0:
-            try:
-                if not self.joy:
-                    self.joy = pygame.joystick.Joystick(0)
-                    self.joy.init()
-                else:
-                    _ = self.joy.get_name()
-            except Exception:
-                self.joy = None
-        else:
-            self.joy = None
+        # pygame wants the thread it was initialised on, so its events are
+        # pumped here and the TX thread only picks up the axes published by
+        # set_axes; hot-plug arrives as JOYDEVICEADDED/REMOVED, so a coarse
+        # 10 ms pass (the watchdog period) is enough and costs the event loop
+        # little
+        self.joy_timer = QTimer()
+        self.joy_timer.timeout.connect(self.poll_joystick)
+        self.joy_timer.start(10)
+
+    def poll_joystick(self):
+        self.watchdog.beat()
+        t0 = perf_counter_ns() if METRICS.enabled else 0
+        if self.joystick.poll():
+            if t0:
+                METRICS.record("joystick", perf_counter_ns() - t0)
+            self.update_logic()
 
+    def reinit_joystick(self):
+        if self.remote is None:
+            self.joystick.open()
         self.update_joystick_label()
 
+    def joystick_info(self):
+        if self.remote is not None:
+            stats = self.remote.stats()
+            if stats is None:
+                return False, "", 0
+            joy = stats["joystick"]
+            return joy["connected"], joy["name"], joy["buttons"]
+        return self.joystick.joy is not None, self.joystick.name, self.joystick.num_buttons
+
     def update_joystick_label(self):
         if not hasattr(self, 'lbl_status') or self.lbl_status is None:
             return
         try:
-            if self.joy:
-                try:
-                    name = self.joy.get_name()
-                except Exception:
-                    name = "Controller"
-                try:
-                    nbtns = self.joy.get_numbuttons()
-                except Exception:
-                    nbtns = "?"
-                self.lbl_status.setText(f"🟢 Controller: {name} ({nbtns} buttons)")
+            connected, name, buttons = self.joystick_info()
+            if connected:
+                name = name or "Controller"
+                self.lbl_status.setText(f"🟢 Controller: {name} ({buttons} buttons)")
             else:
                 inp = self.cb_in.currentText() if hasattr(self, 'cb_in') else ""
                 out = self.cb_out.currentText() if hasattr(self, 'cb_out') else ""
@@ -259,12 +326,33 @@ class RCApp(QMainWindow):
         strap2 = self.head_scene.addRect(110, -8, 40, 16, QPen(QColor("#444")), QBrush(QColor("#444")))
         self.goggles_group = self.head_scene.createItemGroup([frame_item, left_lens, right_lens, bridge, strap, strap2])
         self.goggles_group.setTransformOriginPoint(0, 0)
+        self.lenses = (left_lens, right_lens)
 
         self.gaze_line = self.head_scene.addLine(0, 0, 0, -100, QPen(QColor("#ffd366"), 4, Qt.SolidLine, Qt.RoundCap))
         self.pitch_bar = self.head_scene.addRect(-12, 80, 24, 0, QPen(Qt.NoPen), QBrush(QColor("#9b59ff")))
 
         center.addWidget(self.head_view, alignment=Qt.AlignCenter)
 
+        # live plots take the head view's place while shown; the TX engine only
+        # feeds the ring while they are visible
+        self.plot_ring = None
+        self.plots = None
+        if PlotPanel is not None:
+            self.plot_ring = SampleRing()
+            self.plots = PlotPanel(self.plot_ring)
+            self.plots.setMinimumSize(420, 300)
+            self.plots.hide()
+            self.cb_plot_window = QComboBox()
+            self.cb_plot_window.addItems([f"{s} s" for s in WINDOWS_S])
+            self.cb_plot_window.setCurrentIndex(WINDOWS_S.index(self.plots.seconds))
+            self.cb_plot_window.currentIndexChanged.connect(lambda i: self.plots.set_seconds(WINDOWS_S[i]))
+            self.cb_plot_window.hide()
+            center.addWidget(self.plots, 1)
+            center.addWidget(self.cb_plot_window, alignment=Qt.AlignRight)
+
+        self.renderer = SceneRenderer(self.car_item, self.path_item, self.marker, self.car_height,
+                                      self.goggles_group, self.lenses, self.pitch_bar, self.lbl_reverse)
+
         main.addLayout(center, 3)
 
         # ===== RIGHT PANEL =====
@@ -288,13 +376,24 @@ class RCApp(QMainWindow):
 
         self.sl_steer = QSlider(Qt.Horizontal)
         self.sl_steer.setRange(50, 400)
-        self.sl_steer.setValue(200)
+        self.sl_steer.setValue(DEFAULT_TUNING["steer_rate"])
+        self.sl_steer.valueChanged.connect(self.update_tuning)
         self.sl_throttle = QSlider(Qt.Horizontal)
         self.sl_throttle.setRange(50, 400)
-        self.sl_throttle.setValue(200)
+        self.sl_throttle.setValue(DEFAULT_TUNING["throttle_rate"])
+        self.sl_throttle.valueChanged.connect(self.update_tuning)
         self.deadzone_slider = QSlider(Qt.Horizontal)
         self.deadzone_slider.setRange(0, 20)
-        self.deadzone_slider.setValue(5)
+        self.deadzone_slider.setValue(DEFAULT_TUNING["deadzone"])
+        self.deadzone_slider.valueChanged.connect(self.update_tuning)
+        self.sl_expo = QSlider(Qt.Horizontal)
+        self.sl_expo.setRange(0, 100)
+        self.sl_expo.setValue(int(DEFAULT_SHAPES["steer"].expo * 100))
+        self.sl_expo.valueChanged.connect(self.update_tuning)
+        self.sl_throttle_limit = QSlider(Qt.Horizontal)
+        self.sl_throttle_limit.setRange(20, 100)
+        self.sl_throttle_limit.setValue(int(DEFAULT_SHAPES["throttle"].high * 100))
+        self.sl_throttle_limit.valueChanged.connect(self.update_tuning)
 
         t.addWidget(QLabel("Steering response (rate)"))
         t.addWidget(self.sl_steer)
@@ -302,15 +401,54 @@ class RCApp(QMainWindow):
         t.addWidget(self.sl_throttle)
         t.addWidget(QLabel("Steering deadzone (%)"))
         t.addWidget(self.deadzone_slider)
+        t.addWidget(QLabel("Steering expo (%)"))
+        t.addWidget(self.sl_expo)
+        t.addWidget(QLabel("Throttle limit (%)"))
+        t.addWidget(self.sl_throttle_limit)
 
         btn_reset = QPushButton("Reset tuning")
         btn_reset.clicked.connect(self.reset_tuning)
         t.addWidget(btn_reset)
 
+        self.cb_tx_rate = QComboBox()
+        self.cb_tx_rate.addItems([f"{r} Hz" for r in TX_RATES])
+        self.cb_tx_rate.currentIndexChanged.connect(self.change_tx_rate)
+        t.addWidget(QLabel("CRSF frame rate"))
+        t.addWidget(self.cb_tx_rate)
+
+        self.cb_send_policy = QComboBox()
+        self.cb_send_policy.addItems(["Every slot", "On change + heartbeat", "Follow link rate"])
+        self.cb_send_policy.currentIndexChanged.connect(self.change_send_policy)
+        self.sp_heartbeat = QSpinBox()
+        self.sp_heartbeat.setRange(20, int(MAX_HEARTBEAT_S * 1000))
+        self.sp_heartbeat.setSingleStep(10)
+        self.sp_heartbeat.setSuffix(" ms heartbeat")
+        self.sp_heartbeat.setValue(int(DEFAULT_HEARTBEAT_S * 1000))
+        self.sp_heartbeat.valueChanged.connect(self.change_send_policy)
+        t.addWidget(QLabel("Send policy"))
+        t.addWidget(self.cb_send_policy)
+        t.addWidget(self.sp_heartbeat)
+
         btn_pause = QPushButton("⏸ Pause / Resume sending")
         btn_pause.clicked.connect(self.toggle_sending)
         t.addWidget(btn_pause)
 
+        self.btn_metrics = QPushButton("📊 Latency overlay")
+        self.btn_metrics.setCheckable(True)
+        self.btn_metrics.toggled.connect(self.toggle_metrics)
+        t.addWidget(self.btn_metrics)
+
+        self.btn_recorder = QPushButton("⏺ Flight recorder")
+        self.btn_recorder.setCheckable(True)
+        self.btn_recorder.toggled.connect(self.toggle_recorder)
+        t.addWidget(self.btn_recorder)
+
+        self.btn_plots = QPushButton("📈 Live plots")
+        self.btn_plots.setCheckable(True)
+        self.btn_plots.setEnabled(PlotPanel is not None)
+        self.btn_plots.toggled.connect(self.toggle_plots)
+        t.addWidget(self.btn_plots)
+
         right.addWidget(box_tune)
 
         box_head = QGroupBox("Head Tracking")
@@ -323,13 +461,27 @@ class RCApp(QMainWindow):
         hv.addWidget(QLabel("Source"))
         hv.addWidget(self.cb_head_source)
 
+        self.cb_head_proto = QComboBox()
+        self.cb_head_proto.addItems(["Auto", "ASCII", "Binary"])
+        self.cb_head_proto.currentIndexChanged.connect(self.change_head_protocol)
+        hv.addWidget(QLabel("Tracker protocol"))
+        hv.addWidget(self.cb_head_proto)
+
+        self.cb_head_fusion = QComboBox()
+        self.cb_head_fusion.addItems(["Off", "Smooth", "Smooth + drift correction", "Smooth + drift + prediction"])
+        self.cb_head_fusion.setCurrentIndex(FUSION_LEVELS.index(FUSION_PREDICT))
+        self.cb_head_fusion.currentIndexChanged.connect(self.change_head_fusion)
+        hv.addWidget(QLabel("Head filtering"))
+        hv.addWidget(self.cb_head_fusion)
+
         self.btn_calibrate = QPushButton("🎯 Calibrate Head Center")
         self.btn_calibrate.clicked.connect(self.calibrate_head)
         hv.addWidget(self.btn_calibrate)
 
         self.head_deadzone_slider = QSlider(Qt.Horizontal)
         self.head_deadzone_slider.setRange(0, 30)
-        self.head_deadzone_slider.setValue(5)
+        self.head_deadzone_slider.setValue(self.core.head_deadzone)
+        self.head_deadzone_slider.valueChanged.connect(self.update_tuning)
         hv.addWidget(QLabel("Head deadzone (joystick %)"))
         hv.addWidget(self.head_deadzone_slider)
 
@@ -351,317 +503,315 @@ class RCApp(QMainWindow):
         """)
 
         self.load_profile("Beginner")
+        self.btn_recorder.setChecked(self.record_on_start)
         self.refresh_ports()
         self.update_joystick_label()
 
     # ---------- TIMERS ----------
     def init_timers(self):
-        self.loop_timer = QTimer()
-        self.loop_timer.timeout.connect(self.update_logic)
-        self.loop_timer.start(20) 
-
         self.gui_timer = QTimer()
         self.gui_timer.timeout.connect(self.update_gui)
         self.gui_timer.start(200)
 
+        refresh = 60.0
+        try:
+            refresh = QApplication.primaryScreen().refreshRate() or refresh
+        except Exception:
+            pass
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.update_scene)
+        self.render_timer.start(max(16, int(1000 / min(refresh, 60.0))))
+
+        # everything built so far lives for the whole session
+        self.gc.install()
+        if self.remote is not None:
+            self.remote.start()
+        else:
+            self.tx.start()
+            self.io.start()
+            self.watchdog.start()
+
     # ---------- SERIAL / COMS ----------
     def refresh_ports(self):
-        self.cb_out.clear()
-        self.cb_in.clear()
-        for p in serial.tools.list_ports.comports():
-            text = f"{p.device} – {p.description}"
-            self.cb_out.addItem(text, p.device)
-            self.cb_in.addItem(text, p.device)
+        self.links.request_scan()
         self.reinit_joystick()
         self.update_joystick_label()
 
+    def populate_ports(self, ports):
+        for cb in (self.cb_out, self.cb_in):
+            current = cb.currentData()
+            cb.blockSignals(True)
+            cb.clear()
+            for device, description in ports:
+                cb.addItem(f"{device} – {description}", device)
+            idx = cb.findData(current)
+            if idx >= 0:
+                cb.setCurrentIndex(idx)
+            cb.blockSignals(False)
+        self.update_joystick_label()
+
     def connect_serial_out(self):
-        try:
-            port = self.cb_out.currentData()
-            if port:
-                self.serial_out = serial.Serial(port, 115200, timeout=0)
-                self.lbl_status.setText(f"🟢 Output connected: {port}")
-            else:
-                self.lbl_status.setText("🔴 No output selected")
-        except Exception:
-            self.serial_out = None
-            self.lbl_status.setText("🔴 Out connect failed")
+        port = self.cb_out.currentData()
+        if port:
+            self.links.connect(ROLE_OUT, port)
+            self.lbl_status.setText(f"⚪ Connecting output: {port}")
+        else:
+            self.lbl_status.setText("🔴 No output selected")
 
     def connect_serial_in(self):
-        try:
-            port = self.cb_in.currentData()
-            if port:
-                self.serial_in = serial.Serial(port, 115200, timeout=0)
-                self.lbl_status.setText(f"🟢 Input connected: {port}")
-                self.in_buffer = ""
-            else:
-                self.lbl_status.setText("🔴 No input selected")
-        except Exception:
-            self.serial_in = None
-            self.lbl_status.setText("🔴 In connect failed")
+        port = self.cb_in.currentData()
+        if port:
+            self.links.connect(ROLE_IN, port)
+            self.lbl_status.setText(f"⚪ Connecting input: {port}")
+        else:
+            self.lbl_status.setText("🔴 No input selected")
+
+    def on_link_state(self, role, state, device, detail):
+        name = "Output" if role == ROLE_OUT else "Input"
+        if state == STATE_CONNECTED:
+            self.lbl_status.setText(f"🟢 {name} connected: {device}")
+        elif state == STATE_FAILED:
+            self.lbl_status.setText(f"🔴 {'Out' if role == ROLE_OUT else 'In'} connect failed")
+        elif state == STATE_LOST:
+            self.lbl_status.setText(f"🔴 {name} disconnected, reconnecting")
+        elif state == STATE_RETRYING:
+            self.lbl_status.setText(f"🟠 {name} {device}: {detail}")
+        elif state == STATE_DISCONNECTED:
+            self.lbl_status.setText(f"⚪ {name} disconnected")
 
     def toggle_sending(self):
         self.sending_enabled = not self.sending_enabled
+        if self.remote is not None:
+            self.remote.send(enabled=self.sending_enabled)
+        else:
+            self.tx.enabled = self.sending_enabled
         self.lbl_status.setText("⏸ Sending paused" if not self.sending_enabled else "🟢 Sending active")
 
+    def toggle_metrics(self, checked):
+        if self.remote is not None:
+            self.remote.send(metrics=checked)
+            self.lbl_status.setText("📊 Metrics on, exporting to rc_metrics.csv" if checked else "📊 Metrics off")
+            return
+        if checked:
+            METRICS.reset()
+            METRICS.enabled = True
+            self.metrics_exporter.start()
+            self.lbl_status.setText(f"📊 Metrics on, exporting to {self.metrics_exporter.path}")
+        else:
+            METRICS.enabled = False
+            self.metrics_exporter.stop()
+            self.lbl_status.setText("📊 Metrics off")
+
+    def toggle_recorder(self, checked):
+        if self.remote is not None:
+            self.remote.send(record=checked)
+            self.lbl_status.setText("⏺ Recording to rc_flight.bin" if checked else "⏺ Recorder stopped")
+            return
+        if checked and self.recorder is None:
+            try:
+                self.recorder = FlightRecorder("rc_flight.bin").open()
+            except OSError as e:
+                self.recorder = None
+                self.lbl_status.setText(f"🔴 Recorder failed: {e}")
+                return
+            self.tx.recorder = self.recorder
+            self.lbl_status.setText(f"⏺ Recording to {self.recorder.path}")
+        elif not checked and self.recorder is not None:
+            self.tx.recorder = None
+            self.recorder.close()
+            self.recorder = None
+            self.lbl_status.setText("⏺ Recorder stopped")
+
+    def toggle_plots(self, checked):
+        if self.plots is None:
+            return
+        self.head_view.setVisible(not checked)
+        self.plots.setVisible(checked)
+        self.cb_plot_window.setVisible(checked)
+        # isolated, the child's TX thread is out of reach; poll_remote samples
+        # the mirrored state at the render rate instead
+        if self.remote is None:
+            self.tx.tap = self.plot_ring if checked else None
+        self.lbl_status.setText("📈 Live plots on" if checked else "📈 Live plots off")
+
     def reset_tuning(self):
-        self.sl_steer.setValue(200)
-        self.sl_throttle.setValue(200)
-        self.deadzone_slider.setValue(5)
+        self.sl_steer.setValue(DEFAULT_TUNING["steer_rate"])
+        self.sl_throttle.setValue(DEFAULT_TUNING["throttle_rate"])
+        self.deadzone_slider.setValue(DEFAULT_TUNING["deadzone"])
+        self.core.configure({"shapes": DEFAULT_SHAPES})
+        self.push_tuning()
+        self.sl_expo.setValue(int(DEFAULT_SHAPES["steer"].expo * 100))
+        self.sl_throttle_limit.setValue(int(DEFAULT_SHAPES["throttle"].high * 100))
         self.profile_box.setCurrentText("Custom")
 
     def load_profile(self, name):
-        if name == "Beginner":
-            self.sl_steer.setValue(120)
-            self.sl_throttle.setValue(120)
-            self.deadzone_slider.setValue(10)
-        elif name == "Sport":
-            self.sl_steer.setValue(250)
-            self.sl_throttle.setValue(250)
-            self.deadzone_slider.setValue(5)
-        elif name == "Race":
-            self.sl_steer.setValue(380)
-            self.sl_throttle.setValue(380)
-            self.deadzone_slider.setValue(0)
-        else:
-            pass
-
-    def change_head_source(self):
-        self.head_source = "arduino" if self.cb_head_source.currentIndex() == 0 else "joystick"
-        self.lbl_status.setText(f"Head source: {self.head_source}")
-
-    def calibrate_head(self):
-        self.yaw_offset = self.yaw
-        self.pitch_offset = self.pitch
-        self.lbl_status.setText("🎯 Head calibrated")
-
-    # ---------- LOGIC ----------
-    def update_logic(self):
-        try:
-            pygame.event.pump()
-        except Exception:
-            pass
-
-        if self.joy:
-            try:
-                raw_steer = self.joy.get_axis(0)
-                raw_thr = (self.joy.get_axis(5) + 1) / 2 if self.joy.get_numaxes() > 5 else 0
-            except Exception:
-                raw_steer = 0
-                raw_thr = 0
+        # the core takes the whole profile (curves included); the sliders then
+        # only mirror the fields they edit
+        if self.core.apply_profile(name):
+            tuning = PROFILES[name]
+            shapes = self.core.shapes
+            self.sl_steer.setValue(tuning["steer_rate"])
+            self.sl_throttle.setValue(tuning["throttle_rate"])
+            self.deadzone_slider.setValue(tuning["deadzone"])
+            self.sl_expo.setValue(int(round(shapes["steer"].expo * 100)))
+            self.sl_throttle_limit.setValue(int(round(shapes["throttle"].high * 100)))
+            self.push_tuning()
+
+    def update_tuning(self):
+        self.core.configure({
+            "steer_rate": self.sl_steer.value(),
+            "throttle_rate": self.sl_throttle.value(),
+            "deadzone": self.deadzone_slider.value(),
+            "head_deadzone": self.head_deadzone_slider.value(),
+            "shapes": {"steer": {"expo": self.sl_expo.value() / 100.0},
+                       "throttle": {"high": self.sl_throttle_limit.value() / 100.0}},
+        })
+        self.push_tuning()
+
+    def push_tuning(self):
+        if self.remote is not None:
+            self.remote.send_tuning(self.core)
+
+    def change_tx_rate(self, index):
+        if self.remote is not None:
+            self.remote.send(rate_hz=TX_RATES[index])
         else:
-            raw_steer = 0
-            raw_thr = 0
-
-        deadzone = self.deadzone_slider.value() / 100.0
-        if abs(raw_steer) < deadzone:
-            raw_steer = 0.0
-        else:
-            raw_steer = math.copysign((abs(raw_steer) - deadzone) / (1.0 - deadzone), raw_steer)
-
-        now = time.time()
-        dt = now - self.last_time if self.last_time else 0.02
-        self.last_time = now
-
-        self.last_steer = self.steer
-        self.last_throttle = self.throttle
-
-        self.steer += (raw_steer - self.steer) * (self.sl_steer.value() / 1000.0)
-        self.throttle += (raw_thr - self.throttle) * (self.sl_throttle.value() / 1000.0)
-
-        if self.head_source == "arduino":
-            if self.serial_in:
-                try:
-                    n = self.serial_in.in_waiting
-                    if n:
-                        data = self.serial_in.read(n).decode(errors='ignore')
-                        self.in_buffer += data
-                        lines = self.in_buffer.splitlines(True)
-                        complete = []
-                        rem = ""
-                        for ln in lines:
-                            if ln.endswith("\n") or ln.endswith("\r"):
-                                complete.append(ln.strip())
-                            else:
-                                rem = ln
-                        self.in_buffer = rem
-                        for ln in complete:
-                            try:
-                                parts = ln.replace(" ", "").split(",")
-                                yawv = None
-                                pitchv = None
-                                for p in parts:
-                                    if p.upper().startswith("YAW:"):
-                                        yawv = float(p.split(":")[1])
-                                    if p.upper().startswith("PITCH:"):
-                                        pitchv = float(p.split(":")[1])
-                                if yawv is not None:
-                                    self.yaw = yawv
-                                if pitchv is not None:
-                                    self.pitch = pitchv
-                            except Exception:
-                                pass
-                except Exception:
-                    try:
-                        self.serial_in.close()
-                    except:
-                        pass
-                    self.serial_in = None
-                    self.lbl_status.setText("🔴 Input disconnected")
+            self.tx.set_rate(TX_RATES[index])
+        self.lbl_status.setText(f"CRSF rate: {TX_RATES[index]} Hz")
+
+    def change_send_policy(self, *_):
+        name = POLICIES[self.cb_send_policy.currentIndex()]
+        heartbeat = self.sp_heartbeat.value() / 1000.0
+        if self.remote is not None:
+            self.remote.set_send_policy(name, heartbeat)
         else:
-            if self.joy:
-                try:
-                    rx = self.joy.get_axis(2) if self.joy.get_numaxes() > 2 else 0.0
-                    ry = self.joy.get_axis(3) if self.joy.get_numaxes() > 3 else 0.0
-
-                    head_dead = self.head_deadzone_slider.value() / 100.0
-                    if abs(rx) < head_dead:
-                        rx = 0.0
-                    else:
-                        rx = math.copysign((abs(rx) - head_dead) / (1.0 - head_dead), rx)
-                    if abs(ry) < head_dead:
-                        ry = 0.0
-                    else:
-                        ry = math.copysign((abs(ry) - head_dead) / (1.0 - head_dead), ry)
-
-                    self.yaw = -rx * 90.0
-                    self.pitch = -ry * 45.0
-                except Exception:
-                    pass
-
-        adj_yaw = self.yaw - self.yaw_offset
-        adj_pitch = self.pitch - self.pitch_offset
-        if adj_yaw > 180: adj_yaw -= 360
-        if adj_yaw < -180: adj_yaw += 360
-        adj_pitch = max(-45, min(45, adj_pitch))
+            self.tx.set_policy(make_policy(name, heartbeat, lambda: self.telemetry.current()[0]))
+            self.tx.set_paused_heartbeat(heartbeat)
+        self.lbl_status.setText(f"Send policy: {name}, heartbeat {self.sp_heartbeat.value()} ms")
 
-        l2_val = 0.0
-        try:
-            if self.joy and self.joy.get_numaxes() > self.default_L2_axis:
-                l2_raw = self.joy.get_axis(self.default_L2_axis)
-                l2_val = (l2_raw + 1.0) / 2.0
-            else:
-                l2_val = 0.0
-        except Exception:
-            l2_val = 0.0
-
-        if l2_val > 0.5:
-            self.lbl_reverse.setText("REVERSE")
+    def change_head_source(self):
+        self.core.head_source = HEAD_ARDUINO if self.cb_head_source.currentIndex() == 0 else HEAD_JOYSTICK
+        if self.remote is not None:
+            self.remote.set_head_source(self.core.head_source)
+        self.lbl_status.setText(f"Head source: {self.core.head_source}")
+
+    def change_head_protocol(self, index):
+        mode = (None, MODE_ASCII, MODE_BINARY)[index]
+        if self.remote is not None:
+            self.remote.set_tracker_protocol(mode)
         else:
-            self.lbl_reverse.setText("")
+            self.head_reader.protocol = mode
+            self.head_reader.request_protocol(self.head_reader.port, mode)
+        self.lbl_status.setText(f"Tracker protocol: {self.cb_head_proto.currentText()}")
 
-        ch = [1024] * 16
-        ch[0] = map_range(self.steer, -1, 1, 172, 1811)
-        ch[1] = map_range(self.throttle, 0, 1, 172, 1811)
-        ch[2] = map_range(adj_yaw, -180, 180, 172, 1811)
-        ch[3] = map_range(adj_pitch, -45, 45, 172, 1811)
-        ch[4] = map_range(l2_val, 0, 1, 172, 1811)
-
-        if self.serial_out and self.sending_enabled:
-            try:
-                self.serial_out.write(pack_crsf_channels(ch))
-            except Exception:
-                try:
-                    self.serial_out.close()
-                except:
-                    pass
-                self.serial_out = None
-                self.lbl_status.setText("🔴 Output disconnected")
-
-        if self.throttle < 0.3:
-            col = QColor("#00ff88")
-        elif self.throttle < 0.7:
-            col = QColor("#ffaa00")
+    def change_head_fusion(self, index):
+        if self.remote is not None:
+            self.remote.set_head_fusion(FUSION_LEVELS[index])
         else:
-            col = QColor("#ff3333")
-        self.car_item.setBrush(col)
-
-        p = QPainterPath()
-        center_x = 0
-        center_y = -self.car_height/2
-        p.moveTo(center_x, center_y)
-
-        max_angle = math.radians(45)
-        angle = self.steer * max_angle
-        length = 320
-
-        end_x = center_x + math.sin(angle) * length
-        end_y = center_y - math.cos(angle) * length
+            self.head_fusion.set_level(FUSION_LEVELS[index])
+        self.lbl_status.setText(f"Head filtering: {FUSION_LEVELS[index]}")
 
-        c1x = center_x + math.sin(angle) * (length * 0.35)
-        c1y = center_y - math.cos(angle) * (length * 0.2)
-        c2x = center_x + math.sin(angle) * (length * 0.7)
-        c2y = center_y - math.cos(angle) * (length * 0.6)
-
-        p.cubicTo(c1x, c1y, c2x, c2y, end_x, end_y)
-        hue = int(((self.steer + 1) / 2.0) * 200)
-        curve_col = QColor.fromHsv(hue % 360, 200, 255)
-        self.path_item.setPath(p)
-        self.path_item.setPen(QPen(curve_col, 6, Qt.SolidLine, Qt.RoundCap))
-
-        marker_x = self.steer * 100
-        marker_y = (self.throttle - 0.5) * 160
-        self.marker.setRect(marker_x - 18, 120 - marker_y, 36, 18)
-
-        try:
-            display_yaw = -adj_yaw
-            self.goggles_group.setRotation((display_yaw / 180.0) * 45.0)
-        except Exception:
-            pass
-
-        pitch_norm = adj_pitch / 45.0
-        bar_h = abs(pitch_norm) * 80
-        if pitch_norm >= 0:
-            self.pitch_bar.setRect(-12, 80 - bar_h, 24, bar_h)
+    def calibrate_head(self):
+        if self.remote is not None:
+            self.remote.calibrate_head()
         else:
-            self.pitch_bar.setRect(-12, 80, 24, -bar_h)
+            self.core.calibrate_head()
+        self.lbl_status.setText("🎯 Head calibrated")
 
-        try:
-            pct = (pitch_norm + 1) / 2
-            r = int(15 + pct * (15))
-            g = int(76 + pct * (120))
-            b = int(129 + pct * (126))
-            lens_color = QColor(r, g, b)
-            for it in self.goggles_group.childItems():
-                br = it.boundingRect()
-                if abs(br.width() - 56) < 12 and abs(br.height() - 56) < 12:
-                    it.setBrush(QBrush(lens_color))
-        except Exception:
-            pass
+    # ---------- LOGIC ----------
+    def update_logic(self):
+        # called whenever the joystick snapshot changes
+        joy = self.joystick.state
+        self.control.set_axes(joy.axes, joy.stamp_ns)
+
+    def poll_remote(self):
+        self.remote.poll()
+        self.remote.mirror(self.core)
+        if self.plots is not None and self.plots.isVisible():
+            core = self.core
+            self.plot_ring.append(perf_counter(), (core.steer, core.throttle, core.adj_yaw, core.adj_pitch),
+                                  core.channels)
+
+    def update_scene(self):
+        if self.remote is not None:
+            self.poll_remote()
+        t0 = perf_counter_ns() if METRICS.enabled else 0
+
+        core = self.core
+        self.renderer.render(core.steer, core.throttle, core.adj_yaw, core.adj_pitch, core.reverse)
+
+        if t0:
+            METRICS.record("scene", perf_counter_ns() - t0)
+        if self.plots is not None and self.plots.isVisible():
+            self.plots.refresh()
 
     def update_gui(self):
-        now = time.time()
-        dt = now - self.last_time if self.last_time else 0.2
-        self.last_time = now
-
-        adj_yaw = self.yaw - self.yaw_offset
-        adj_pitch = self.pitch - self.pitch_offset
+        core = self.core
+        adj_yaw = core.yaw - core.yaw_offset
+        adj_pitch = core.pitch - core.pitch_offset
         adj_pitch = max(-45, min(45, adj_pitch))
 
+        remote = self.remote.stats() if self.remote is not None else None
+        if self.remote is not None and remote is None:
+            self.lbl_telemetry.setText("Control process starting…" if self.remote.alive else "🔴 Control process stopped")
+            return
+        tx = remote["tx"] if remote else self.tx.stats()
+        ht = remote["head"] if remote else self.head_reader.stats()
+        tx_line = (f"TX: {tx['achieved_hz']:.0f}/{tx['rate_hz']} Hz {tx['policy']}  "
+                   f"jit p50 {tx['jitter_p50_ms']:.2f} p99 {tx['jitter_p99_ms']:.2f} ms\n"
+                   f"In→wire: p50 {tx['input_latency_p50_ms']:.1f} p99 {tx['input_latency_p99_ms']:.1f} ms\n"
+                   f"Out: write p99 {tx['write_p99_ms']:.2f} max {tx['write_max_ms']:.2f} ms  "
+                   f"coalesced {tx['coalesced']}  backpressure {tx['backpressure']}  "
+                   f"torn {tx['write_timeouts']}\n"
+                   f"HT: {ht['mode']} {ht['sample_hz']:.0f} Hz  stale {ht['stale']}  err {ht['errors'] + ht['overflows']}")
+        fusion = remote["fusion"] if remote else self.head_fusion.stats()
+        if fusion['level'] != FUSION_LEVELS[0]:
+            tx_line += f"\nHT: {fusion['level']}  drift {fusion['bias_dps']:+.2f}°/s{'  still' if fusion['still'] else ''}"
+        if ht['mode'] == MODE_BINARY:
+            tx_line += f"\nHT: lost {ht['lost']}  lat {ht['latency_ms']:.1f}/{ht['latency_max_ms']:.1f} ms"
+        tx_line += "\n" + format_telemetry(remote["telemetry"] if remote else self.telemetry.stats())
+        tx_line += "\n" + format_watchdog(remote["stalls"] if remote else self.watchdog.stats())
+        tx_line += "\n" + format_gc(remote["gc"] if remote else self.gc.stats())
+        if remote:
+            tx_line += "\n" + format_isolation(remote)
+            if not self.remote.alive:
+                tx_line += "\n🔴 Control process stopped"
+            if remote["metrics_text"]:
+                tx_line += "\n" + remote["metrics_text"]
+        elif METRICS.enabled:
+            tx_line += "\n" + METRICS.overlay_text()
+
         try:
             self.lbl_telemetry.setText(
-                f"S: {int(map_range(self.steer, -1,1,1000,2000))}  T: {int(map_range(self.throttle,0,1,1000,2000))}\n"
-                f"Yaw: {adj_yaw:.1f}°  Pitch: {adj_pitch:.1f}°"
+                f"S: {int(map_range(core.steer, -1,1,1000,2000))}  T: {int(map_range(core.throttle,0,1,1000,2000))}\n"
+                f"Yaw: {adj_yaw:.1f}°  Pitch: {adj_pitch:.1f}°\n"
+                f"{tx_line}"
             )
         except Exception:
-            self.lbl_telemetry.setText(f"S:{self.steer:.3f} T:{self.throttle:.3f}\nYaw:{adj_yaw:.1f} Pitch:{adj_pitch:.1f}")
+            self.lbl_telemetry.setText(f"S:{core.steer:.3f} T:{core.throttle:.3f}\nYaw:{adj_yaw:.1f} Pitch:{adj_pitch:.1f}\n{tx_line}")
 
         self.update_joystick_label()
 
     def closeEvent(self, event):
         try:
-            if self.serial_out:
-                self.serial_out.close()
+            if self.remote is not None:
+                self.remote.stop()
+            self.watchdog.stop()
+            self.tx.tap = None
+            self.tx.stop()
+            self.gc.uninstall()
+            self.io.stop()
         except:
             pass
         try:
-            if self.serial_in:
-                self.serial_in.close()
+            self.devices.stop()
+            self.metrics_exporter.stop()
+            self.toggle_recorder(False)
         except:
             pass
         try:
-            if hasattr(self, 'joy_reinit_timer'):
-                self.joy_reinit_timer.stop()
+            if hasattr(self, 'joy_timer'):
+                self.joy_timer.stop()
         except:
             pass
         event.accept()
@@ -670,6 +820,18 @@ class RCApp(QMainWindow):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setFont(QFont("Segoe UI", 16))
-    win = RCApp()
+    args = sys.argv[1:]
+    mix = None
+    if "--mix" in args:
+        # the same spec as "tuning": {"mix": ...} in the headless config;
+        # checked before the window is built
+        i = args.index("--mix") + 1
+        if i >= len(args):
+            sys.exit("--mix needs a JSON file")
+        try:
+            mix = load_mix(args[i])
+        except (OSError, ValueError) as e:
+            sys.exit(f"--mix {args[i]}: {e}")
+    win = RCApp(isolated="--isolated" in args, gc_tune="--gc-tune" in args, record="--record" in args, mix=mix)
     win.show()
     sys.exit(app.exec_())
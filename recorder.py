@@ -0,0 +1,147 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# ===================== FLIGHT RECORDER =====================
+MAGIC = b"RCFR"
+VERSION = 1
+
+# magic, version, record size, capacity, records written, wall-clock start
+_HEADER = struct.Struct("<4sHHIQd")
+HEADER_SIZE = 64
+
+# t, 6 raw axes, steer, throttle, yaw, pitch, 16 channels, write status
+_RECORD = struct.Struct("<d6f4f16HB7x")
+RECORD_SIZE = _RECORD.size
+
+STATUS_OK = 0
+STATUS_NO_PORT = 1
+STATUS_PAUSED = 2
+STATUS_WRITE_ERROR = 3
+STATUS_HELD = 4
+STATUS_FAILSAFE = 5
+
+Record = namedtuple("Record", "t axes steer throttle yaw pitch channels status")
+
+_ZERO_AXES = (0.0,) * 6
+
+
+class FlightRecorder:
+    def __init__(self, path, seconds=600, rate_hz=500, flush_interval=1.0):
+        self.path = path
+        self.capacity = int(seconds * rate_hz)
+        self.flush_interval = flush_interval
+
+        self.count = 0
+        self.t0 = time.perf_counter()
+        self.mm = None
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def open(self):
+        # the previous session is kept next to the new one, so disk use is
+        # bounded to two ring files
+        if os.path.exists(self.path):
+            root, ext = os.path.splitext(self.path)
+            os.replace(self.path, root + ".prev" + ext)
+
+        size = HEADER_SIZE + self.capacity * RECORD_SIZE
+        self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        self.mm = mmap.mmap(self._file.fileno(), size)
+        self.count = 0
+        self.t0 = time.perf_counter()
+        _HEADER.pack_into(self.mm, 0, MAGIC, VERSION, RECORD_SIZE, self.capacity, 0, time.time())
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="flight-recorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        mm, self.mm = self.mm, None
+        if mm is not None:
+            mm.flush()
+            mm.close()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def record(self, now, ctx, channels, status):
+        mm = self.mm
+        if mm is None:
+            return
+        if ctx is None:
+            axes, steer, throttle, yaw, pitch = _ZERO_AXES, 0.0, 0.0, 0.0, 0.0
+        else:
+            axes, steer, throttle, yaw, pitch = ctx
+            if len(axes) != 6:
+                axes = (tuple(axes) + _ZERO_AXES)[:6]
+        n = self.count
+        _RECORD.pack_into(mm, HEADER_SIZE + (n % self.capacity) * RECORD_SIZE,
+                          now - self.t0, *axes, steer, throttle, yaw, pitch, *channels, status)
+        self.count = n + 1
+        # the count is written last; the slot being overwritten is the one at
+        # index count, which the reader skips once the ring has wrapped
+        struct.pack_into("<Q", mm, 12, n + 1)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            mm = self.mm
+            if mm is None:
+                break
+            try:
+                mm.flush()
+            except (ValueError, OSError):
+                break
+
+
+def read_records(path, last_seconds=None):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, rec_size, capacity, count, wall_t0 = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or rec_size != RECORD_SIZE:
+        raise ValueError(f"{path}: not a flight recorder file")
+
+    # once wrapped, slot count % capacity is the next one record() writes
+    # into, so a crash mid-write can leave it torn; it is never read
+    first = max(0, count - capacity + 1)
+    records = []
+    for n in range(first, count):
+        v = _RECORD.unpack_from(data, HEADER_SIZE + (n % capacity) * RECORD_SIZE)
+        records.append(Record(v[0], v[1:7], v[7], v[8], v[9], v[10], v[11:27], v[27]))
+    if last_seconds is not None and records:
+        cutoff = records[-1].t - last_seconds
+        records = [r for r in records if r.t >= cutoff]
+    return wall_t0, records
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Dump a flight recorder file as CSV")
+    p.add_argument("path")
+    p.add_argument("--last", type=float, help="only the last N seconds")
+    args = p.parse_args(argv)
+
+    wall_t0, records = read_records(args.path, args.last)
+    out = sys.stdout
+    out.write("wall_time,t,ax0,ax1,ax2,ax3,ax4,ax5,steer,throttle,yaw,pitch,"
+              + ",".join(f"ch{i}" for i in range(16)) + ",status\n")
+    for r in records:
+        out.write(f"{wall_t0 + r.t:.6f},{r.t:.6f}," + ",".join(f"{a:.4f}" for a in r.axes)
+                  + f",{r.steer:.4f},{r.throttle:.4f},{r.yaw:.2f},{r.pitch:.2f},"
+                  + ",".join(str(c) for c in r.channels) + f",{r.status}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import math
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor, QPainterPath, QPen
+
+# ===================== SCENE RENDERER =====================
+STEER_STEPS = 200
+THROTTLE_STEPS = 100
+PITCH_STEPS = 100
+ROTATION_STEPS = 4
+
+
+class SceneRenderer:
+    def __init__(self, car_item, path_item, marker, car_height, goggles_group, lenses, pitch_bar, lbl_reverse):
+        self.car_item = car_item
+        self.path_item = path_item
+        self.marker = marker
+        self.car_height = car_height
+        self.goggles_group = goggles_group
+        self.lenses = lenses
+        self.pitch_bar = pitch_bar
+        self.lbl_reverse = lbl_reverse
+
+        self.car_brushes = (QBrush(QColor("#00ff88")), QBrush(QColor("#ffaa00")), QBrush(QColor("#ff3333")))
+        self._curves = {}
+        self._lens_brushes = {}
+
+        self._car_band = None
+        self._steer_q = None
+        self._marker_q = None
+        self._rotation_q = None
+        self._pitch_q = None
+        self._reverse = None
+
+        self.frames = 0
+        self.updates = 0
+
+    def render(self, steer, throttle, adj_yaw, adj_pitch, reverse):
+        self.frames += 1
+
+        band = 0 if throttle < 0.3 else 1 if throttle < 0.7 else 2
+        if band != self._car_band:
+            self._car_band = band
+            self.car_item.setBrush(self.car_brushes[band])
+            self.updates += 1
+
+        steer_q = round(steer * STEER_STEPS)
+        if steer_q != self._steer_q:
+            self._steer_q = steer_q
+            path, pen = self._curve(steer_q)
+            self.path_item.setPath(path)
+            self.path_item.setPen(pen)
+            self.updates += 1
+
+        marker_q = (steer_q, round(throttle * THROTTLE_STEPS))
+        if marker_q != self._marker_q:
+            self._marker_q = marker_q
+            marker_x = marker_q[0] / STEER_STEPS * 100
+            marker_y = (marker_q[1] / THROTTLE_STEPS - 0.5) * 160
+            self.marker.setRect(marker_x - 18, 120 - marker_y, 36, 18)
+            self.updates += 1
+
+        rotation_q = round((-adj_yaw / 180.0) * 45.0 * ROTATION_STEPS)
+        if rotation_q != self._rotation_q:
+            self._rotation_q = rotation_q
+            self.goggles_group.setRotation(rotation_q / ROTATION_STEPS)
+            self.updates += 1
+
+        pitch_q = round(adj_pitch / 45.0 * PITCH_STEPS)
+        if pitch_q != self._pitch_q:
+            self._pitch_q = pitch_q
+            pitch_norm = pitch_q / PITCH_STEPS
+            bar_h = abs(pitch_norm) * 80
+            if pitch_norm >= 0:
+                self.pitch_bar.setRect(-12, 80 - bar_h, 24, bar_h)
+            else:
+                self.pitch_bar.setRect(-12, 80, 24, -bar_h)
+            brush = self._lens_brush(pitch_q)
+            for lens in self.lenses:
+                lens.setBrush(brush)
+            self.updates += 1
+
+        if reverse != self._reverse:
+            self._reverse = reverse
+            self.lbl_reverse.setText("REVERSE" if reverse else "")
+            self.updates += 1
+
+    # ---------- CACHES ----------
+    def _curve(self, steer_q):
+        cached = self._curves.get(steer_q)
+        if cached is not None:
+            return cached
+
+        steer = steer_q / STEER_STEPS
+        p = QPainterPath()
+        center_x = 0
+        center_y = -self.car_height/2
+        p.moveTo(center_x, center_y)
+
+        max_angle = math.radians(45)
+        angle = steer * max_angle
+        length = 320
+
+        end_x = center_x + math.sin(angle) * length
+        end_y = center_y - math.cos(angle) * length
+
+        c1x = center_x + math.sin(angle) * (length * 0.35)
+        c1y = center_y - math.cos(angle) * (length * 0.2)
+        c2x = center_x + math.sin(angle) * (length * 0.7)
+        c2y = center_y - math.cos(angle) * (length * 0.6)
+
+        p.cubicTo(c1x, c1y, c2x, c2y, end_x, end_y)
+        hue = int(((steer + 1) / 2.0) * 200)
+        pen = QPen(QColor.fromHsv(hue % 360, 200, 255), 6, Qt.SolidLine, Qt.RoundCap)
+
+        cached = self._curves[steer_q] = (p, pen)
+        return cached
+
+    def _lens_brush(self, pitch_q):
+        brush = self._lens_brushes.get(pitch_q)
+        if brush is None:
+            pct = (pitch_q / PITCH_STEPS + 1) / 2
+            r = int(15 + pct * (15))
+            g = int(76 + pct * (120))
+            b = int(129 + pct * (126))
+            brush = self._lens_brushes[pitch_q] = QBrush(QColor(r, g, b))
+        return brush
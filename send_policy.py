@@ -0,0 +1,98 @@
+# ===================== SEND POLICY =====================
+# decides, per TX slot, whether the current channels go out; the engine keeps
+# its slot clock at the configured rate, so a skipped slot costs one call
+
+POLICY_FIXED = "fixed"
+POLICY_CHANGE = "change"
+POLICY_ADAPTIVE = "adaptive"
+POLICIES = (POLICY_FIXED, POLICY_CHANGE, POLICY_ADAPTIVE)
+
+# upravljanje_autic.ino drops to failsafe after 500 ms without a frame
+RECEIVER_FAILSAFE_S = 0.5
+MAX_HEARTBEAT_S = 0.4
+DEFAULT_HEARTBEAT_S = 0.25
+
+# ExpressLRS 3.x packet rate enum as reported in LINK_STATISTICS rf_mode
+ELRS_RF_MODE_HZ = (4, 25, 50, 100, 100, 150, 200, 250, 333, 500, 250, 500, 500, 1000)
+
+
+def clamp_heartbeat(seconds):
+    return max(0.02, min(MAX_HEARTBEAT_S, seconds))
+
+
+class FixedRate:
+    name = POLICY_FIXED
+
+    def should_send(self, channels, now):
+        return True
+
+
+class ChangeDriven:
+    name = POLICY_CHANGE
+
+    def __init__(self, threshold=2, heartbeat_s=DEFAULT_HEARTBEAT_S):
+        # threshold in CRSF counts; smoothing tails settle in steps of one or two
+        self.threshold = threshold
+        self.heartbeat_s = clamp_heartbeat(heartbeat_s)
+        self._last = None
+        self._last_t = 0.0
+
+    def should_send(self, channels, now):
+        last = self._last
+        if last is not None and now - self._last_t < self.heartbeat_s:
+            if channels is last or channels == last:
+                return False
+            threshold = self.threshold
+            for a, b in zip(channels, last):
+                if a - b >= threshold or b - a >= threshold:
+                    break
+            else:
+                return False
+        self._last = channels
+        self._last_t = now
+        return True
+
+
+class LinkAdaptive:
+    name = POLICY_ADAPTIVE
+
+    def __init__(self, link_source, fallback_hz=None, heartbeat_s=DEFAULT_HEARTBEAT_S):
+        # link_source returns the latest LinkStatistics or None when stale;
+        # without telemetry every slot is used
+        self.link_source = link_source
+        self.fallback_hz = fallback_hz
+        self.heartbeat_s = clamp_heartbeat(heartbeat_s)
+        self.target_hz = fallback_hz
+        self._next_t = None
+
+    def _target(self):
+        try:
+            link = self.link_source()
+        except Exception:
+            link = None
+        if link is None or not 0 <= link.rf_mode < len(ELRS_RF_MODE_HZ):
+            return self.fallback_hz
+        # frames beyond the module's packet rate are overwritten before they
+        # are ever transmitted
+        return ELRS_RF_MODE_HZ[link.rf_mode]
+
+    def should_send(self, channels, now):
+        hz = self.target_hz = self._target()
+        if hz:
+            interval = min(1.0 / hz, self.heartbeat_s)
+            next_t = self._next_t
+            if next_t is not None and now < next_t:
+                return False
+            # deadlines advance by the interval, so a 150 Hz target on a 500 Hz
+            # slot clock averages 150 Hz instead of rounding to every third slot
+            next_t = now + interval if next_t is None or now - next_t > interval else next_t + interval
+            self._next_t = next_t
+        return True
+
+
+def make_policy(name, heartbeat_s=DEFAULT_HEARTBEAT_S, link_source=None, fallback_hz=None):
+    if name == POLICY_CHANGE:
+        return ChangeDriven(heartbeat_s=heartbeat_s)
+    if name == POLICY_ADAPTIVE:
+        return LinkAdaptive(link_source or (lambda: None), fallback_hz, heartbeat_s)
+    return FixedRate()
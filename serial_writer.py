@@ -0,0 +1,170 @@
+import threading
+import time
+
+from metrics import METRICS, NANOSECONDS, percentiles_ms
+
+# ===================== SERIAL WRITER =====================
+# the TX slot hands its frame to a writer thread through a one-frame mailbox
+# and returns; only that thread ever blocks in port.write(). A frame still in
+# the mailbox when the next one arrives is replaced (coalesced), and while
+# the driver's output buffer holds more than `backlog` bytes the writer waits
+# instead of stacking frames behind it (backpressure), so what reaches the
+# radio is always the newest frame with at most one older one ahead of it
+BACKLOG_BYTES = 26  # one CRSF RC frame
+WRITE_TIMEOUT_S = 0.05
+
+
+def _timeout_error():
+    # pyserial is only needed once a real port is open; fake ports in the
+    # simulation and benchmarks never time out
+    try:
+        from serial import SerialTimeoutException
+    except ImportError:
+        return ()
+    return SerialTimeoutException
+
+
+class SerialWriter:
+    def __init__(self, port, backlog=BACKLOG_BYTES, poll_s=0.0005, write_timeout=WRITE_TIMEOUT_S, window=1000):
+        self.port = port
+        self.backlog = backlog
+        self.poll_s = poll_s
+        # called with the port on the writer thread when a write fails
+        self.on_error = None
+
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.backpressure = 0
+        # a timed-out write may have put part of a frame on the wire, so the
+        # frame after it starts mid-stream for the receiver's parser: it can
+        # be dropped while the receiver re-syncs and is counted separately
+        self.timeouts = 0
+        self.resyncs = 0
+        self._torn = False
+        self.failed = False
+
+        # without a bound a full USB buffer would hold this thread forever
+        try:
+            port.write_timeout = write_timeout
+        except Exception:
+            pass
+
+        # the mailbox is never cleared: the writer remembers the last item it
+        # took, so a frame stored while it is busy can never be lost
+        self._slot = None
+        self._taken = None
+        self._event = threading.Event()
+        self._running = False
+        self._thread = None
+
+        self._write = [0] * window
+        self._write_idx = 0
+        self._write_count = 0
+
+    # ---------- API (TX thread) ----------
+    def start(self):
+        if self._thread:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="serial-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # a write stuck in the driver is left to finish on its own
+        self._running = False
+        self._event.set()
+        if self._thread:
+            self._thread.join(timeout=0.2)
+            self._thread = None
+
+    def submit(self, frame):
+        # the frame is copied, encoders reuse their buffer for the next one
+        if self._slot is not self._taken:
+            self.coalesced += 1
+        self._slot = (bytes(frame), time.perf_counter_ns())
+        self.submitted += 1
+        self._event.set()
+
+    # ---------- WRITER THREAD ----------
+    def _run(self):
+        port = self.port
+        event = self._event
+        timeout_error = _timeout_error()
+        while self._running:
+            event.wait()
+            event.clear()
+            item = self._slot
+            if item is self._taken:
+                continue
+
+            # the driver still has more than one frame to send: wait for it
+            # to drain; frames submitted meanwhile replace the one in the slot
+            try:
+                waiting = port.out_waiting
+            except Exception:
+                waiting = 0
+            if waiting > self.backlog:
+                self.backpressure += 1
+                while self._running and waiting > self.backlog:
+                    time.sleep(self.poll_s)
+                    try:
+                        waiting = port.out_waiting
+                    except Exception:
+                        waiting = 0
+                if not self._running:
+                    return
+
+            item = self._taken = self._slot
+            frame, queued_ns = item
+            t0 = time.perf_counter_ns()
+            try:
+                port.write(frame)
+            except timeout_error:
+                self.timeouts += 1
+                self._torn = True
+                # drop whatever of the torn frame is still queued, so its tail
+                # does not trickle out ahead of the next frame
+                try:
+                    port.reset_output_buffer()
+                except Exception:
+                    pass
+                continue
+            except Exception:
+                self.failed = True
+                self._running = False
+                cb = self.on_error
+                if cb:
+                    cb(port)
+                return
+            t1 = time.perf_counter_ns()
+            self.written += 1
+            if self._torn:
+                self._torn = False
+                self.resyncs += 1
+            self._record(t1 - t0)
+            if METRICS.enabled:
+                METRICS.record("write", t1 - t0)
+                METRICS.record("out_queue", t0 - queued_ns)
+
+    # ---------- STATS ----------
+    def _record(self, ns):
+        self._write[self._write_idx] = ns
+        self._write_idx = (self._write_idx + 1) % len(self._write)
+        if self._write_count < len(self._write):
+            self._write_count += 1
+
+    def stats(self):
+        p50, p99, worst = percentiles_ms(self._write, self._write_count, NANOSECONDS)
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "backpressure": self.backpressure,
+            "timeouts": self.timeouts,
+            "resyncs": self.resyncs,
+            "write_p50_ms": p50,
+            "write_p99_ms": p99,
+            "write_max_ms": worst,
+        }
@@ -0,0 +1,127 @@
+import math
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ===================== INPUT SHAPING =====================
+# deadzone and output limits as fractions of full travel; expo blends the
+# linear response with a cubic one (0 = linear, 1 = pure cubic); rate scales
+# the throw; reverse mirrors the input
+ChannelShape = namedtuple("ChannelShape", "deadzone expo rate low high reverse")
+ChannelShape.__new__.__defaults__ = (0.0, 0.0, 1.0, -1.0, 1.0, False)
+
+BIPOLAR = "bipolar"
+UNIPOLAR = "unipolar"
+
+CHANNELS = {"steer": BIPOLAR, "throttle": UNIPOLAR, "rx": BIPOLAR, "ry": BIPOLAR}
+
+DEFAULT_SHAPES = {
+    "steer": ChannelShape(deadzone=0.05),
+    "throttle": ChannelShape(low=0.0),
+    "rx": ChannelShape(deadzone=0.05),
+    "ry": ChannelShape(deadzone=0.05),
+}
+
+# odd, so zero input lands exactly on a table entry
+TABLE_SIZE = 4097
+
+
+def shape_value(x, shape, kind=BIPOLAR):
+    if kind == BIPOLAR:
+        x = max(-1.0, min(1.0, x))
+        if shape.reverse:
+            x = -x
+    else:
+        x = max(0.0, min(1.0, x))
+        if shape.reverse:
+            x = 1.0 - x
+
+    dz = min(shape.deadzone, 0.99)
+    a = abs(x)
+    if a < dz:
+        return max(shape.low, min(shape.high, 0.0))
+    y = math.copysign((a - dz) / (1.0 - dz), x)
+
+    e = shape.expo
+    y = (1.0 - e) * y + e * y * y * y
+    y *= shape.rate
+    return max(shape.low, min(shape.high, y))
+
+
+def _table_np(shape, kind, x0, x1):
+    x = np.linspace(x0, x1, TABLE_SIZE)
+    if shape.reverse:
+        x = -x if kind == BIPOLAR else 1.0 - x
+    dz = min(shape.deadzone, 0.99)
+    a = np.abs(x)
+    y = np.where(a < dz, 0.0, np.sign(x) * (a - dz) / (1.0 - dz))
+    e = shape.expo
+    y = ((1.0 - e) * y + e * y ** 3) * shape.rate
+    return np.clip(y, shape.low, shape.high).tolist()
+
+
+class Curve:
+    __slots__ = ("shape", "kind", "x0", "scale", "last", "table")
+
+    def __init__(self, shape, kind=BIPOLAR):
+        self.shape = shape
+        self.kind = kind
+        x0, x1 = (-1.0, 1.0) if kind == BIPOLAR else (0.0, 1.0)
+        self.x0 = x0
+        self.scale = (TABLE_SIZE - 1) / (x1 - x0)
+        self.last = TABLE_SIZE - 1
+        if np is not None:
+            self.table = _table_np(shape, kind, x0, x1)
+        else:
+            step = (x1 - x0) / (TABLE_SIZE - 1)
+            self.table = [shape_value(x0 + i * step, shape, kind) for i in range(TABLE_SIZE)]
+
+    def __call__(self, x):
+        i = int((x - self.x0) * self.scale + 0.5)
+        if i < 0:
+            i = 0
+        elif i > self.last:
+            i = self.last
+        return self.table[i]
+
+    def apply_many(self, values):
+        # whole arrays at once (replay, benchmarks); same table, same result
+        if np is not None:
+            idx = np.clip(((np.asarray(values) - self.x0) * self.scale + 0.5).astype(np.int64), 0, self.last)
+            return np.asarray(self.table)[idx]
+        return [self(v) for v in values]
+
+
+# a slider drag compiles a new table per value, so only the most recently
+# used ones are kept: enough for every profile's channels plus the live edit
+CURVE_CACHE_SIZE = 32
+_CURVES = OrderedDict()
+
+
+def compile_curve(shape, kind=BIPOLAR):
+    # profiles switch back and forth, so compiled tables are kept per setting
+    key = (shape, kind)
+    curve = _CURVES.get(key)
+    if curve is None:
+        curve = _CURVES[key] = Curve(shape, kind)
+        if len(_CURVES) > CURVE_CACHE_SIZE:
+            _CURVES.popitem(last=False)
+    else:
+        _CURVES.move_to_end(key)
+    return curve
+
+
+def merge_shapes(shapes, changes):
+    # changes: {"steer": {"expo": 0.3}, ...}; unknown channels are ignored
+    out = dict(shapes)
+    for name, fields in changes.items():
+        if name in out:
+            out[name] = out[name]._replace(**fields) if isinstance(fields, dict) else ChannelShape(*fields)
+    return out
+
+
+def compile_shapes(shapes):
+    return {name: compile_curve(shapes[name], kind) for name, kind in CHANNELS.items()}
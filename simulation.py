@@ -0,0 +1,459 @@
+import argparse
+import bisect
+import fcntl
+import json
+import math
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import time
+import tty
+from collections import deque, namedtuple
+
+from control_core import ControlCore, ControlLoop, PROFILES
+from crsf import CRSF_ADDRESS, CRSF_CHANNELS_FRAME_LEN, CRSF_FRAMETYPE_RC_CHANNELS, CrsfEncoder, crc8
+from headtracker import BIN_SYNC, HeadTrackParser, MODE_ASCII, MODE_BINARY
+from send_policy import POLICIES, POLICY_FIXED, make_policy
+
+# ===================== VIRTUAL SERIAL =====================
+class PtyPort:
+    def __init__(self, fd, name=""):
+        self.fd = fd
+        self.name = name
+        self.timeout = 0
+        self.written = 0
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+    @property
+    def in_waiting(self):
+        buf = fcntl.ioctl(self.fd, termios.FIONREAD, b"\0\0\0\0")
+        return struct.unpack("i", buf)[0]
+
+    def read(self, n=1):
+        try:
+            return os.read(self.fd, n)
+        except (BlockingIOError, InterruptedError):
+            return b""
+
+    def read_exact(self, n, timeout=1.0):
+        # pty delivery is asynchronous; waiting for everything the peer wrote
+        # keeps a run independent of scheduler timing
+        out = bytearray()
+        while len(out) < n:
+            if not select.select([self.fd], [], [], timeout)[0]:
+                break
+            out += self.read(n - len(out))
+        return bytes(out)
+
+    def write(self, data):
+        n = os.write(self.fd, data)
+        self.written += n
+        return n
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class VirtualSerial:
+    # host side gets the slave (what the app would open by path), the
+    # simulated device drives the master
+    def __init__(self):
+        master, slave = pty.openpty()
+        tty.setraw(slave)
+        tty.setraw(master)
+        self.device = os.ttyname(slave)
+        self.host = PtyPort(slave, self.device)
+        self.device_end = PtyPort(master, self.device + " (device)")
+
+    def close(self):
+        self.host.close()
+        self.device_end.close()
+
+
+# ===================== TRACKER EMULATOR =====================
+class TrackerEmulator:
+    def __init__(self, port, mode=MODE_ASCII, rate_hz=None):
+        self.port = port
+        self.mode = mode
+        self.rate_hz = rate_hz or (400 if mode == MODE_BINARY else 100)
+        self.seq = 0
+        self.next_t = 0.0
+        self.sent = 0
+
+    def update(self, t, yaw, pitch):
+        if t < self.next_t:
+            return
+        self.next_t += 1.0 / self.rate_hz
+        if self.mode == MODE_BINARY:
+            body = struct.pack("<BhhI", self.seq & 0xFF, int(round(yaw * 100)), int(round(pitch * 100)),
+                               int(t * 1e6) & 0xFFFFFFFF)
+            self.port.write(bytes([BIN_SYNC]) + body + bytes([crc8(body)]))
+        else:
+            self.port.write(f"YAW:{yaw:.1f},PITCH:{pitch:.1f}\r\n".encode())
+        self.seq += 1
+        self.sent += 1
+
+
+# ===================== RECEIVER MODEL =====================
+# Python model of upravljanje_autic.ino: byte-wise CRSF framing, channel
+# decode, 500 ms failsafe and the 20 ms output smoothing
+class ReceiverModel:
+    ESC_MIN = 1000
+    ESC_MAX = 1600
+    SERVO_MIN = 1000
+    SERVO_MAX = 2000
+    WRITE_INTERVAL_MS = 20
+    FAILSAFE_MS = 500
+
+    def __init__(self):
+        self.buffer = bytearray(64)
+        self.buf_pos = 0
+        self.channels = [0] * 16
+
+        self.last_packet = 0
+        self.last_write = 0
+        self.target = {"steer": 1500, "throttle": self.ESC_MIN, "yaw": 1500, "pitch": 1500}
+        self.out = {"steer": 1500.0, "throttle": float(self.ESC_MIN), "yaw": 1500.0, "pitch": 1500.0}
+
+        self.frames = 0
+        self.crc_errors = 0
+        self.failsafe = False
+        self.failsafe_events = 0
+        self.on_frame = None
+
+    @staticmethod
+    def map_pwm(v, out_min, out_max):
+        v = min(1811, max(172, v))
+        m = out_min + (v - 172) * (out_max - out_min) // (1811 - 172)
+        return min(out_max, max(out_min, m))
+
+    def feed(self, data, now_ms):
+        buf = self.buffer
+        for b in data:
+            buf[self.buf_pos] = b
+            self.buf_pos += 1
+            if self.buf_pos >= len(buf):
+                self.buf_pos = 0
+
+            if self.buf_pos >= 3 and buf[0] == CRSF_ADDRESS:
+                total = 2 + buf[1]
+                if self.buf_pos >= total:
+                    if buf[2] == CRSF_FRAMETYPE_RC_CHANNELS:
+                        # the sketch does not check the CRC; the model only counts
+                        if crc8(buf[2:total - 1]) != buf[total - 1]:
+                            self.crc_errors += 1
+                        self._decode(buf, now_ms)
+                    buf[0:self.buf_pos - total] = buf[total:self.buf_pos]
+                    self.buf_pos -= total
+            elif self.buf_pos >= 3 and buf[0] != CRSF_ADDRESS:
+                buf[0:self.buf_pos - 1] = buf[1:self.buf_pos]
+                self.buf_pos -= 1
+
+    def _decode(self, buf, now_ms):
+        bitbuf = 0
+        bits = 0
+        idx = 0
+        for i in range(22):
+            bitbuf |= buf[3 + i] << bits
+            bits += 8
+            while bits >= 11 and idx < 16:
+                self.channels[idx] = bitbuf & 0x7FF
+                bitbuf >>= 11
+                bits -= 11
+                idx += 1
+        self.frames += 1
+        self.last_packet = now_ms
+        ch = self.channels
+        self.target = {
+            "steer": self.map_pwm(ch[0], self.SERVO_MIN, self.SERVO_MAX),
+            "throttle": self.map_pwm(ch[1], self.ESC_MIN, self.ESC_MAX),
+            "yaw": self.map_pwm(ch[2], self.SERVO_MIN, self.SERVO_MAX),
+            "pitch": self.map_pwm(ch[3], self.SERVO_MIN, self.SERVO_MAX),
+        }
+        cb = self.on_frame
+        if cb:
+            cb(now_ms, self.target)
+
+    def update(self, now_ms):
+        if now_ms - self.last_packet > self.FAILSAFE_MS:
+            if not self.failsafe:
+                self.failsafe = True
+                self.failsafe_events += 1
+            self.target = {"steer": 1500, "throttle": self.ESC_MIN, "yaw": 1500, "pitch": 1500}
+        else:
+            self.failsafe = False
+
+        if now_ms - self.last_write >= self.WRITE_INTERVAL_MS:
+            self.last_write = now_ms
+            t, o = self.target, self.out
+            o["steer"] += (t["steer"] - o["steer"]) * 0.35
+            o["yaw"] += (t["yaw"] - o["yaw"]) * 0.28
+            o["pitch"] += (t["pitch"] - o["pitch"]) * 0.28
+            if t["throttle"] < o["throttle"]:
+                o["throttle"] += (t["throttle"] - o["throttle"]) * 0.65
+            else:
+                o["throttle"] += (t["throttle"] - o["throttle"]) * 0.18
+            if o["throttle"] < self.ESC_MIN + 4:
+                o["throttle"] = float(self.ESC_MIN)
+
+
+# ===================== SCENARIOS =====================
+Scenario = namedtuple("Scenario", "name duration joystick head tx_gaps events")
+
+
+def _axes(steer=0.0, throttle=0.0, l2=0.0, rx=0.0, ry=0.0):
+    # PS5 layout as read by read_axes: 0 steer, 2/3 right stick, 4 L2, 5 R2
+    return (steer, 0.0, rx, ry, l2 * 2 - 1, throttle * 2 - 1)
+
+
+def _step_scenario(gaps=()):
+    def joystick(t):
+        steer = 1.0 if 1.0 <= t < 3.0 else 0.0
+        throttle = 0.5 if 2.0 <= t < 3.5 else 0.0
+        return _axes(steer, throttle)
+
+    def head(t):
+        return (30.0 if t >= 1.5 else 0.0), 0.0
+
+    return joystick, head, list(gaps), [1.0, 3.0]
+
+
+def _sweep_scenario():
+    def joystick(t):
+        return _axes(math.sin(2 * math.pi * 0.5 * t), 0.3 + 0.3 * math.sin(2 * math.pi * 0.2 * t))
+
+    def head(t):
+        return 60.0 * math.sin(2 * math.pi * 0.3 * t), 20.0 * math.sin(2 * math.pi * 0.7 * t)
+
+    return joystick, head, [], []
+
+
+def builtin_scenario(name, duration=5.0):
+    if name == "step":
+        joystick, head, gaps, events = _step_scenario()
+    elif name == "dropout":
+        joystick, head, gaps, events = _step_scenario([(1.5, 2.3)])
+    elif name == "sweep":
+        joystick, head, gaps, events = _sweep_scenario()
+    else:
+        raise ValueError(f"unknown scenario: {name}")
+    return Scenario(name, duration, joystick, head, gaps, events)
+
+
+def recorded_scenario(path):
+    from recorder import read_records
+    _, records = read_records(path)
+    if not records:
+        raise ValueError(f"{path}: no records")
+    t0 = records[0].t
+    times = [r.t - t0 for r in records]
+
+    def at(t):
+        return records[max(0, bisect.bisect_right(times, t) - 1)]
+
+    return Scenario(os.path.basename(path), times[-1], lambda t: at(t).axes,
+                    lambda t: (at(t).yaw, at(t).pitch), [], [])
+
+
+def scripted_scenario(path):
+    # {"duration": 5, "keyframes": [{"t": 0, "steer": 0, "throttle": 0, "yaw": 0, "pitch": 0}, ...],
+    #  "tx_gaps": [[1.5, 2.3]]}
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    keys = sorted(spec["keyframes"], key=lambda k: k["t"])
+    times = [k["t"] for k in keys]
+
+    def at(t):
+        return keys[max(0, bisect.bisect_right(times, t) - 1)]
+
+    def joystick(t):
+        k = at(t)
+        return _axes(k.get("steer", 0.0), k.get("throttle", 0.0), k.get("l2", 0.0))
+
+    def head(t):
+        k = at(t)
+        return k.get("yaw", 0.0), k.get("pitch", 0.0)
+
+    events = [b["t"] for a, b in zip(keys, keys[1:]) if a.get("steer", 0.0) != b.get("steer", 0.0)]
+    return Scenario(os.path.basename(path), spec.get("duration", times[-1] + 1.0), joystick, head,
+                    [tuple(g) for g in spec.get("tx_gaps", [])], events)
+
+
+# ===================== RUNNER =====================
+SimResult = namedtuple("SimResult", "scenario frames_sent frames_decoded crc_errors failsafe_events "
+                                    "tracker_sent head_samples latencies trace wall_s")
+
+
+def _step_latencies(events, out, settle=0.9):
+    # each step settles towards the value the servo holds just before the
+    # next step (or the end of the run)
+    result = []
+    for n, (start_ms, first_ms) in enumerate(events):
+        if first_ms is None:
+            continue
+        end_ms = events[n + 1][0] if n + 1 < len(events) else len(out)
+        start, final = out[start_ms], out[end_ms - 1]
+        span = final - start
+        if not span:
+            continue
+        for ms in range(start_ms, end_ms):
+            if (out[ms] - start) / span >= settle:
+                result.append((first_ms - start_ms, ms - start_ms))
+                break
+    return result
+
+
+def run_simulation(scenario, tx_hz=150, tracker=MODE_ASCII, profile="Sport",
+                   baud=115200, policy=POLICY_FIXED, realtime=False, trace_every_ms=10):
+    out_link = VirtualSerial()
+    in_link = VirtualSerial()
+    try:
+        core = ControlCore()
+        core.apply_profile(profile)
+        head = None
+        # the core steps once per TX slot, as it does under CrsfTxEngine
+        control = ControlLoop(core, lambda now: head)
+        encoder = CrsfEncoder()
+        parser = HeadTrackParser()
+        emulator_port = in_link.device_end
+        emulator = TrackerEmulator(emulator_port, tracker)
+        head_read = 0
+        wire_read = 0
+        # bytes on the wire arrive after their transmission time at the given baud
+        in_flight = deque()
+        byte_ms = 10000.0 / baud
+        wire_free = 0.0
+        receiver = ReceiverModel()
+        gate = make_policy(policy)
+
+        # end-to-end latency: scripted steer change -> first decoded frame
+        # with a new target; the servo settling time is taken from the
+        # per-millisecond output afterwards
+        pending = list(scenario.events)
+        events = []
+        steer_out = []
+        state = {"start": None, "first": None}
+
+        def on_frame(now_ms, target):
+            if state["first"] is None and state["start"] is not None and target["steer"] != state["start"]:
+                state["first"] = now_ms
+                events[-1][1] = now_ms
+
+        receiver.on_frame = on_frame
+
+        trace = []
+        tx_ms = 1000.0 / tx_hz
+        next_tx = 0.0
+        wall0 = time.perf_counter()
+
+        frames_sent = 0
+        total_ms = int(scenario.duration * 1000)
+        for now_ms in range(total_ms + 1):
+            t = now_ms / 1000.0
+            if realtime:
+                delay = wall0 + t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            yaw, pitch = scenario.head(t)
+            emulator.update(t, yaw, pitch)
+            data = in_link.host.read_exact(emulator_port.written - head_read)
+            if data:
+                head_read += len(data)
+                sample = parser.feed(data, t)
+                if sample is not None:
+                    head = sample
+
+            if pending and t >= pending[0]:
+                pending.pop(0)
+                state.update(start=receiver.target["steer"], first=None)
+                events.append([now_ms, None])
+
+            axes = scenario.joystick(t)
+            if axes != control.axes[0]:
+                control.set_axes(axes, now_ms)
+
+            if now_ms >= next_tx:
+                next_tx += tx_ms
+                ch, _, _ = control(t)
+                if not any(a <= t < b for a, b in scenario.tx_gaps) and gate.should_send(ch, t):
+                    out_link.host.write(encoder.encode(ch))
+                    frames_sent += 1
+
+            data = out_link.device_end.read_exact(out_link.host.written - wire_read)
+            if data:
+                wire_read += len(data)
+                wire_free = max(wire_free, now_ms) + len(data) * byte_ms
+                in_flight.append((wire_free, data))
+            while in_flight and in_flight[0][0] <= now_ms:
+                receiver.feed(in_flight.popleft()[1], now_ms)
+            receiver.update(now_ms)
+
+            steer_out.append(receiver.out["steer"])
+
+            if now_ms % trace_every_ms == 0:
+                o = receiver.out
+                trace.append((t, core.channels[0], core.channels[1], round(o["steer"]), round(o["throttle"]),
+                              round(o["yaw"]), round(o["pitch"]), receiver.failsafe))
+
+        return SimResult(scenario.name, frames_sent, receiver.frames, receiver.crc_errors,
+                         receiver.failsafe_events, emulator.sent, parser.samples,
+                         _step_latencies(events, steer_out), trace,
+                         time.perf_counter() - wall0)
+    finally:
+        out_link.close()
+        in_link.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run the control path against virtual serial ports")
+    p.add_argument("--scenario", default="step", help="step, sweep, dropout, a .json script or a flight recorder .bin")
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--rate", type=int, default=150, help="CRSF frame rate in Hz")
+    p.add_argument("--tracker", choices=(MODE_ASCII, MODE_BINARY), default=MODE_ASCII)
+    p.add_argument("--profile", choices=sorted(PROFILES), default="Sport")
+    p.add_argument("--policy", choices=POLICIES, default=POLICY_FIXED, help="send policy in front of the encoder")
+    p.add_argument("--baud", type=int, default=115200, help="serial speed used for the wire delay")
+    p.add_argument("--realtime", action="store_true", help="pace the simulation to the wall clock")
+    p.add_argument("--trace", help="write the receiver output trace to this CSV file")
+    args = p.parse_args(argv)
+
+    if args.scenario.endswith(".json"):
+        scenario = scripted_scenario(args.scenario)
+    elif args.scenario.endswith(".bin"):
+        scenario = recorded_scenario(args.scenario)
+    else:
+        scenario = builtin_scenario(args.scenario, args.duration)
+
+    capacity = args.baud / (10.0 * CRSF_CHANNELS_FRAME_LEN)
+    if args.rate > capacity:
+        print(f"note: {args.rate} Hz is above the {capacity:.0f} frames/s {args.baud} baud carries; "
+              "frames will queue on the wire")
+    r = run_simulation(scenario, args.rate, args.tracker, args.profile,
+                       args.baud, args.policy, args.realtime)
+
+    print(f"scenario {r.scenario}: {scenario.duration:.1f} s simulated in {r.wall_s:.2f} s "
+          f"({scenario.duration / r.wall_s:.0f}x real time)")
+    print(f"frames sent {r.frames_sent}, decoded {r.frames_decoded}, crc errors {r.crc_errors}, "
+          f"failsafe events {r.failsafe_events}")
+    print(f"tracker samples sent {r.tracker_sent}, parsed {r.head_samples}")
+    for first, settled in r.latencies:
+        print(f"steer step: first frame after {first} ms, servo at 90% after {settled} ms")
+
+    if args.trace:
+        with open(args.trace, "w", encoding="utf-8") as f:
+            f.write("t,ch0,ch1,steer_us,throttle_us,yaw_us,pitch_us,failsafe\n")
+            for row in r.trace:
+                f.write(",".join(str(v) for v in row) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
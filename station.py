@@ -0,0 +1,335 @@
+import heapq
+import threading
+import time
+
+from control_core import ControlCore, ControlLoop, HEAD_ARDUINO
+from crsf import CrsfEncoder
+from devices import DeviceSupervisor, open_serial
+from head_fusion import FUSION_PREDICT, HeadFusion
+from headtracker import HeadTrackReader
+from io_reactor import IoReactor
+from recorder import FlightRecorder
+from send_policy import DEFAULT_HEARTBEAT_S, POLICY_FIXED, make_policy
+from telemetry import TelemetryReader
+from tx_engine import CrsfTxEngine
+from watchdog import StallWatchdog
+
+# ===================== STATION =====================
+# several vehicles driven from one computer: every vehicle keeps its own
+# core, TX engine, tracker and telemetry, but all TX slots share one
+# scheduler thread and all serial input shares one I/O reactor, so adding a
+# car adds work, not threads and wakeups
+
+
+class TxScheduler:
+    # runs the slots of many CrsfTxEngines, each at its own rate; slots due
+    # within `coalesce_s` of each other are served in the same wakeup
+    def __init__(self, spin_s=0.0005, coalesce_s=0.0005):
+        self.spin_s = spin_s
+        self.coalesce_s = coalesce_s
+        self.engines = ()
+        # optional gc_tuning.GcGovernor, given the gap after each wakeup
+        self.gc = None
+
+        self.wakeups = 0
+        self.slots = 0
+
+        self._running = False
+        self._thread = None
+
+    def add(self, engine):
+        # replaced as a whole, the scheduler thread picks it up on its next wakeup
+        self.engines = self.engines + (engine,)
+
+    def remove(self, engine):
+        self.engines = tuple(e for e in self.engines if e is not engine)
+
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="station-tx", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        heap = []
+        engines = ()
+        seq = 0
+        while self._running:
+            if self.engines is not engines:
+                engines = self.engines
+                now = time.perf_counter()
+                known = {id(e): d for d, _, e in heap}
+                heap = []
+                for e in engines:
+                    seq += 1
+                    heap.append((known.get(id(e), now), seq, e))
+                heapq.heapify(heap)
+            if not heap:
+                time.sleep(0.01)
+                continue
+
+            deadline = heap[0][0]
+            wait = deadline - time.perf_counter()
+            if wait > self.spin_s:
+                # never sleep past a vehicle added in the meantime
+                time.sleep(min(wait - self.spin_s, 0.05))
+                continue
+            while time.perf_counter() < deadline:
+                time.sleep(0)
+
+            now = time.perf_counter()
+            self.wakeups += 1
+            horizon = now + self.coalesce_s
+            gov = self.gc
+            probe = gov.probe if gov is not None else None
+            while heap and heap[0][0] <= horizon:
+                deadline, _, engine = heapq.heappop(heap)
+                if engine.consume_rate_change():
+                    deadline = now
+                if probe is not None:
+                    probe.begin()
+                next_t = engine.run_slot(deadline, now)
+                if probe is not None:
+                    probe.end()
+                self.slots += 1
+                seq += 1
+                heapq.heappush(heap, (next_t, seq, engine))
+            if gov is not None and heap:
+                gov.idle(heap[0][0] - time.perf_counter())
+
+
+class VehicleSession:
+    def __init__(self, name, rate_hz=150, profile="Beginner", tuning=None, head_source=HEAD_ARDUINO,
+                 joystick_index=None, head_fusion=FUSION_PREDICT, head_latency_s=0.02,
+                 send_policy=POLICY_FIXED, heartbeat_s=DEFAULT_HEARTBEAT_S, tracker_protocol=None,
+                 l2_axis=4):
+        self.name = name
+        self.joystick_index = joystick_index
+        self.joystick = None
+
+        self.core = ControlCore()
+        self.core.apply_profile(profile)
+        self.core.configure(tuning or {})
+        self.core.head_source = head_source
+
+        self.tx = CrsfTxEngine(CrsfEncoder().encode, rate_hz=rate_hz)
+        self.head_reader = HeadTrackReader()
+        self.head_reader.protocol = tracker_protocol
+        self.head_reader.fusion = HeadFusion(head_fusion, latency_s=head_latency_s)
+        self.telemetry = TelemetryReader()
+
+        self.control = ControlLoop(self.core, self.head_reader.sample_at, l2_axis)
+        self.tx.producer = self.control
+        self.tx.set_policy(make_policy(send_policy, heartbeat_s, lambda: self.telemetry.current()[0]))
+        self.tx.set_paused_heartbeat(heartbeat_s)
+
+    @property
+    def role_out(self):
+        return self.name + "/out"
+
+    @property
+    def role_in(self):
+        return self.name + "/in"
+
+    def attach(self, devices, reactor):
+        self.head_reader.reactor = reactor
+        self.telemetry.reactor = reactor
+
+        def set_out_port(port):
+            self.tx.set_port(port)
+            self.telemetry.set_port(port)
+
+        devices.sinks[self.role_out] = set_out_port
+        devices.sinks[self.role_in] = self.head_reader.set_port
+        self.tx.on_error = lambda: devices.link_lost(self.role_out)
+        self.head_reader.on_error = lambda: devices.link_lost(self.role_in)
+        self.telemetry.on_error = lambda: devices.link_lost(self.role_out)
+
+    def detach(self, devices):
+        for role in (self.role_out, self.role_in):
+            devices.disconnect(role)
+            devices.sinks.pop(role, None)
+
+    def status(self):
+        core = self.core
+        return {
+            "name": self.name,
+            "tx": self.tx.stats(),
+            "head": self.head_reader.stats(),
+            "telemetry": self.telemetry.stats(),
+            "steer": core.steer,
+            "throttle": core.throttle,
+            "reverse": core.reverse,
+            "paused": not self.tx.enabled,
+            "joystick": self.joystick.name if self.joystick is not None else "",
+        }
+
+
+def format_tile(status):
+    # one compact line per vehicle
+    tx = status["tx"]
+    link = status["telemetry"]["link"]
+    rf = f"LQ {link.up_lq:>3}%" if link is not None else "LQ  --"
+    state = "PAUSED" if status["paused"] else ("R" if status["reverse"] else "D")
+    return (f"{status['name']:<10} {state:<6} TX {tx['achieved_hz']:>3.0f}/{tx['rate_hz']:<3} Hz "
+            f"p99 {tx['jitter_p99_ms']:>5.2f} ms | str {status['steer']:+.2f} thr {status['throttle']:.2f} | "
+            f"HT {status['head']['sample_hz']:>3.0f} Hz | {rf}")
+
+
+class Station:
+    def __init__(self, opener=None, reactor=None, watchdog=None):
+        self.sessions = ()
+        self.scheduler = TxScheduler()
+        self.reactor = reactor or IoReactor()
+        # whoever pumps the joysticks beats it; every vehicle goes neutral together
+        self.watchdog = watchdog or StallWatchdog()
+        # the reactor sets read timeouts itself once a port is added
+        self.devices = DeviceSupervisor(opener or (lambda role, device: open_serial(device, 0)))
+
+        self._started = False
+        self._cpu = (time.perf_counter(), time.process_time())
+        self.cpu_pct = 0.0
+
+    # ---------- VEHICLES ----------
+    def add(self, session):
+        session.attach(self.devices, self.reactor)
+        self.sessions = self.sessions + (session,)
+        self.scheduler.add(session.tx)
+        self.watchdog.watch(session.tx)
+        return session
+
+    def remove(self, session):
+        self.watchdog.unwatch(session.tx)
+        self.scheduler.remove(session.tx)
+        self.sessions = tuple(s for s in self.sessions if s is not session)
+        session.detach(self.devices)
+
+    def connect(self, session, out=None, inp=None):
+        if out:
+            self.devices.connect(session.role_out, out)
+        if inp:
+            self.devices.connect(session.role_in, inp)
+
+    # ---------- CONTROL ----------
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.reactor.start()
+        self.devices.start()
+        self.scheduler.start()
+        self.watchdog.start()
+
+    def stop(self):
+        self._started = False
+        self.watchdog.stop()
+        self.scheduler.stop()
+        self.devices.stop()
+        self.reactor.stop()
+        for session in self.sessions:
+            # no TX thread here, this only stops the port's writer
+            session.tx.stop()
+            if session.tx.recorder is not None:
+                session.tx.recorder.close()
+
+    # ---------- JOYSTICKS (main thread) ----------
+    def open_joysticks(self):
+        import pygame
+        from joystick_input import JoystickInput
+        pygame.init()
+        pygame.joystick.init()
+        first = True
+        for session in self.sessions:
+            if session.joystick_index is None:
+                continue
+            joystick = JoystickInput(session.joystick_index)
+            if first:
+                joystick.init()
+                first = False
+            else:
+                joystick.open()
+            session.joystick = joystick
+            session.control.set_axes(joystick.state.axes, joystick.state.stamp_ns)
+
+    def poll_joysticks(self):
+        # pygame's event queue is per process, so it is drained once here and
+        # the same batch goes to every controller
+        self.watchdog.beat()
+        joysticks = [s for s in self.sessions if s.joystick is not None]
+        if not joysticks:
+            return
+        import pygame
+        try:
+            events = pygame.event.get()
+        except Exception:
+            return
+        for session in joysticks:
+            if session.joystick.handle(events):
+                stamp, axes, _ = session.joystick.state
+                session.control.set_axes(axes, stamp)
+
+    # ---------- STATS ----------
+    def stats(self):
+        now, cpu = time.perf_counter(), time.process_time()
+        t0, c0 = self._cpu
+        if now > t0:
+            self.cpu_pct = (cpu - c0) / (now - t0) * 100.0
+        self._cpu = (now, cpu)
+        io = self.reactor.stats()
+        wd = self.watchdog.stats()
+        return {
+            "vehicles": len(self.sessions),
+            "tx_wakeups": self.scheduler.wakeups,
+            "tx_slots": self.scheduler.slots,
+            "io_wakeups": io["wakeups"],
+            "io_bytes": io["bytes"],
+            "io_loop_p99_ms": io["loop_p99_ms"],
+            "cpu_pct": self.cpu_pct,
+            "stalls": wd["stalls"],
+            "stall_active": wd["active"],
+            "stall_max_ms": wd["max_ms"],
+        }
+
+
+def format_station(stats):
+    slots = stats["tx_slots"]
+    per_wakeup = slots / stats["tx_wakeups"] if stats["tx_wakeups"] else 0.0
+    return (f"station: {stats['vehicles']} vehicles | CPU {stats['cpu_pct']:.1f}% | "
+            f"{per_wakeup:.2f} slots/wakeup | I/O loop p99 {stats['io_loop_p99_ms']:.2f} ms | "
+            f"{'FAILSAFE ' + stats['stall_active'] if stats['stall_active'] else 'stalls %d' % stats['stalls']}")
+
+
+# ---------- config ----------
+# {"vehicles": [{"name": "car1", "out": "COM5", "in": "COM7", "joystick": 0,
+#                "rate": 150, "profile": "Sport", ...}, ...]}
+_VEHICLE_KEYS = {
+    "rate": "rate_hz", "profile": "profile", "tuning": "tuning", "head_source": "head_source",
+    "joystick": "joystick_index", "head_fusion": "head_fusion", "send_policy": "send_policy",
+    "tracker_protocol": "tracker_protocol", "l2_axis": "l2_axis",
+}
+
+
+def build_station(cfg, **station_args):
+    station = Station(**station_args)
+    for i, v in enumerate(cfg.get("vehicles", ())):
+        v = {k.replace("-", "_"): value for k, value in v.items()}
+        kwargs = {arg: v[key] for key, arg in _VEHICLE_KEYS.items() if key in v}
+        if kwargs.get("tracker_protocol") == "auto":
+            kwargs["tracker_protocol"] = None
+        if "heartbeat_ms" in v:
+            kwargs["heartbeat_s"] = v["heartbeat_ms"] / 1000.0
+        if "head_latency_ms" in v:
+            kwargs["head_latency_s"] = v["head_latency_ms"] / 1000.0
+        session = station.add(VehicleSession(v.get("name") or f"car{i + 1}", **kwargs))
+        if v.get("record"):
+            session.tx.recorder = FlightRecorder(v["record"], seconds=v.get("record_seconds", 600),
+                                                 rate_hz=session.tx.rate_hz).open()
+        station.connect(session, v.get("out"), v.get("in"))
+    return station
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from crsf import CrsfDecoder
+from metrics import METRICS
+
+# ===================== TELEMETRY =====================
+# downlink from the TX module on the same serial port the channels go out on
+
+
+class TelemetryReader:
+    def __init__(self, decoder=None, read_timeout=0.05, stale_after=2.0):
+        self.decoder = decoder or CrsfDecoder()
+        self.read_timeout = read_timeout
+        self.stale_after = stale_after
+        # optional IoReactor, as for HeadTrackReader
+        self.reactor = None
+
+        self.port = None
+        self.link_lost = False
+        self.on_error = None
+
+        self._running = False
+        self._thread = None
+
+        # worst uplink LQ since the last stats() call, so short fades show up
+        # even though the panel only refreshes a few times a second
+        self._lq_min = None
+
+    def start(self):
+        if self._thread or self.reactor is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="telemetry-rx", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_port(self, port):
+        # the port belongs to the TX engine as well; only the read timeout is ours
+        old = self.port
+        if port is not None:
+            try:
+                port.timeout = self.read_timeout
+            except Exception:
+                pass
+        self.decoder.reset()
+        self.port = port
+        self.link_lost = False
+        reactor = self.reactor
+        if reactor is not None:
+            if old is not None:
+                reactor.remove(old)
+            if port is not None:
+                reactor.add(port, self.feed, self._lost)
+
+    def _run(self):
+        while self._running:
+            port = self.port
+            if port is None:
+                time.sleep(self.read_timeout)
+                continue
+            try:
+                n = port.in_waiting
+                data = port.read(n if n else 1)
+            except Exception:
+                self._lost(port)
+                continue
+            if data:
+                self.feed(data)
+
+    def feed(self, data):
+        t0 = time.perf_counter_ns() if METRICS.enabled else 0
+        if self.decoder.feed(data, time.perf_counter()):
+            link = self.decoder.link
+            if link is not None and (self._lq_min is None or link.up_lq < self._lq_min):
+                self._lq_min = link.up_lq
+        if t0:
+            METRICS.record("telemetry", time.perf_counter_ns() - t0)
+
+    def _lost(self, port):
+        # closing is left to the supervisor, the writer may still hold it
+        if self.port is port:
+            self.port = None
+            self.link_lost = True
+            cb = self.on_error
+            if cb:
+                cb()
+
+    def current(self, now=None):
+        now = time.perf_counter() if now is None else now
+        d = self.decoder
+        link, battery = d.link, d.battery
+        if link is not None and now - link.t > self.stale_after:
+            link = None
+        if battery is not None and now - battery.t > self.stale_after:
+            battery = None
+        return link, battery
+
+    def stats(self):
+        d = self.decoder
+        link, battery = self.current()
+        lq_min, self._lq_min = self._lq_min, None
+        return {
+            "link": link,
+            "battery": battery,
+            "up_lq_min": lq_min if lq_min is not None else (link.up_lq if link else None),
+            "frames": d.frames,
+            "crc_errors": d.crc_errors,
+            "dropped": d.dropped,
+            "overflows": d.overflows,
+        }
+
+
+def format_telemetry(stats):
+    link = stats["link"]
+    if link is None:
+        return "RF: no telemetry"
+    text = (f"RF: LQ {link.up_lq}% (min {stats['up_lq_min']}) / {link.down_lq}%  "
+            f"RSSI {link.up_rssi1}/{link.down_rssi} dBm  SNR {link.up_snr}/{link.down_snr} dB  "
+            f"{link.tx_power_mw} mW")
+    battery = stats["battery"]
+    if battery is not None:
+        text += f"\nBatt: {battery.voltage:.1f} V  {battery.current:.1f} A  {battery.capacity_mah} mAh"
+    return text
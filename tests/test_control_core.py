@@ -0,0 +1,167 @@
+import math
+
+import pytest
+
+from control_core import (HEAD_JOYSTICK, NEUTRAL_CHANNELS, PROFILES, RATE_REFERENCE_DT, ControlCore, ControlInputs,
+                          ControlLoop, apply_deadzone, read_axes, tau_for_rate)
+from crsf import map_range
+from headtracker import HeadSample
+from tx_engine import TX_RATES
+
+
+def _run(core, inputs, rate_hz, seconds):
+    for i in range(int(round(seconds * rate_hz)) + 1):
+        core.step(inputs, i / rate_hz)
+    return core
+
+
+# ---------- helpers ----------
+def test_tau_reproduces_the_old_per_tick_factor():
+    # one step of the reference 50 Hz loop moves k = rate/1000 of the way
+    for rate in (1, 120, 200, 380, 999):
+        k = 1.0 - math.exp(-RATE_REFERENCE_DT / tau_for_rate(rate))
+        assert k == pytest.approx(rate / 1000.0)
+
+
+def test_tau_is_clamped():
+    assert tau_for_rate(0) > 0
+    assert tau_for_rate(5000) == tau_for_rate(999)
+
+
+def test_apply_deadzone():
+    assert apply_deadzone(0.05, 0.1) == 0.0
+    assert apply_deadzone(-0.05, 0.1) == 0.0
+    assert apply_deadzone(1.0, 0.1) == pytest.approx(1.0)
+    assert apply_deadzone(-0.55, 0.1) == pytest.approx(-0.5)
+
+
+def test_read_axes():
+    axes = (0.5, 0.0, 0.25, -0.5, 1.0, -1.0)
+    inputs = read_axes(axes)
+    assert inputs.steer == 0.5
+    assert inputs.throttle == 0.0
+    assert inputs.l2 == 1.0
+    assert (inputs.rx, inputs.ry) == (0.25, -0.5)
+    assert inputs.axes == axes
+    assert read_axes(()) is not None
+
+
+# ---------- step ----------
+def test_neutral_inputs_give_neutral_channels():
+    core = ControlCore()
+    ch = core.step(ControlInputs(), 0.0)
+    assert tuple(ch) == NEUTRAL_CHANNELS
+    assert len(ch) == 16
+
+
+def test_full_deflection_reaches_the_channel_limits():
+    core = ControlCore()
+    core.configure({"steer_rate": 999, "throttle_rate": 999, "deadzone": 0})
+    _run(core, ControlInputs(steer=1.0, throttle=1.0, l2=1.0), 250, 1.0)
+    ch = core.channels
+    assert ch[0] == 1811
+    assert ch[1] == 1811
+    assert ch[4] == 1811
+    assert core.reverse
+
+
+def test_50hz_steps_follow_the_old_per_tick_filter():
+    # the old fixed 50 Hz loop moved k = rate/1000 of the way every tick:
+    # x += (target - x) * k; stepping at 20 ms must reproduce that exactly
+    core = ControlCore()
+    core.configure({"steer_rate": 200, "throttle_rate": 380, "deadzone": 0})
+    # both inputs sit exactly on a shaping table entry
+    inputs = ControlInputs(steer=0.75, throttle=0.5)
+    steer = throttle = 0.0
+    for i in range(50):
+        core.step(inputs, i * RATE_REFERENCE_DT)
+        steer += (0.75 - steer) * 0.2
+        throttle += (0.5 - throttle) * 0.38
+        assert core.steer == pytest.approx(steer, rel=1e-9)
+        assert core.throttle == pytest.approx(throttle, rel=1e-9)
+
+
+@pytest.mark.parametrize("rate", TX_RATES)
+def test_every_tx_rate_matches_50hz_over_the_same_wall_time(rate):
+    inputs = ControlInputs(steer=-0.5, throttle=0.75)
+    ref = ControlCore()
+    core = ControlCore()
+    for c in (ref, core):
+        c.configure({"steer_rate": 150, "throttle_rate": 250, "deadzone": 0})
+        c.step(ControlInputs(), 0.0)
+    for i in range(1, 26):
+        ref.step(inputs, i * RATE_REFERENCE_DT)
+    for i in range(1, int(round(0.5 * rate)) + 1):
+        core.step(inputs, i / rate)
+    assert core.steer == pytest.approx(ref.steer, rel=1e-9)
+    assert core.throttle == pytest.approx(ref.throttle, rel=1e-9)
+
+
+def test_a_late_step_covers_the_whole_gap():
+    fine = _run(ControlCore(), ControlInputs(steer=1.0), 500, 0.1)
+    coarse = ControlCore()
+    coarse.step(ControlInputs(steer=1.0), 0.0)
+    coarse.step(ControlInputs(steer=1.0), 0.1)
+    assert coarse.steer == pytest.approx(fine.steer, rel=1e-9)
+
+
+def test_time_going_backwards_does_not_move_the_state():
+    core = ControlCore()
+    core.step(ControlInputs(steer=1.0), 1.0)
+    steer = core.steer
+    core.step(ControlInputs(steer=1.0), 0.5)
+    assert core.steer == steer
+
+
+def test_head_offsets_and_wrap():
+    core = ControlCore()
+    core.step(ControlInputs(head=HeadSample(0.0, 170.0, 10.0)), 0.0)
+    core.calibrate_head()
+    core.step(ControlInputs(head=HeadSample(0.1, -170.0, 80.0)), 0.1)
+    # 20 degrees past the calibrated centre, across the +-180 seam
+    assert core.adj_yaw == pytest.approx(20.0)
+    # pitch is clamped to +-45
+    assert core.adj_pitch == 45.0
+    assert core.channels[2] == map_range(20.0, -180, 180, 172, 1811)
+    assert core.channels[3] == 1811
+
+
+def test_missing_head_sample_keeps_the_last_angles():
+    core = ControlCore()
+    core.step(ControlInputs(head=HeadSample(0.0, 30.0, -5.0)), 0.0)
+    core.step(ControlInputs(head=None), 0.1)
+    assert (core.yaw, core.pitch) == (30.0, -5.0)
+
+
+def test_joystick_head_source():
+    core = ControlCore()
+    core.head_source = HEAD_JOYSTICK
+    core.configure({"head_deadzone": 0})
+    core.step(ControlInputs(rx=1.0, ry=-1.0), 0.0)
+    assert core.yaw == pytest.approx(-90.0)
+    assert core.pitch == pytest.approx(45.0)
+
+
+def test_profiles_apply():
+    core = ControlCore()
+    for name in PROFILES:
+        assert core.apply_profile(name)
+        assert core.steer_rate == PROFILES[name]["steer_rate"]
+    assert not core.apply_profile("nope")
+    # Beginner caps the throttle at 60 %
+    core.apply_profile("Beginner")
+    _run(core, ControlInputs(throttle=1.0), 250, 2.0)
+    assert core.throttle == pytest.approx(0.6, abs=1e-3)
+
+
+def test_control_loop_steps_on_the_published_axes():
+    core = ControlCore()
+    core.configure({"steer_rate": 999, "deadzone": 0})
+    loop = ControlLoop(core)
+    loop.set_axes((1.0, 0.0, 0.0, 0.0, -1.0, 1.0), 42)
+    channels, stamp, ctx = loop(0.0)
+    assert stamp == 42
+    assert ctx[0] == (1.0, 0.0, 0.0, 0.0, -1.0, 1.0)
+    assert len(channels) == 16
+    loop(1.0)
+    assert core.steer == pytest.approx(1.0)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from crsf import CRSF_ADDRESS, CRSF_CHANNELS_FRAME_LEN, CRSF_FRAMETYPE_RC_CHANNELS, CrsfEncoder, crc8
+
+
+def _crc8_bitwise(data, poly=0xD5):
+    crc = 0
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def _pack_reference(ch):
+    # 16 x 11 bits, least significant bit first
+    bits = []
+    for c in ch:
+        bits.extend((c >> i) & 1 for i in range(11))
+    return bytes(sum(bits[i + j] << j for j in range(8)) for i in range(0, len(bits), 8))
+
+
+# ---------- CRC8 ----------
+def test_crc8_dvb_s2_check_value():
+    # the catalogue check value of CRC-8/DVB-S2 over "123456789"
+    assert crc8(b"123456789") == 0xBC
+
+
+def test_crc8_known_answers():
+    assert crc8(b"") == 0x00
+    assert crc8(b"\x00") == 0x00
+    assert crc8(b"\x01") == 0xD5
+    assert crc8(b"\x80") == _crc8_bitwise(b"\x80")
+
+
+def test_crc8_table_matches_bitwise():
+    rnd = random.Random(2)
+    for n in range(1, 64):
+        data = bytes(rnd.randrange(256) for _ in range(n))
+        assert crc8(data) == _crc8_bitwise(data)
+
+
+# ---------- ENCODER ----------
+def test_encode_layout():
+    ch = [172, 992, 1811, 0, 2047] + [1024] * 11
+    frame = bytes(CrsfEncoder().encode(ch))
+    assert len(frame) == CRSF_CHANNELS_FRAME_LEN
+    assert frame[0] == CRSF_ADDRESS
+    assert frame[1] == CRSF_CHANNELS_FRAME_LEN - 2
+    assert frame[2] == CRSF_FRAMETYPE_RC_CHANNELS
+    assert frame[3:25] == _pack_reference(ch)
+    assert frame[25] == crc8(frame[2:25])
+
+
+def test_encode_matches_reference_packing():
+    rnd = random.Random(3)
+    enc = CrsfEncoder()
+    for _ in range(500):
+        ch = [rnd.randrange(2048) for _ in range(16)]
+        frame = enc.encode(ch)
+        assert frame[3:25] == _pack_reference(ch)
+        assert frame[25] == _crc8_bitwise(frame[2:25])
+
+
+def test_encode_many_numpy_matches_encode():
+    np = pytest.importorskip("numpy")
+    rnd = random.Random(4)
+    rows = [[rnd.randrange(2048) for _ in range(16)] for _ in range(300)]
+    enc = CrsfEncoder()
+    expected = b"".join(bytes(enc.encode(ch)) for ch in rows)
+    assert enc._encode_many_np(np.asarray(rows)) == expected
+    assert enc.encode_many(rows) == expected
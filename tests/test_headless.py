@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from headless import load_options
+from tx_engine import TX_RATES
+
+
+def _config(tmp_path, cfg):
+    path = tmp_path / "cfg.json"
+    path.write_text(json.dumps(cfg), encoding="utf-8")
+    return str(path)
+
+
+def test_defaults():
+    opts = load_options([])
+    assert opts["rate"] == TX_RATES[0]
+    assert opts["profile"] == "Beginner"
+    assert opts["out"] is None and opts["inp"] is None
+    assert opts["tuning"] == {}
+    assert opts["stall_ms"] == 150.0
+
+
+def test_command_line():
+    opts = load_options(["--out", "COM5", "--in", "COM7", "--rate", str(TX_RATES[-1]), "--profile", "Race",
+                         "--no-joystick"])
+    assert (opts["out"], opts["inp"], opts["rate"], opts["profile"]) == ("COM5", "COM7", TX_RATES[-1], "Race")
+    assert opts["no_joystick"] is True
+
+
+def test_config_file(tmp_path):
+    path = _config(tmp_path, {"out": "/dev/ttyUSB0", "in": "/dev/ttyUSB1", "send-policy": "change",
+                              "tuning": {"shapes": {"steer": {"expo": 0.3}}}})
+    opts = load_options(["--config", path])
+    assert opts["out"] == "/dev/ttyUSB0"
+    assert opts["inp"] == "/dev/ttyUSB1"
+    assert opts["send_policy"] == "change"
+    assert opts["tuning"] == {"shapes": {"steer": {"expo": 0.3}}}
+
+
+def test_command_line_overrides_config(tmp_path):
+    path = _config(tmp_path, {"out": "COM3", "profile": "Sport"})
+    opts = load_options(["--config", path, "--out", "COM9"])
+    assert opts["out"] == "COM9"
+    assert opts["profile"] == "Sport"
+
+
+def test_unknown_config_key_is_an_error(tmp_path):
+    path = _config(tmp_path, {"outt": "COM3"})
+    with pytest.raises(SystemExit):
+        load_options(["--config", path])
+
+
+def test_rates_above_the_link_capacity_are_refused():
+    with pytest.raises(SystemExit):
+        load_options(["--rate", "500"])
@@ -0,0 +1,118 @@
+import struct
+
+from crsf import crc8
+from headtracker import BIN_FRAME_LEN, BIN_SYNC, MODE_ASCII, MODE_BINARY, HeadTrackParser
+
+
+def _bin_frame(seq, yaw, pitch, dev_us=0):
+    body = struct.pack("<BhhI", seq & 0xFF, int(round(yaw * 100)), int(round(pitch * 100)), dev_us)
+    return bytes([BIN_SYNC]) + body + bytes([crc8(body)])
+
+
+# ---------- ASCII ----------
+def test_ascii_line():
+    p = HeadTrackParser()
+    s = p.feed(b"YAW:12.5,PITCH:-3.25\n", 1.0)
+    assert (s.t, s.yaw, s.pitch) == (1.0, 12.5, -3.25)
+    assert p.mode == MODE_ASCII
+    assert not p.buf
+
+
+def test_ascii_line_split_across_chunks():
+    p = HeadTrackParser()
+    assert p.feed(b"YAW:1", 1.0) is None
+    assert p.feed(b"0.0,PIT", 1.1) is None
+    s = p.feed(b"CH:5.0\r\n", 1.2)
+    assert (s.yaw, s.pitch) == (10.0, 5.0)
+
+
+def test_ascii_newest_line_wins():
+    p = HeadTrackParser()
+    s = p.feed(b"YAW:1,PITCH:1\nYAW:2,PITCH:2\nYAW:3,PITCH:3\nYAW:4", 1.0)
+    assert (s.yaw, s.pitch) == (3.0, 3.0)
+    assert p.stale == 2
+    # the partial line is kept for the next chunk
+    assert bytes(p.buf) == b"YAW:4"
+
+
+def test_ascii_garbage_line_counts_an_error():
+    p = HeadTrackParser()
+    assert p.feed(b"hello\n", 1.0) is None
+    assert p.errors == 1
+
+
+def test_ascii_buffer_is_bounded():
+    p = HeadTrackParser(max_buffer=64)
+    for _ in range(10):
+        p.feed(b"x" * 30, 1.0)
+        assert len(p.buf) <= 64
+    assert p.overflows >= 1
+    # still parses once a line ends
+    assert p.feed(b"\nYAW:7,PITCH:1\n", 2.0).yaw == 7.0
+
+
+# ---------- BINARY ----------
+def test_binary_frame_switches_mode():
+    p = HeadTrackParser()
+    s = p.feed(_bin_frame(1, 45.5, -10.25), 1.0)
+    assert (s.yaw, s.pitch) == (45.5, -10.25)
+    assert p.mode == MODE_BINARY
+    assert not p.buf
+
+
+def test_binary_frame_split_across_chunks():
+    p = HeadTrackParser()
+    p.feed(_bin_frame(0, 0.0, 0.0), 1.0)
+    frame = _bin_frame(1, 20.0, 5.0)
+    assert p.feed(frame[:4], 1.1) is None
+    s = p.feed(frame[4:], 1.2)
+    assert (s.yaw, s.pitch) == (20.0, 5.0)
+
+
+def test_binary_bad_crc_is_rejected():
+    p = HeadTrackParser()
+    p.feed(_bin_frame(0, 1.0, 1.0), 1.0)
+    bad = bytearray(_bin_frame(1, 90.0, 30.0))
+    bad[-1] ^= 0x5A
+    assert p.feed(bytes(bad), 1.1) is None
+    assert p.errors >= 1
+    assert (p.yaw, p.pitch) == (1.0, 1.0)
+    # the next good frame is picked up again
+    assert p.feed(_bin_frame(2, 3.0, 4.0), 1.2).yaw == 3.0
+
+
+def test_binary_corrupt_frame_does_not_switch_from_ascii():
+    p = HeadTrackParser()
+    bad = bytearray(_bin_frame(0, 10.0, 10.0))
+    bad[3] ^= 0xFF
+    assert p.feed(bytes(bad), 1.0) is None
+    assert p.mode == MODE_ASCII
+
+
+def test_binary_sequence_gaps_count_lost_samples():
+    p = HeadTrackParser()
+    p.feed(_bin_frame(10, 0.0, 0.0), 1.0)
+    p.feed(_bin_frame(11, 0.0, 0.0), 1.1)
+    p.feed(_bin_frame(15, 0.0, 0.0), 1.2)
+    assert p.lost == 3
+    # the 8-bit counter wraps
+    p.feed(_bin_frame(255, 0.0, 0.0), 1.3)
+    p.feed(_bin_frame(0, 0.0, 0.0), 1.4)
+    assert p.lost == 3 + 239
+
+
+def test_binary_buffer_is_bounded():
+    p = HeadTrackParser(max_buffer=64)
+    p.feed(_bin_frame(0, 0.0, 0.0), 1.0)
+    noise = bytes([BIN_SYNC]) + bytes(BIN_FRAME_LEN * 3)
+    for _ in range(20):
+        p.feed(noise, 1.0)
+        assert len(p.buf) <= 64
+
+
+def test_back_to_ascii_from_binary():
+    p = HeadTrackParser()
+    p.feed(_bin_frame(0, 1.0, 1.0), 1.0)
+    s = p.feed(b"YAW:5,PITCH:6\n", 1.1)
+    assert p.mode == MODE_ASCII
+    assert (s.yaw, s.pitch) == (5.0, 6.0)
@@ -0,0 +1,112 @@
+import json
+import random
+
+import pytest
+
+from crsf import map_range
+from mixer import CRSF_IDLE, CRSF_MAX, CRSF_MIN, INPUTS, MIX_CACHE_SIZE, _MIXERS, Mixer, compile_mix, load_mix, parse_mix
+
+_AT = {name: i for i, name in enumerate(INPUTS)}
+
+
+def _inputs(**values):
+    x = [0.0] * len(INPUTS)
+    x[_AT["one"]] = 1.0
+    for name, v in values.items():
+        x[_AT[name]] = v
+    return x
+
+
+def test_default_mix_matches_the_old_channel_mapping():
+    # ControlCore used to map_range steer, throttle, yaw, pitch and L2 onto
+    # channels 0-4 and leave the rest at 1024
+    mixer = Mixer()
+    rnd = random.Random(5)
+    for _ in range(20000):
+        steer, throttle = rnd.uniform(-1, 1), rnd.uniform(0, 1)
+        yaw, pitch, l2 = rnd.uniform(-180, 180), rnd.uniform(-45, 45), rnd.uniform(0, 1)
+        out = mixer(_inputs(steer=steer, throttle=throttle, yaw=yaw / 180.0, pitch=pitch / 45.0, l2=l2,
+                            steer_abs=abs(steer)))
+        assert out[:5] == [map_range(steer, -1, 1, 172, 1811), map_range(throttle, 0, 1, 172, 1811),
+                           map_range(yaw, -180, 180, 172, 1811), map_range(pitch, -45, 45, 172, 1811),
+                           map_range(l2, 0, 1, 172, 1811)]
+        assert out[5:] == [CRSF_IDLE] * 11
+
+
+def test_default_mix_at_the_ends():
+    mixer = Mixer()
+    assert mixer(_inputs(steer=-1.0))[0] == CRSF_MIN
+    assert mixer(_inputs(steer=1.0, throttle=1.0))[:2] == [CRSF_MAX, CRSF_MAX]
+
+
+def test_switch_gates_a_line():
+    mixer = Mixer({"mixes": [{"channel": 5, "source": "one", "switch": "reverse"}]})
+    # a channel with lines but a zero sum sits at the centre of the range
+    assert mixer(_inputs())[5] == map_range(0, -1, 1, CRSF_MIN, CRSF_MAX)
+    assert mixer(_inputs(reverse=1.0))[5] == CRSF_MAX
+
+
+def test_multiply_and_limits():
+    spec = {"mixes": [{"channel": 1, "source": "throttle", "weight": 2.0, "offset": -1.0},
+                      {"channel": 1, "source": "throttle", "weight": -1.0, "multiply": "steer_abs"}],
+            "limits": {"1": [-1.0, 0.5]}}
+    mixer = Mixer(spec)
+    straight = mixer(_inputs(throttle=0.5))[1]
+    turning = mixer(_inputs(throttle=0.5, steer_abs=1.0))[1]
+    assert turning < straight
+    # the upper limit holds at full throttle
+    assert mixer(_inputs(throttle=1.0))[1] == int(CRSF_MIN + 1.5 * (CRSF_MAX - CRSF_MIN) / 2.0)
+
+
+def test_unknown_input_and_bad_channel_are_rejected():
+    with pytest.raises(ValueError):
+        parse_mix({"mixes": [{"channel": 0, "source": "nope"}]})
+    with pytest.raises(ValueError):
+        parse_mix({"mixes": [{"channel": 16, "source": "steer"}]})
+
+
+def test_compile_mix_is_cached_by_content():
+    a = compile_mix({"mixes": [{"channel": 2, "source": "yaw"}]})
+    b = compile_mix({"mixes": [{"source": "yaw", "channel": 2}]})
+    assert a is b
+    assert compile_mix(None) is compile_mix(None)
+
+
+def test_apply_many_matches_per_tick():
+    pytest.importorskip("numpy")
+    spec = {"mixes": [{"channel": 0, "source": "steer"},
+                      {"channel": 1, "source": "throttle", "weight": 2.0, "offset": -1.0},
+                      {"channel": 1, "source": "throttle", "weight": -0.6, "multiply": "steer_abs"},
+                      {"channel": 5, "source": "one", "switch": "reverse"},
+                      {"channel": 6, "source": "axis3", "weight": 0.5}],
+            "limits": {"1": [-1.0, 0.8]}}
+    mixer = Mixer(spec)
+    rnd = random.Random(6)
+    rows = []
+    for _ in range(500):
+        steer = rnd.uniform(-1, 1)
+        rows.append(_inputs(steer=steer, throttle=rnd.uniform(0, 1), steer_abs=abs(steer),
+                            reverse=float(rnd.random() > 0.5), axis3=rnd.uniform(-1, 1)))
+    batch = mixer.apply_many(rows)
+    for row, out in zip(rows, batch):
+        assert mixer(row) == list(out)
+
+
+def test_compile_mix_cache_is_bounded():
+    for weight in range(MIX_CACHE_SIZE * 3):
+        compile_mix({"mixes": [{"channel": 0, "source": "steer", "weight": weight / 10.0}]})
+    assert len(_MIXERS) <= MIX_CACHE_SIZE
+
+
+def test_load_mix_checks_the_file(tmp_path):
+    good = tmp_path / "mix.json"
+    good.write_text(json.dumps({"mixes": [{"channel": 0, "source": "steer"}]}), encoding="utf-8")
+    assert load_mix(str(good)) == {"mixes": [{"channel": 0, "source": "steer"}]}
+    for bad in ({"mixes": [{"channel": 0, "source": "nope"}]}, {"mixes": [{"chanel": 0}]}, [1, 2]):
+        path = tmp_path / "bad.json"
+        path.write_text(json.dumps(bad), encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_mix(str(path))
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_mix(str(tmp_path / "broken.json"))
@@ -0,0 +1,31 @@
+import pytest
+
+from control_core import ControlCore
+from shaping import BIPOLAR, CURVE_CACHE_SIZE, UNIPOLAR, _CURVES, ChannelShape, compile_curve, shape_value
+
+
+def test_curve_matches_shape_value_on_the_grid():
+    shape = ChannelShape(deadzone=0.1, expo=0.4, rate=0.9, low=-0.8, high=0.7)
+    curve = compile_curve(shape, BIPOLAR)
+    for i in range(-100, 101):
+        x = i / 100.0
+        assert curve(x) == pytest.approx(shape_value(x, shape, BIPOLAR), abs=1e-3)
+    throttle = compile_curve(ChannelShape(low=0.0, high=0.6), UNIPOLAR)
+    assert throttle(1.0) == pytest.approx(0.6)
+    assert throttle(-1.0) == 0.0
+
+
+def test_slider_sweep_keeps_the_cache_bounded():
+    core = ControlCore()
+    for expo in range(0, 101, 5):
+        for dz in range(0, 21, 2):
+            core.configure({"deadzone": dz, "shapes": {"steer": {"expo": expo / 100.0}}})
+    assert len(_CURVES) <= CURVE_CACHE_SIZE
+
+
+def test_recently_used_curves_stay_cached():
+    keep = ChannelShape(expo=0.25)
+    first = compile_curve(keep)
+    for i in range(CURVE_CACHE_SIZE * 2):
+        compile_curve(ChannelShape(expo=i / 1000.0))
+        assert compile_curve(keep) is first
@@ -0,0 +1,63 @@
+import pytest
+
+from crsf import CRSF_FRAMETYPE_BATTERY_SENSOR, CRSF_FRAMETYPE_LINK_STATISTICS, CrsfDecoder, crc8
+
+
+def _frame(frame_type, payload, address=0xEA):
+    body = bytes([frame_type]) + payload
+    return bytes([address, len(body) + 1]) + body + bytes([crc8(body)])
+
+
+LINK_PAYLOAD = bytes([70, 72, 100, 9, 0, 5, 3, 80, 98, 7])
+BATTERY_PAYLOAD = bytes([0, 123, 0, 45, 0, 4, 210, 87])
+
+
+def test_decode_link_statistics_and_battery():
+    dec = CrsfDecoder()
+    assert dec.feed(_frame(CRSF_FRAMETYPE_LINK_STATISTICS, LINK_PAYLOAD) + _frame(CRSF_FRAMETYPE_BATTERY_SENSOR,
+                                                                                  BATTERY_PAYLOAD), 1.0) == 2
+    link = dec.link
+    assert (link.up_rssi1, link.up_rssi2, link.up_lq, link.up_snr) == (-70, -72, 100, 9)
+    assert (link.rf_mode, link.tx_power_mw, link.down_rssi, link.down_lq, link.down_snr) == (5, 100, -80, 98, 7)
+    battery = dec.battery
+    assert battery.voltage == pytest.approx(12.3)
+    assert battery.current == pytest.approx(4.5)
+    assert (battery.capacity_mah, battery.remaining) == (1234, 87)
+
+
+def test_decode_resyncs_after_garbage():
+    dec = CrsfDecoder()
+    # noise including sync bytes and bogus lengths ahead of a real frame
+    garbage = bytes([0x00, 0xC8, 0xFF, 0x12, 0xEA, 0x01, 0x33])
+    assert dec.feed(garbage + _frame(CRSF_FRAMETYPE_LINK_STATISTICS, LINK_PAYLOAD), 2.0) == 1
+    assert dec.link.t == 2.0
+    assert dec.dropped > 0
+    assert not dec.buf
+
+
+def test_decode_rejects_bad_crc_and_recovers():
+    dec = CrsfDecoder()
+    bad = bytearray(_frame(CRSF_FRAMETYPE_LINK_STATISTICS, LINK_PAYLOAD))
+    bad[-1] ^= 0xFF
+    assert dec.feed(bytes(bad), 1.0) == 0
+    assert dec.link is None
+    assert dec.crc_errors >= 1
+    assert dec.feed(_frame(CRSF_FRAMETYPE_LINK_STATISTICS, LINK_PAYLOAD), 2.0) == 1
+    assert dec.link.up_lq == 100
+
+
+def test_decode_frame_split_across_chunks():
+    dec = CrsfDecoder()
+    data = _frame(CRSF_FRAMETYPE_LINK_STATISTICS, LINK_PAYLOAD)
+    for b in data[:-1]:
+        assert dec.feed(bytes([b]), 1.0) == 0
+    assert dec.feed(data[-1:], 1.0) == 1
+    assert dec.frames == 1
+
+
+def test_decode_buffer_is_bounded():
+    dec = CrsfDecoder(max_buffer=64)
+    # a frame header promising more bytes than ever arrive
+    dec.feed(bytes([0xEA, 60]) + bytes(40), 1.0)
+    dec.feed(bytes(40), 1.0)
+    assert len(dec.buf) <= 64
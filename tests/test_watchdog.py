@@ -0,0 +1,172 @@
+import threading
+import time
+
+from control_core import NEUTRAL_CHANNELS
+from crsf import CrsfEncoder
+from tx_engine import CrsfTxEngine
+from watchdog import StallWatchdog
+
+FULL = (1811, 1811) + (992,) * 14
+
+
+class _FakePort:
+    def __init__(self):
+        self.frames = []
+        self.out_waiting = 0
+
+    def write(self, data):
+        self.frames.append(bytes(data))
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def _frame(channels):
+    return bytes(CrsfEncoder().encode(channels))
+
+
+def _engine(port, producer=None):
+    tx = CrsfTxEngine(CrsfEncoder().encode, rate_hz=250)
+    # assigned directly, frames are written inline on the calling thread
+    tx.port = port
+    tx.producer = producer or (lambda now: (FULL, 0, None))
+    return tx
+
+
+def _wait_for(cond, timeout=3.0):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        if cond():
+            return True
+        time.sleep(0.005)
+    return cond()
+
+
+# ---------- engine ----------
+def test_failsafe_flag_sends_neutral_and_back():
+    port = _FakePort()
+    tx = _engine(port)
+    tx.run_slot(0.0, 0.0)
+    assert port.frames[-1] == _frame(FULL)
+    tx.failsafe = True
+    tx.run_slot(0.004, 0.004)
+    assert port.frames[-1] == _frame(NEUTRAL_CHANNELS)
+    assert tx.failsafe_frames == 1
+    tx.failsafe = False
+    tx.run_slot(0.008, 0.008)
+    assert port.frames[-1] == _frame(FULL)
+    assert tx.failsafe_frames == 1
+
+
+def test_failsafe_overrides_pause():
+    port = _FakePort()
+    tx = _engine(port)
+    tx.enabled = False
+    tx.failsafe = True
+    tx.run_slot(0.0, 0.0)
+    assert port.frames == [_frame(NEUTRAL_CHANNELS)]
+
+
+def test_emit_failsafe():
+    tx = _engine(None)
+    assert not tx.emit_failsafe()
+    port = _FakePort()
+    tx.port = port
+    assert tx.emit_failsafe()
+    assert port.frames == [_frame(NEUTRAL_CHANNELS)]
+    # a draining output buffer is not queued behind
+    port.out_waiting = 26
+    assert not tx.emit_failsafe()
+    assert len(port.frames) == 1
+
+
+# ---------- watchdog ----------
+def test_stuck_tx_thread_gets_failsafe_frames_from_the_watchdog():
+    port = _FakePort()
+    release = threading.Event()
+    stuck = threading.Event()
+
+    def producer(now):
+        if not release.is_set():
+            stuck.set()
+            release.wait(5.0)
+        return FULL, 0, None
+
+    tx = _engine(port, producer)
+    wd = StallWatchdog(threshold_s=0.05, period_s=0.005)
+    wd.watch(tx)
+    tx.start()
+    wd.start()
+    try:
+        assert stuck.wait(2.0)
+        # the TX thread is held inside its slot; neutral frames still go out
+        assert _wait_for(lambda: wd.failsafe_frames >= 3)
+        assert tx.failsafe
+        assert port.frames[-1] == _frame(NEUTRAL_CHANNELS)
+        release.set()
+        assert _wait_for(lambda: not tx.failsafe)
+        assert _wait_for(lambda: port.frames[-1] == _frame(FULL))
+        stall = [e for e in wd.history if e.cause == "tx thread late"][0]
+        assert stall.frames >= 3
+    finally:
+        release.set()
+        wd.stop()
+        tx.stop()
+
+
+def test_stalled_input_switches_to_neutral_and_back():
+    port = _FakePort()
+    tx = _engine(port)
+    wd = StallWatchdog(threshold_s=0.05, period_s=0.005)
+    wd.watch(tx)
+    tx.start()
+    wd.start()
+    try:
+        wd.beat()
+        assert _wait_for(lambda: tx.failsafe)
+        assert _wait_for(lambda: port.frames[-1] == _frame(NEUTRAL_CHANNELS))
+        assert wd.stats()["active"] == "input silent"
+
+        beating = threading.Event()
+
+        def beat():
+            while not beating.is_set():
+                wd.beat()
+                time.sleep(0.005)
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        try:
+            assert _wait_for(lambda: not tx.failsafe)
+            assert _wait_for(lambda: port.frames[-1] == _frame(FULL))
+        finally:
+            beating.set()
+            beater.join()
+        assert any(e.cause == "input silent" for e in wd.history)
+        # the TX thread kept running, so its own slots sent the neutral frames
+        assert wd.failsafe_frames == 0
+        assert tx.failsafe_frames >= 1
+    finally:
+        wd.stop()
+        tx.stop()
+
+
+def test_forgotten_source_is_not_a_stall():
+    tx = _engine(_FakePort())
+    wd = StallWatchdog(threshold_s=0.05, period_s=0.005)
+    wd.watch(tx)
+    wd.beat()
+    wd.forget()
+    wd._check(time.perf_counter() + 1.0)
+    assert not tx.failsafe
+    assert wd.stalls == 0
+
+
+def test_stop_clears_failsafe():
+    tx = _engine(_FakePort())
+    wd = StallWatchdog()
+    wd.watch(tx)
+    tx.failsafe = True
+    wd.stop()
+    assert not tx.failsafe
@@ -0,0 +1,352 @@
+import threading
+import time
+
+from metrics import METRICS, SECONDS, percentiles_ms
+from control_core import NEUTRAL_CHANNELS
+from crsf import CRSF_CHANNELS_FRAME_LEN
+from devices import OUT_BAUDRATE
+from recorder import STATUS_FAILSAFE, STATUS_HELD, STATUS_NO_PORT, STATUS_OK, STATUS_PAUSED, STATUS_WRITE_ERROR
+from send_policy import DEFAULT_HEARTBEAT_S, FixedRate, clamp_heartbeat
+from serial_writer import SerialWriter
+
+# ===================== CRSF TX ENGINE =====================
+def max_rate_hz(baudrate=OUT_BAUDRATE):
+    # 8N1 is 10 bits a byte: at 115200 baud a 26-byte frame takes 2.26 ms,
+    # so the port carries ~443 frames/s; a faster slot clock only queues
+    # frames behind each other and delays every one of them
+    return baudrate / (10.0 * CRSF_CHANNELS_FRAME_LEN)
+
+
+TX_RATES = tuple(r for r in (50, 150, 250, 500) if r <= max_rate_hz())
+
+
+class CrsfTxEngine:
+    def __init__(self, encode, rate_hz=50, jitter_window=1000, spin_s=0.0005):
+        self.encode = encode
+        # rates above what the output baud carries are clamped, whichever
+        # way they arrive (GUI, station config, isolated child)
+        self.max_rate_hz = int(max_rate_hz())
+        self.rate_hz = min(rate_hz, self.max_rate_hz)
+        self.spin_s = spin_s
+
+        self.port = None
+        # frames go out through the port's writer thread, so a full USB
+        # buffer never blocks a slot; a port assigned directly is written inline
+        self.writer = None
+        self.enabled = True
+        self.link_lost = False
+        self.on_error = None
+        self.recorder = None
+        # optional callable(now) -> (channels, stamp_ns, ctx) run every slot;
+        # when set it replaces whatever set_channels published
+        self.producer = None
+        self.policy = FixedRate()
+        # while paused the receiver still gets neutral frames, so it holds
+        # still instead of dropping into failsafe
+        self.paused_heartbeat_s = DEFAULT_HEARTBEAT_S
+        # optional gc_tuning.GcGovernor: collections run after a slot, in the
+        # gap before the next one
+        self.gc = None
+        # optional callable(now, ctx, channels) fed every slot, e.g. the live
+        # plots' sample ring; only set while something is watching
+        self.tap = None
+        # set by the stall watchdog: every slot sends neutral, whatever the
+        # producer, pause state or send policy say
+        self.failsafe = False
+        # the encoder reuses one buffer, so the watchdog thread writes its own copy
+        self._failsafe_frame = bytes(encode(NEUTRAL_CHANNELS))
+
+        self.frames_sent = 0
+        self.frames_held = 0
+        self.producer_errors = 0
+        self.write_errors = 0
+        self.overruns = 0
+        self.failsafe_frames = 0
+        # perf_counter of the last slot that ran, watched for a stuck TX thread
+        self.last_tick_t = 0.0
+
+        self._source = ((1024,) * 16, 0, None)
+        self._sent_stamp = 0
+        self._paused_t = 0.0
+        self._rate_changed = False
+        self._running = False
+        self._thread = None
+
+        self._jitter = [0.0] * jitter_window
+        self._jitter_idx = 0
+        self._jitter_count = 0
+
+        self._latency = [0.0] * jitter_window
+        self._latency_idx = 0
+        self._latency_count = 0
+
+        self._stats_t = time.perf_counter()
+        self._stats_frames = 0
+        self.achieved_hz = 0.0
+
+    # ---------- CONTROL ----------
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="crsf-tx", daemon=True)
+        self._thread.start()
+        writer = self.writer
+        if writer is not None:
+            writer.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        writer = self.writer
+        if writer is not None:
+            writer.stop()
+
+    def set_port(self, port):
+        old = self.writer
+        writer = None
+        if port is not None:
+            writer = SerialWriter(port)
+            writer.on_error = self._write_failed
+            writer.start()
+        self.writer = writer
+        self.port = port
+        self.link_lost = False
+        if old is not None:
+            old.stop()
+
+    def set_rate(self, rate_hz):
+        if rate_hz <= 0:
+            return
+        self.rate_hz = min(rate_hz, self.max_rate_hz)
+        self._rate_changed = True
+
+    def set_policy(self, policy):
+        self.policy = policy or FixedRate()
+
+    def set_paused_heartbeat(self, seconds):
+        self.paused_heartbeat_s = clamp_heartbeat(seconds)
+
+    def set_channels(self, ch, stamp_ns=0, ctx=None):
+        # channels, the input timestamp they came from and the recorder
+        # context are swapped in with a single store, so the TX thread always
+        # sees one complete snapshot
+        self._source = (tuple(ch), stamp_ns, ctx)
+
+    # ---------- SLOTS ----------
+    # whoever owns the slot clock (this engine's own thread or a station's
+    # shared TxScheduler) drives it through these two
+    def consume_rate_change(self):
+        # True once after set_rate; the caller restarts its slot clock
+        if self._rate_changed:
+            self._rate_changed = False
+            return True
+        return False
+
+    def run_slot(self, deadline, now):
+        # runs the slot due at `deadline` and returns the next deadline;
+        # deadlines are absolute, so sleep overshoot never accumulates, and
+        # if we fell a whole period behind the missed slots are skipped
+        self._tick(deadline, now)
+        period = 1.0 / self.rate_hz
+        next_t = deadline + period
+        behind = now - next_t
+        if behind > period:
+            missed = int(behind / period)
+            self.overruns += missed
+            next_t += missed * period
+        return next_t
+
+    # ---------- SCHEDULER ----------
+    def _run(self):
+        next_t = time.perf_counter()
+        while self._running:
+            if self.consume_rate_change():
+                next_t = time.perf_counter()
+
+            wait = next_t - time.perf_counter()
+            if wait > self.spin_s:
+                time.sleep(wait - self.spin_s)
+            while time.perf_counter() < next_t:
+                time.sleep(0)
+
+            now = time.perf_counter()
+            gov = self.gc
+            probe = gov.probe if gov is not None else None
+            if probe is not None:
+                probe.begin()
+            next_t = self.run_slot(next_t, now)
+            if probe is not None:
+                probe.end()
+            if gov is not None:
+                gov.idle(next_t - time.perf_counter())
+
+    def _tick(self, deadline, now):
+        self.last_tick_t = now
+        self._jitter[self._jitter_idx] = now - deadline
+        self._jitter_idx = (self._jitter_idx + 1) % len(self._jitter)
+        if self._jitter_count < len(self._jitter):
+            self._jitter_count += 1
+
+        t0 = time.perf_counter_ns() if METRICS.enabled else 0
+        producer = self.producer
+        if producer is not None:
+            try:
+                self._source = producer(now)
+            except Exception:
+                self.producer_errors += 1
+        channels, stamp, ctx = self._source
+        if self.failsafe:
+            channels = NEUTRAL_CHANNELS
+            status = self._send(channels, 0)
+            if status == STATUS_OK:
+                self.failsafe_frames += 1
+                status = STATUS_FAILSAFE
+        elif not self.enabled:
+            if self.port is None:
+                status = STATUS_NO_PORT
+            elif now - self._paused_t < self.paused_heartbeat_s:
+                status = STATUS_HELD
+            else:
+                self._paused_t = now
+                channels = NEUTRAL_CHANNELS
+                status = self._send(channels, 0)
+                if status == STATUS_OK:
+                    status = STATUS_PAUSED
+        elif self.port is not None and not self.policy.should_send(channels, now):
+            self.frames_held += 1
+            status = STATUS_HELD
+        else:
+            status = self._send(channels, stamp)
+
+        rec = self.recorder
+        if rec is not None:
+            try:
+                rec.record(now, ctx, channels, status)
+            except (ValueError, TypeError):
+                pass
+        tap = self.tap
+        if tap is not None:
+            try:
+                tap(now, ctx, channels)
+            except (ValueError, TypeError):
+                pass
+        if t0:
+            METRICS.record("tick", time.perf_counter_ns() - t0)
+
+    def _send(self, channels, stamp):
+        port = self.port
+        if port is None:
+            return STATUS_NO_PORT
+
+        m = METRICS
+        t0 = time.perf_counter_ns() if m.enabled else 0
+
+        frame = self.encode(channels)
+        if t0:
+            t1 = time.perf_counter_ns()
+            m.record("encode", t1 - t0)
+            t0 = t1
+        writer = self.writer
+        if writer is not None:
+            writer.submit(frame)
+        else:
+            try:
+                port.write(frame)
+            except Exception:
+                self._write_failed(port)
+                return STATUS_WRITE_ERROR
+            if t0:
+                m.record("write", time.perf_counter_ns() - t0)
+        self.frames_sent += 1
+
+        # input-to-wire latency, counted once per new input sample
+        if stamp and stamp != self._sent_stamp:
+            self._sent_stamp = stamp
+            lat_ns = time.perf_counter_ns() - stamp
+            if m.enabled:
+                m.record("input_to_wire", lat_ns)
+            self._latency[self._latency_idx] = lat_ns / 1e9
+            self._latency_idx = (self._latency_idx + 1) % len(self._latency)
+            if self._latency_count < len(self._latency):
+                self._latency_count += 1
+        return STATUS_OK
+
+    def _write_failed(self, port):
+        # TX thread, or the writer thread for frames it was handed
+        if self.port is not port:
+            return
+        self.write_errors += 1
+        self.port = None
+        self.writer = None
+        self.link_lost = True
+        try:
+            port.close()
+        except Exception:
+            pass
+        cb = self.on_error
+        if cb:
+            cb()
+
+    def emit_failsafe(self):
+        # called from the watchdog thread while this engine's own thread is
+        # stuck; the writer's mailbox takes it like any other frame, inline a
+        # full output buffer means the link is still draining, so the frame
+        # is skipped rather than queued behind stale ones
+        port = self.port
+        if port is None:
+            return False
+        writer = self.writer
+        if writer is not None:
+            writer.submit(self._failsafe_frame)
+            return True
+        try:
+            if port.out_waiting:
+                return False
+        except Exception:
+            pass
+        try:
+            port.write(self._failsafe_frame)
+        except Exception:
+            # left to the TX thread to report once it runs again
+            return False
+        return True
+
+    # ---------- STATS ----------
+    def stats(self):
+        now = time.perf_counter()
+        frames = self.frames_sent
+        span = now - self._stats_t
+        if span > 0:
+            self.achieved_hz = (frames - self._stats_frames) / span
+        self._stats_t = now
+        self._stats_frames = frames
+
+        jitter = percentiles_ms(self._jitter, self._jitter_count, SECONDS)
+        latency = percentiles_ms(self._latency, self._latency_count, SECONDS)
+        writer = self.writer
+        out = writer.stats() if writer is not None else {}
+        return {
+            "rate_hz": self.rate_hz,
+            "achieved_hz": self.achieved_hz,
+            "jitter_p50_ms": jitter[0],
+            "jitter_p99_ms": jitter[1],
+            "jitter_max_ms": jitter[2],
+            "input_latency_p50_ms": latency[0],
+            "input_latency_p99_ms": latency[1],
+            "frames": frames,
+            "held": self.frames_held,
+            "policy": self.policy.name,
+            "overruns": self.overruns,
+            "write_errors": self.write_errors,
+            "failsafe": self.failsafe,
+            "failsafe_frames": self.failsafe_frames,
+            "coalesced": out.get("coalesced", 0),
+            "backpressure": out.get("backpressure", 0),
+            "write_timeouts": out.get("timeouts", 0),
+            "write_resyncs": out.get("resyncs", 0),
+            "write_p99_ms": out.get("write_p99_ms", 0.0),
+            "write_max_ms": out.get("write_max_ms", 0.0),
+        }
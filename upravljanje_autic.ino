@@ -89,7 +89,8 @@ void loop() {
 
     if (buf_pos >= 3 && buffer[0] == CRSF_ADDRESS) {
       uint8_t length = buffer[1];
-      uint8_t total = 2 + length + 1;
+      // length covers type, payload and CRC
+      uint8_t total = 2 + length;
       if (buf_pos >= total) {
         uint8_t frametype = buffer[2];
         uint8_t *payload = &buffer[3];
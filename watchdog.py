@@ -0,0 +1,188 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+
+# ===================== STALL WATCHDOG =====================
+# input loops (GUI joystick timer, headless and station poll loops, the
+# isolated child's loop) call beat() every pass on the thread that reads input
+# and the TX engines stamp every slot; when either goes quiet for longer than
+# the threshold the engines switch to neutral frames, and while a TX thread
+# itself is late the watchdog writes those frames on its own. Worst-case
+# reaction is threshold + period, well inside the receiver's 500 ms failsafe
+StallEvent = namedtuple("StallEvent", "t duration_s cause where frames")
+
+SOURCE_INPUT = "input"
+
+
+def _raise_priority():
+    # best effort only; without privileges the thread keeps normal priority
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 15)  # THREAD_PRIORITY_TIME_CRITICAL
+        elif hasattr(threading, "get_native_id"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -10)
+    except Exception:
+        pass
+
+
+def _where(thread_id):
+    # innermost frame of a stalled thread, e.g. "rc_app1.py:512 populate_ports"
+    frame = sys._current_frames().get(thread_id) if thread_id else None
+    if frame is None:
+        return ""
+    last = traceback.extract_stack(frame, limit=1)[-1]
+    return f"{os.path.basename(last.filename)}:{last.lineno} {last.name}"
+
+
+class StallWatchdog:
+    def __init__(self, threshold_s=0.15, period_s=0.01, log_path=None, history=50):
+        self.threshold_s = threshold_s
+        self.period_s = period_s
+        self.log_path = log_path
+        self.engines = ()
+        # called with a StallEvent on the watchdog thread when a stall ends
+        self.on_stall = None
+
+        self.stalls = 0
+        self.failsafe_frames = 0
+        self.max_stall_s = 0.0
+        self.last = None
+        self.history = deque(maxlen=history)
+
+        # source -> (last beat, thread ident), swapped per source with one store
+        self._beats = {}
+        self._active = None
+        self._running = False
+        self._thread = None
+
+    # ---------- API (any thread) ----------
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for engine in self.engines:
+            engine.failsafe = False
+
+    def watch(self, engine):
+        self.engines = self.engines + (engine,)
+
+    def unwatch(self, engine):
+        self.engines = tuple(e for e in self.engines if e is not engine)
+        engine.failsafe = False
+
+    def beat(self, source=SOURCE_INPUT):
+        self._beats[source] = (time.perf_counter(), threading.get_ident())
+
+    def forget(self, source=SOURCE_INPUT):
+        # a source that stops on purpose (shutdown, mode switch) is not a stall
+        self._beats.pop(source, None)
+
+    # ---------- WATCHDOG THREAD ----------
+    def _run(self):
+        _raise_priority()
+        period = self.period_s
+        last_wake = time.perf_counter()
+        while self._running:
+            time.sleep(period)
+            now = time.perf_counter()
+            late = now - last_wake - period
+            last_wake = now
+            if late > self.threshold_s and self._active is None:
+                # the whole process was held (GIL, suspend, swapping): nothing
+                # could have been sent, so it is only logged; the sources get
+                # one period to show they are back before failsafe engages
+                self._finish(StallEvent(now - late, late, "process stalled (watchdog woke late)", "", 0))
+                continue
+            self._check(now)
+
+    def _check(self, now):
+        threshold = self.threshold_s
+        cause = None
+        since = now
+        ident = None
+        for source, (t, tid) in list(self._beats.items()):
+            if now - t > threshold and t < since:
+                cause, since, ident = f"{source} silent", t, tid
+        late = [e for e in self.engines if e.last_tick_t and now - e.last_tick_t > threshold]
+        if cause is None and late:
+            engine = min(late, key=lambda e: e.last_tick_t)
+            thread = getattr(engine, "_thread", None)
+            cause, since, ident = "tx thread late", engine.last_tick_t, thread.ident if thread else None
+
+        active = self._active
+        if cause is not None:
+            if active is None:
+                active = self._active = [since, cause, _where(ident), self._frames()]
+                self.stalls += 1
+                for engine in self.engines:
+                    engine.failsafe = True
+            # engines whose own thread is stuck get their neutral frames from here
+            for engine in late:
+                if engine.emit_failsafe():
+                    self.failsafe_frames += 1
+        elif active is not None:
+            self._active = None
+            for engine in self.engines:
+                engine.failsafe = False
+            since, cause, where, frames0 = active
+            self._finish(StallEvent(since, now - since, cause, where, self._frames() - frames0))
+
+    def _frames(self):
+        return self.failsafe_frames + sum(e.failsafe_frames for e in self.engines)
+
+    def _finish(self, event):
+        self.last = event
+        self.history.append(event)
+        if event.duration_s > self.max_stall_s:
+            self.max_stall_s = event.duration_s
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(format_stall(event) + "\n")
+            except OSError:
+                pass
+        cb = self.on_stall
+        if cb:
+            cb(event)
+
+    # ---------- STATS ----------
+    def stats(self):
+        active = self._active
+        last = self.last
+        return {
+            "stalls": self.stalls,
+            "active": active[1] if active else None,
+            "active_ms": (time.perf_counter() - active[0]) * 1000.0 if active else 0.0,
+            "last_ms": last.duration_s * 1000.0 if last else 0.0,
+            "last_cause": last.cause if last else "",
+            "max_ms": self.max_stall_s * 1000.0,
+            "failsafe_frames": self._frames(),
+        }
+
+
+def format_stall(event):
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    where = f" in {event.where}" if event.where else ""
+    return f"{stamp} stall {event.duration_s * 1000:.0f} ms: {event.cause}{where}, {event.frames} failsafe frames"
+
+
+def format_watchdog(stats):
+    if stats["active"]:
+        return f"🔴 FAILSAFE: {stats['active']} {stats['active_ms']:.0f} ms"
+    if not stats["stalls"]:
+        return "Stalls: 0"
+    return (f"Stalls: {stats['stalls']}  last {stats['last_ms']:.0f} ms ({stats['last_cause']})  "
+            f"max {stats['max_ms']:.0f} ms  failsafe {stats['failsafe_frames']}")